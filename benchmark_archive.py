@@ -0,0 +1,82 @@
+"""
+Book Ordering System - Invoice Archive Benchmark
+This script times opening a large memory-mapped invoice archive and looking
+invoices up by number, and reports how resident memory grows with the pages
+actually touched.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import bookstore_core_inher
+from bookstore_archive import InvoiceArchive, write_archive
+from bookstore_synthetic import SyntheticData
+
+def resident_mb() -> dict:
+    """Return this process's resident heap (RssAnon) and mapped file (RssFile) memory in MB.
+
+    Mapped archive pages count as RssFile: they are clean page cache that the
+    kernel can drop at any time, unlike heap memory held by Python objects.
+    """
+    sizes = {"RssAnon": float("nan"), "RssFile": float("nan")}
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                name, _, value = line.partition(":")
+                if name in sizes:
+                    sizes[name] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return sizes
+
+def memory_growth(before: dict) -> str:
+    """Describe resident memory growth since a resident_mb() reading."""
+    after = resident_mb()
+    return (f"heap +{after['RssAnon'] - before['RssAnon']:.1f}MB, "
+            f"mapped +{after['RssFile'] - before['RssFile']:.1f}MB")
+
+def main():
+    """Run the archive benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--path", help="archive file to reuse or create (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(prefix="bookstore-archive-"), "invoices.arch")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        write_archive(path, SyntheticData(bookstore_core_inher, args.invoices).iter_invoices())
+        print(f"Wrote {args.invoices} invoices in {time.perf_counter() - started:.1f}s")
+    print(f"Archive size: {os.path.getsize(path) / 1e6:.1f}MB")
+
+    before = resident_mb()
+    started = time.perf_counter()
+    archive = InvoiceArchive(path)
+    opened = time.perf_counter() - started
+    print(f"Opened {len(archive)} invoices in {opened * 1000:.2f}ms; {memory_growth(before)}")
+
+    rng = random.Random(3)
+    done = 0
+    for total in (100, 1_000, args.lookups):
+        numbers = [f"INV{rng.randrange(1, len(archive) + 1):010d}" for _ in range(total - done)]
+        started = time.perf_counter()
+        found = sum(archive.get(number) is not None for number in numbers)
+        elapsed = time.perf_counter() - started
+        done = total
+        print(f"Random lookups {done - len(numbers) + 1}-{total}: {found}/{len(numbers)} found, "
+              f"{elapsed / len(numbers) * 1e6:.1f}us each; {memory_growth(before)}")
+
+    started = time.perf_counter()
+    missing = sum(archive.get(f"INV{len(archive) + i + 1:010d}") is None for i in range(args.lookups))
+    elapsed = time.perf_counter() - started
+    print(f"{missing}/{args.lookups} misses past the archive: {elapsed / args.lookups * 1e6:.2f}us per lookup")
+    archive.close()
+    if not args.path:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
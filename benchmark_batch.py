@@ -0,0 +1,52 @@
+"""
+Book Ordering System - Batch Processing Benchmark
+This script measures how multi-process invoice printing and report
+aggregation scale with 1, 2, 4 and 8 worker processes.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import bookstore_core_inher
+from bookstore_batch import parallel_report, print_invoices
+from bookstore_records import invoice_to_record
+from bookstore_synthetic import SyntheticData
+
+WORKERS = [0, 1, 2, 4, 8]
+
+def make_records(count: int):
+    """Return seeded synthetic invoice records ordered like INVOICE_FIELDS."""
+    return [invoice_to_record(invoice) for invoice in SyntheticData(bookstore_core_inher, count).iter_invoices()]
+
+def main():
+    """Run the batch processing benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=WORKERS)
+    args = parser.parse_args()
+
+    records = make_records(args.invoices)
+    print(f"{args.invoices} invoices, {os.cpu_count()} CPUs; workers 0 runs in-process")
+    print(f"{'workers':>8} {'print s':>9} {'speedup':>8} {'report s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        out_dir = tempfile.mkdtemp(prefix="bookstore-print-")
+        try:
+            started = time.perf_counter()
+            print_invoices(records, out_dir, workers)
+            print_time = time.perf_counter() - started
+        finally:
+            shutil.rmtree(out_dir)
+        started = time.perf_counter()
+        parallel_report(records, workers)
+        report_time = time.perf_counter() - started
+        if baseline is None:
+            baseline = (print_time, report_time)
+        print(f"{workers:>8} {print_time:>9.2f} {baseline[0] / print_time:>7.2f}x "
+              f"{report_time:>9.2f} {baseline[1] / report_time:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Book Ordering System - Bulk Order Benchmark
+This script reports BookStore.place_orders_bulk throughput in orders per second.
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import bookstore_core_inher
+from bookstore_core_inher import Order, Shipping, Invoice, BookStore
+from bookstore_synthetic import SyntheticData
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+def make_catalogue(data: SyntheticData):
+    """Return the data's customer and book lookup tables keyed by email and book name."""
+    customers = {customer.email: customer for customer in data.customers}
+    books = {stock.book_name: stock for stock in data.stocks}
+    return customers, books
+
+def make_orders(data: SyntheticData):
+    """Return the data's orders as a list of (email, book name, urgent)."""
+    customers, stocks = data.customers, data.stocks
+    return [(customers[customer].email, stocks[stock].book_name, urgent)
+            for customer, stock, urgent, _ in data.iter_orders()]
+
+def place_one_by_one(bookstore: BookStore, orders, customers, books) -> None:
+    """Place orders the way the GUI does, one invoice at a time."""
+    for email, title, urgent in orders:
+        customer = customers[email]
+        stock = books[title]
+        shipping = Shipping(Order(customer, stock), datetime.now())
+        shipping.set_ship_cost(urgent)
+        invoice = Invoice(bookstore.next_invoice_number(), stock, shipping)
+        invoice.calculate_total()
+        bookstore.add_invoice(invoice)
+
+def main():
+    """Run the bulk order benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'orders':>10} {'one-by-one/s':>14} {'bulk/s':>12}")
+    for size in args.sizes:
+        data = SyntheticData(bookstore_core_inher, size)
+        customers, books = make_catalogue(data)
+        orders = make_orders(data)
+
+        single_rate = float("nan")
+        if size <= 100_000:
+            started = time.perf_counter()
+            place_one_by_one(BookStore(), orders, customers, books)
+            single_rate = size / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        summary = BookStore().place_orders_bulk(orders, customers, books)
+        bulk_rate = summary.placed / (time.perf_counter() - started)
+        print(f"{size:>10} {single_rate:>14,.0f} {bulk_rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
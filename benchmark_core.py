@@ -0,0 +1,207 @@
+"""
+Book Ordering System - Core Model Benchmark Suite
+This script times the core model operations in both bookstore_core and
+bookstore_core_inher on seeded synthetic data, writes the results as JSON and
+compares them with a saved baseline.
+
+Benchmarks, each at every --scales size:
+    construct         build Order, Shipping and Invoice objects over a seeded catalogue
+    calculate_total   Invoice.calculate_total over every invoice
+    add_invoice       add every invoice to a fresh BookStore
+    search_invoice    look up seeded random invoice numbers, mostly hits
+    get_all_invoices  copy out the whole invoice list
+    iter_invoices     walk the whole invoice list through iter_invoices
+    page              read the invoice list 100 at a time through page
+    render            format invoices as the invoice details text
+    render_cached     the same through a RenderCache holding every invoice rendered
+
+Every invoice of a scale is held in memory, roughly 0.5KB each, so budget
+about 5GB for 10M.
+
+Typical use:
+    python benchmark_core.py --output before.json
+    ... change bookstore_core*.py ...
+    python benchmark_core.py --baseline before.json --fail-on-regression
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import bookstore_core
+import bookstore_core_inher
+from bookstore_render import RenderCache, render_invoice
+from bookstore_synthetic import SyntheticData
+
+MODULES = {"plain": bookstore_core, "inher": bookstore_core_inher}
+BENCHMARKS = ("construct", "calculate_total", "add_invoice", "search_invoice", "get_all_invoices", "iter_invoices", "page",
+              "render", "render_cached")
+SCALES = [1_000, 10_000, 100_000]
+MAX_LOOKUPS = 100_000
+MAX_RENDERS = 100_000
+MIN_RUN_SECONDS = 0.05
+PAGE_LIMIT = 100
+
+def best_time(fn: Callable[[], object], repeat: int, min_run: float = MIN_RUN_SECONDS) -> float:
+    """Return the fastest per-call time of fn over repeat runs, each after a full collection.
+
+    Short calls are looped until a run lasts min_run seconds, so small scales
+    are not lost in timer and scheduler noise.
+    """
+    loops = 1
+    while True:
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_run:
+            break
+        loops = max(loops * 2, int(loops * min_run / max(elapsed, 1e-9)) + 1)
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - started) / loops)
+    return min(times)
+
+def run_scale(module_name: str, scale: int, repeat: int, seed: int, only: List[str]) -> List[Dict[str, object]]:
+    """Run the selected benchmarks for one module at one scale."""
+    module = MODULES[module_name]
+    data = SyntheticData(module, scale, seed)
+    invoices = list(data.iter_invoices())
+    bookstore = module.BookStore()
+    for invoice in invoices:
+        bookstore.add_invoice(invoice)
+    rng = random.Random(seed)
+    lookups = [f"INV{rng.randrange(1, scale + scale // 10 + 2):010d}" for _ in range(min(scale, MAX_LOOKUPS))]
+    renders = invoices[:MAX_RENDERS]
+    render_cache = RenderCache(len(renders))
+    for invoice in renders:
+        render_cache.render(invoice)
+
+    def add_all():
+        store = module.BookStore()
+        add = store.add_invoice
+        for invoice in invoices:
+            add(invoice)
+
+    def search_all():
+        search = bookstore.search_invoice
+        for invoice_nbr in lookups:
+            search(invoice_nbr)
+
+    def page_all():
+        page = bookstore.page
+        for offset in range(0, scale, PAGE_LIMIT):
+            page(offset, PAGE_LIMIT)
+
+    def total_all():
+        for invoice in invoices:
+            invoice.calculate_total()
+
+    cases = {
+        "construct": (lambda: list(data.iter_invoices()), scale),
+        "calculate_total": (total_all, scale),
+        "add_invoice": (add_all, scale),
+        "search_invoice": (search_all, len(lookups)),
+        "get_all_invoices": (bookstore.get_all_invoices, 1),
+        "iter_invoices": (lambda: deque(bookstore.iter_invoices(), 0), 1),
+        "page": (page_all, 1),
+        "render": (lambda: [render_invoice(invoice) for invoice in renders], len(renders)),
+        "render_cached": (lambda: [render_cache.render(invoice) for invoice in renders], len(renders)),
+    }
+    results = []
+    for name in only:
+        fn, operations = cases[name]
+        seconds = best_time(fn, repeat)
+        results.append({"module": module_name, "benchmark": name, "scale": scale, "operations": operations,
+                        "seconds": seconds, "ops_per_s": operations / seconds if seconds else float("inf"),
+                        "ns_per_op": seconds / operations * 1e9})
+    return results
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit of the working tree, if any."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: List[Dict[str, object]], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Print each result against the baseline and return descriptions of regressions."""
+    previous = {(row["module"], row["benchmark"], row["scale"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\nCompared with baseline {baseline['meta'].get('commit') or ''} ({baseline['meta']['timestamp']}):")
+    print(f"{'module':<7} {'benchmark':<17} {'scale':>10} {'before ns':>11} {'after ns':>11} {'change':>8}")
+    for row in results:
+        old = previous.get((row["module"], row["benchmark"], row["scale"]))
+        if old is None:
+            continue
+        change = row["ns_per_op"] / old["ns_per_op"] - 1
+        verdict = ""
+        if change > threshold:
+            verdict = "  SLOWER"
+            regressions.append(f"{row['module']} {row['benchmark']} at {row['scale']}: {change:+.1%}")
+        elif change < -threshold:
+            verdict = "  faster"
+        print(f"{row['module']:<7} {row['benchmark']:<17} {row['scale']:>10} {old['ns_per_op']:>11.1f} "
+              f"{row['ns_per_op']:>11.1f} {change:>+7.1%}{verdict}")
+    return regressions
+
+def main() -> int:
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES,
+                        help="orders per run, 1000 to 10000000 (default: %(default)s)")
+    parser.add_argument("--modules", nargs="+", choices=sorted(MODULES), default=list(MODULES))
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the fastest counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change reported as slower/faster (default: %(default)s)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 if anything is slower than the threshold")
+    args = parser.parse_args()
+
+    meta = {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+            "python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "seed": args.seed, "repeat": args.repeat}
+    print(f"{'module':<7} {'benchmark':<17} {'scale':>10} {'ns/op':>11} {'ops/s':>14}")
+    results = []
+    for scale in args.scales:
+        for module_name in args.modules:
+            for row in run_scale(module_name, scale, args.repeat, args.seed, args.benchmarks):
+                results.append(row)
+                print(f"{row['module']:<7} {row['benchmark']:<17} {row['scale']:>10} "
+                      f"{row['ns_per_op']:>11.1f} {row['ops_per_s']:>14,.0f}")
+            gc.collect()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"meta": meta, "results": results}, handle, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
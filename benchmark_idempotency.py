@@ -0,0 +1,74 @@
+"""
+Book Ordering System - Idempotent Ingest Benchmark
+This script feeds keyed orders to BookStore.create_invoices in batches, as
+the order service's batcher does, with 0%, 10% and 50% of them retries of
+an earlier order, and reports orders ingested per second and how many
+invoices were created.
+
+Each duplicate rate runs in memory and against a SQLite database, where
+keys are persisted with their invoices. With --cache smaller than the
+number of orders, older retries miss the cache and are answered from the
+persistent index instead.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import bookstore_core_inher
+from bookstore_core_inher import BookStore
+from bookstore_idempotency import IdempotencyCache
+from bookstore_storage import SQLiteStorage
+from bookstore_synthetic import SyntheticData
+
+DUPLICATE_RATES = (0.0, 0.1, 0.5)
+
+def make_feed(data: SyntheticData, duplicate_rate: float, seed: int = 7):
+    """Return (order, key) pairs; duplicate_rate of them resend an earlier order with its key."""
+    rng = random.Random(seed)
+    customers, stocks = data.customers, data.stocks
+    feed = []
+    for customer, stock, urgent, _ in data.iter_orders():
+        if feed and rng.random() < duplicate_rate:
+            feed.append(feed[rng.randrange(len(feed))])
+        else:
+            feed.append(((customers[customer], stocks[stock], urgent), f"order-{len(feed)}"))
+    return feed
+
+def ingest(bookstore: BookStore, feed, batch_size: int, keyed: bool = True) -> float:
+    """Place the feed in batches and return the elapsed seconds."""
+    started = time.perf_counter()
+    for start in range(0, len(feed), batch_size):
+        batch = feed[start:start + batch_size]
+        orders = [order for order, _ in batch]
+        bookstore.create_invoices(orders, idempotency_keys=[key for _, key in batch] if keyed else None)
+    return time.perf_counter() - started
+
+def main():
+    """Run the idempotent ingest benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--cache", type=int, default=100_000, help="idempotency keys kept in memory")
+    args = parser.parse_args()
+
+    data = SyntheticData(bookstore_core_inher, args.orders)
+    print(f"{args.orders:,} orders in batches of {args.batch_size}, {args.cache:,} cached keys")
+    print(f"{'store':<8} {'duplicates':>10} {'keys':>5} {'orders/s':>10} {'invoices':>9} {'index hits':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in DUPLICATE_RATES:
+            feed = make_feed(data, rate)
+            for label in ("memory", "sqlite"):
+                for keyed in ((False, True) if rate == 0 else (True,)):
+                    storage = SQLiteStorage(os.path.join(tmp, f"{label}-{rate}-{keyed}.db")) if label == "sqlite" else None
+                    bookstore = BookStore(storage, idempotency=IdempotencyCache(args.cache))
+                    elapsed = ingest(bookstore, feed, args.batch_size, keyed)
+                    print(f"{label:<8} {rate:>10.0%} {'yes' if keyed else 'no':>5} {len(feed) / elapsed:>10,.0f} "
+                          f"{bookstore.get_invoice_count():>9,} {bookstore.idempotency.counters['index_hits']:>11,}")
+                    if storage is not None:
+                        storage.close()
+
+if __name__ == "__main__":
+    main()
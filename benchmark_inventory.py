@@ -0,0 +1,77 @@
+"""
+Book Ordering System - Inventory Contention Benchmark
+This script has many threads reserve and commit stock at once, all on one
+hot title or spread over many, with a single lock (stripes=1) and with lock
+striping, and reports reservations per second and how often a thread had to
+wait for a stripe lock.
+
+Under CPython threads only contend when one is switched out while holding a
+lock, so the switch interval is shortened (--switch-interval) to make that
+happen about as often as it does with truly parallel intake.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import bookstore_core_inher
+from bookstore_inventory import Inventory, OutOfStock
+from bookstore_synthetic import make_stocks
+
+def run(inventory: Inventory, books, threads: int, operations: int) -> float:
+    """Reserve and commit operations copies per thread; return the elapsed seconds."""
+    start = threading.Barrier(threads + 1)
+    failures = []
+
+    def worker(offset: int):
+        count = len(books)
+        start.wait()
+        for i in range(operations):
+            try:
+                inventory.reserve((books[(offset + i) % count],)).commit()
+            except OutOfStock as exc:
+                failures.append(exc)
+                return
+
+    workers = [threading.Thread(target=worker, args=(n * 7919,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if failures:
+        raise failures[0]
+    return elapsed
+
+def main():
+    """Run the inventory contention benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=20_000, help="reservations per thread")
+    parser.add_argument("--titles", type=int, default=10_000, help="titles in the spread scenario")
+    parser.add_argument("--stripes", type=int, default=64)
+    parser.add_argument("--switch-interval", type=float, default=1e-5,
+                        help="seconds between forced thread switches (default: %(default)s)")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(args.switch_interval)
+    total = args.threads * args.operations
+    books = make_stocks(bookstore_core_inher, args.titles)
+    print(f"{args.threads} threads x {args.operations:,} reservations")
+    print(f"{'scenario':<8} {'locking':<12} {'reservations/s':>15} {'contended':>10} {'check':>6}")
+    for scenario, titles in (("hot", books[:1]), ("spread", books)):
+        for label, stripes in (("global lock", 1), (f"{args.stripes} stripes", args.stripes)):
+            inventory = Inventory(stripes)
+            for stock in titles:
+                inventory.set_quantity(stock, total)
+            elapsed = run(inventory, titles, args.threads, args.operations)
+            stats = inventory.stats()
+            consistent = stats["reserved"] == 0 and stats["on_hand"] == total * len(titles) - total
+            print(f"{scenario:<8} {label:<12} {total / elapsed:>15,.0f} "
+                  f"{stats['contended'] / total:>10.2%} {'ok' if consistent else 'WRONG':>6}")
+
+if __name__ == "__main__":
+    main()
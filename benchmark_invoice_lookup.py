@@ -0,0 +1,51 @@
+"""
+Book Ordering System - Invoice Lookup Benchmark
+This script shows that BookStore invoice lookups stay flat as the repository grows.
+"""
+
+import argparse
+import random
+import time
+
+import bookstore_core_inher
+from bookstore_core_inher import BookStore
+from bookstore_synthetic import SyntheticData
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+def build_bookstore(size: int) -> BookStore:
+    """Build a BookStore holding the given number of invoices."""
+    bookstore = BookStore()
+    for invoice in SyntheticData(bookstore_core_inher, size).iter_invoices():
+        bookstore.add_invoice(invoice)
+    return bookstore
+
+def time_lookups(bookstore: BookStore, lookups: int, seed: int = 42) -> float:
+    """Return the mean lookup latency in microseconds."""
+    rng = random.Random(seed)
+    count = bookstore.get_invoice_count()
+    keys = [f"INV{rng.randint(1, count):010d}" for _ in range(lookups)]
+    search = bookstore.search_invoice
+    started = time.perf_counter()
+    for key in keys:
+        search(key)
+    elapsed = time.perf_counter() - started
+    return elapsed / lookups * 1e6
+
+def main():
+    """Run the lookup benchmark across repository sizes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'invoices':>10} {'build s':>10} {'lookup us':>10}")
+    for size in args.sizes:
+        started = time.perf_counter()
+        bookstore = build_bookstore(size)
+        build_time = time.perf_counter() - started
+        lookup_us = time_lookups(bookstore, args.lookups)
+        print(f"{size:>10} {build_time:>10.2f} {lookup_us:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Book Ordering System - Invoice Search Benchmark
+This script times ranked free-text invoice queries against a large index.
+"""
+
+import argparse
+import time
+from datetime import date
+
+import bookstore_core_inher
+from bookstore_search import InvoiceSearchIndex
+from bookstore_synthetic import SyntheticData
+
+QUERIES = ["smith", "smiht python", "grace patel", "design patterns", "INV0000012345",
+           "wilson guide", "patterns 2020"]
+
+def build_index(count: int) -> InvoiceSearchIndex:
+    """Build a search index over seeded synthetic invoices."""
+    index = InvoiceSearchIndex()
+    for invoice in SyntheticData(bookstore_core_inher, count).iter_invoices():
+        index.add(invoice)
+    return index
+
+def main():
+    """Run the search benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = build_index(args.invoices)
+    print(f"Indexed {len(index)} invoices in {time.perf_counter() - started:.1f}s")
+    # The first query sorts the vocabulary for prefix matching
+    started = time.perf_counter()
+    index.search("warmup")
+    print(f"First query (vocabulary sort) {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    print(f"{'query':<24} {'date range':<12} {'hits':>8} {'first page ms':>14}")
+    for query in QUERIES:
+        for dates in ((None, None), (date(2020, 3, 1), date(2020, 3, 7))):
+            started = time.perf_counter()
+            results = index.search(query, *dates)
+            results.page(0, 50)
+            elapsed = (time.perf_counter() - started) * 1000
+            label = "march wk1" if dates[0] else "-"
+            print(f"{query:<24} {label:<12} {len(results):>8} {elapsed:>14.1f}")
+
+if __name__ == "__main__":
+    main()
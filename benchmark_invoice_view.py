@@ -0,0 +1,68 @@
+"""
+Book Ordering System - Invoice View Benchmark
+This script compares the old Text widget dump with the virtualized invoice list.
+It needs a display; run it under Xvfb on headless machines.
+"""
+
+import argparse
+import sys
+import time
+import tkinter as tk
+
+from benchmark_invoice_lookup import build_bookstore
+from bookstore_invoice_view import InvoiceListView
+
+def render_text_dump(text: tk.Text, invoices) -> None:
+    """Render invoices the way view_all_invoices used to, one insert per invoice."""
+    text.delete(1.0, tk.END)
+    for invoice in invoices:
+        invoice_text = f"""
+Invoice Number: {invoice.invoice_nbr}
+Customer: {invoice.ship_order.order.customer.name}
+Book: {invoice.stock.book_name}
+Author: {invoice.stock.author}
+Price: £{invoice.stock.price:.2f}
+Shipping Cost: £{invoice.ship_order.calc_ship_cost():.2f}
+Total Cost: £{invoice.total_cost:.2f}
+{'='*50}
+"""
+        text.insert(tk.END, invoice_text)
+
+def timed(root: tk.Tk, action) -> float:
+    """Run an action and wait for Tk to process the resulting redraw."""
+    started = time.perf_counter()
+    action()
+    root.update_idletasks()
+    return time.perf_counter() - started
+
+def main():
+    """Run the rendering comparison."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=100_000)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as exc:
+        print(f"Cannot open a display: {exc}")
+        return 1
+    root.geometry("800x600")
+    invoices = build_bookstore(args.invoices).get_all_invoices()
+
+    text = tk.Text(root)
+    text.pack()
+    old_time = timed(root, lambda: render_text_dump(text, invoices))
+    text.destroy()
+
+    view = InvoiceListView(root)
+    view.pack(expand=True, fill="both")
+    new_time = timed(root, lambda: view.set_invoices(invoices))
+    sort_time = timed(root, lambda: view.sort_by("total"))
+    root.destroy()
+
+    print(f"{'invoices':>10} {'text dump s':>12} {'treeview s':>12} {'sort s':>10}")
+    print(f"{args.invoices:>10} {old_time:>12.3f} {new_time:>12.3f} {sort_time:>10.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Book Ordering System - Memory Benchmark
+This script measures bytes per resident invoice with tracemalloc.
+It compares the dict-based classes in bookstore_core.py, the slotted classes in
+bookstore_core_inher.py and the columnar InvoiceTable.
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+import bookstore_core
+import bookstore_core_inher
+from bookstore_columnar import InvoiceTable
+from bookstore_synthetic import SyntheticData
+
+def measure(build) -> int:
+    """Return the bytes still allocated by whatever build() returns.
+
+    The customers and books are built before tracing starts, so the figure
+    covers the invoices alone, not the catalogue they share.
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del result
+    return used
+
+def main():
+    """Run the memory comparison."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.invoices
+    plain = SyntheticData(bookstore_core, count)
+    slotted = SyntheticData(bookstore_core_inher, count)
+
+    results = [
+        ("dict objects (bookstore_core)", measure(lambda: list(plain.iter_invoices()))),
+        ("slotted objects (bookstore_core_inher)", measure(lambda: list(slotted.iter_invoices()))),
+        ("InvoiceTable columns", measure(lambda: InvoiceTable.from_invoices(slotted.iter_invoices()))),
+    ]
+    print(f"{'representation':<40} {'bytes/invoice':>14}")
+    for name, used in results:
+        print(f"{name:<40} {used / count:>14.1f}")
+
+if __name__ == "__main__":
+    main()
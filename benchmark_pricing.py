@@ -0,0 +1,120 @@
+"""
+Book Ordering System - Pricing Benchmark
+This script measures quotes per second for a large rule set: evaluated rule
+by rule as written, from the compiled lookup tables, and through the LRU
+quote cache with hot and cold working sets.
+"""
+
+import argparse
+import random
+import time
+
+import bookstore_core_inher
+from bookstore_index import normalize_key
+from bookstore_pricing import (BulkDiscount, PricingEngine, Promo, Quote, RuleSet, ShippingTier)
+from bookstore_synthetic import make_stocks
+
+def make_rules(destinations: int, tiers: int, promos: int, books: list) -> RuleSet:
+    """Return a seeded rule set with destinations x tiers shipping rules."""
+    rng = random.Random(17)
+    shipping = [ShippingTier(f"Zone {zone}", 0.5 * (tier + 1) if tier < tiers - 1 else float("inf"),
+                             2.0 + zone % 9 + tier * 0.75, 4.0 + zone % 9 + tier * 1.25)
+                for zone in range(destinations) for tier in range(tiers)]
+    rng.shuffle(shipping)
+    bulk = [BulkDiscount(quantity, quantity / 200) for quantity in range(5, 40, 5)]
+    promo_list = [Promo(f"PROMO{number}", rate=0.05 * (number % 4), free_shipping=number % 7 == 0)
+                  for number in range(promos)]
+    weights = {stock.book_name: 0.2 + (i % 25) * 0.1 for i, stock in enumerate(books)}
+    return RuleSet(shipping, bulk, promo_list, vat_rate=0.2, weights=weights)
+
+def naive_quote(rules: RuleSet, stock, urgent: bool, destination: str, promo: str, quantity: int) -> Quote:
+    """Evaluate the rule set rule by rule, the way it would be without compilation."""
+    subtotal = stock.price * quantity
+    rate = 0.0
+    for rule in rules.bulk_discounts:
+        if quantity >= rule.min_quantity and rule.rate > rate:
+            rate = rule.rate
+    discount = subtotal * rate
+    weight = rules.weights.get(stock.book_name, rules.default_weight) * quantity
+    best = None
+    for tier in rules.shipping_tiers:
+        if (normalize_key(tier.destination) == destination and weight <= tier.max_weight
+                and (best is None or tier.max_weight < best.max_weight)):
+            best = tier
+    shipping = best.urgent_cost if urgent else best.standard_cost
+    if promo:
+        for candidate in rules.promos:
+            if candidate.code == promo:
+                remaining = subtotal - discount
+                discount += min(remaining, remaining * candidate.rate + candidate.amount_off)
+                if candidate.free_shipping:
+                    shipping = 0.0
+                break
+    subtotal, discount = round(subtotal, 2), round(discount, 2)
+    vat = round((subtotal - discount + shipping) * rules.vat_rate, 2)
+    return Quote(subtotal, discount, shipping, vat, round(subtotal - discount + shipping + vat, 2))
+
+def make_requests(count: int, destinations: int, promos: int, books: list, distinct: int):
+    """Return count order lines drawn from `distinct` possible combinations."""
+    rng = random.Random(23)
+    pool = [(rng.choice(books), rng.random() < 0.3, f"zone {rng.randrange(destinations)}",
+             f"PROMO{rng.randrange(promos)}" if rng.random() < 0.2 else None, rng.choice((1, 1, 1, 2, 5, 10)))
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+def time_quotes(label: str, quote, requests) -> float:
+    started = time.perf_counter()
+    for stock, urgent, destination, promo, quantity in requests:
+        quote(stock, urgent, destination, promo, quantity)
+    elapsed = time.perf_counter() - started
+    rate = len(requests) / elapsed
+    print(f"{label:<40} {rate:>12,.0f} quotes/s {elapsed / len(requests) * 1e6:>8.2f}us each")
+    return rate
+
+def main():
+    """Run the pricing benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quotes", type=int, default=200_000)
+    parser.add_argument("--destinations", type=int, default=200)
+    parser.add_argument("--tiers", type=int, default=10)
+    parser.add_argument("--promos", type=int, default=500)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--cache-size", type=int, default=65_536)
+    args = parser.parse_args()
+
+    books = make_stocks(bookstore_core_inher, args.books)
+    rules = make_rules(args.destinations, args.tiers, args.promos, books)
+    print(f"{len(rules.shipping_tiers)} shipping tiers, {len(rules.bulk_discounts)} bulk discounts, "
+          f"{len(rules.promos)} promos, {len(rules.weights)} book weights")
+
+    started = time.perf_counter()
+    engine = PricingEngine(rules, cache_size=0)
+    print(f"Compiled in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    hot = make_requests(args.quotes, args.destinations, args.promos, books, 5_000)
+    naive_requests = hot[:max(1, args.quotes // 50)]
+    for request in naive_requests[:1_000]:
+        stock, urgent, destination, promo, quantity = request
+        expected = naive_quote(rules, stock, urgent, destination, promo, quantity)
+        actual = engine.quote(stock, urgent, destination, promo, quantity)
+        assert (expected.total, expected.shipping) == (actual.total, actual.shipping), request
+    time_quotes("rule by rule (uncompiled)",
+                lambda *request: naive_quote(rules, *request[:2], normalize_key(request[2]), *request[3:]),
+                naive_requests)
+    time_quotes("compiled, no cache", engine.quote, hot)
+
+    engine = PricingEngine(rules, cache_size=args.cache_size)
+    time_quotes("compiled + LRU, 5k hot combinations", engine.quote, hot)
+    print(f"  cache: {engine.cache_info()}")
+
+    engine = PricingEngine(rules, cache_size=args.cache_size)
+    cold = make_requests(args.quotes, args.destinations, args.promos, books, args.quotes)
+    time_quotes("compiled + LRU, all distinct combinations", engine.quote, cold)
+    print(f"  cache: {engine.cache_info()}")
+
+    started = time.perf_counter()
+    engine.set_rules(rules)
+    print(f"set_rules recompile and cache clear: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
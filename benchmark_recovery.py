@@ -0,0 +1,85 @@
+"""
+Book Ordering System - Journal Recovery Benchmark
+This script times rebuilding a BookStore from an order journal snapshot plus
+its tail, and the per-order cost of journaled add_invoice calls.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import bookstore_core_inher
+from benchmark_bulk_orders import make_catalogue, make_orders, place_one_by_one
+from bookstore_core_inher import BookStore
+from bookstore_journal import OrderJournal
+from bookstore_synthetic import SyntheticData
+
+def build_journal(directory: str, count: int, tail: int, chunk_size: int = 10_000) -> None:
+    """Journal count invoices, checkpointing before the last tail of them."""
+    data = SyntheticData(bookstore_core_inher, count)
+    customers, books = make_catalogue(data)
+    orders = make_orders(data)
+    bookstore = BookStore(journal=OrderJournal(directory))
+    bookstore.place_orders_bulk(orders[:count - tail], customers, books, chunk_size=chunk_size)
+    bookstore.checkpoint()
+    bookstore.place_orders_bulk(orders[count - tail:], customers, books, chunk_size=chunk_size)
+    bookstore.journal.close()
+
+def time_appends(directory: str, count: int, threads: int) -> tuple:
+    """Place count orders one at a time from several threads; return (orders/s, fsyncs)."""
+    data = SyntheticData(bookstore_core_inher, count)
+    customers, books = make_catalogue(data)
+    orders = make_orders(data)
+    bookstore = BookStore(journal=OrderJournal(directory))
+    share = count // threads
+    workers = [threading.Thread(target=place_one_by_one,
+                                args=(bookstore, orders[i * share:(i + 1) * share], customers, books))
+               for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    bookstore.journal.close()
+    return share * threads / elapsed, bookstore.journal.sync_count
+
+def main():
+    """Run the recovery benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=50_000, help="invoices journaled after the snapshot")
+    parser.add_argument("--orders", type=int, default=2_000, help="orders for the add_invoice timing")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bookstore-journal-")
+    try:
+        started = time.perf_counter()
+        build_journal(directory, args.invoices, args.tail)
+        print(f"Journaled {args.invoices} invoices in {time.perf_counter() - started:.1f}s")
+        sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+        print("Files: " + ", ".join(f"{name} {size / 1e6:.1f}MB" for name, size in sizes.items()))
+
+        started = time.perf_counter()
+        bookstore = BookStore(journal=OrderJournal(directory))
+        elapsed = time.perf_counter() - started
+        print(f"Recovered {bookstore.get_invoice_count()} invoices "
+              f"(snapshot + {args.tail} tail) in {elapsed:.2f}s")
+        bookstore.journal.close()
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"\n{'threads':>8} {'orders/s':>10} {'fsyncs':>8}")
+    for threads in (1, 4, 16):
+        directory = tempfile.mkdtemp(prefix="bookstore-journal-")
+        try:
+            rate, syncs = time_appends(directory, args.orders, threads)
+        finally:
+            shutil.rmtree(directory)
+        print(f"{threads:>8} {rate:>10,.0f} {syncs:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Book Ordering System - Registry Benchmark
+This script feeds a seeded customer list with realistic duplication into a
+plain list (what the GUI did before), a dict keyed by email (what the service
+did before) and a CustomerRegistry, and reports the time taken, how many
+customers were kept and the bytes retained.
+
+About a fifth of the rows repeat an earlier customer: the same email with
+different case or stray whitespace, the same phone number written another
+way, or a new email for a known phone number. Names come from a small pool,
+as real names do, so interning them pays off as well.
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Iterator
+
+from bookstore_core_inher import Customer
+from bookstore_index import normalize_key
+from bookstore_registry import CustomerRegistry
+from bookstore_synthetic import FIRST_NAMES, LAST_NAMES
+
+def iter_customers(count: int, duplicate_share: float, seed: int = 1) -> Iterator[Customer]:
+    """Yield count customers, about duplicate_share of them repeats of earlier ones."""
+    rng = random.Random(seed)
+    unique = 0
+    for _ in range(count):
+        if unique and rng.random() < duplicate_share:
+            i = rng.randrange(unique)
+            first, last = FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[i % len(LAST_NAMES)]
+            email, phone = f"{first.lower()}.{last.lower()}{i}@example.com", f"555-{i:07d}"
+            variant = rng.randrange(3)
+            if variant == 0:
+                email = f" {email.upper()} "
+            elif variant == 1:
+                phone = f"(555) {i // 10000:03d} {i % 10000:04d}"
+            else:
+                email = f"{first.lower()}{i}@work.example"
+            yield Customer(f"{first} {last}", phone, email)
+            continue
+        i, unique = unique, unique + 1
+        first, last = FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[i % len(LAST_NAMES)]
+        yield Customer(f"{first} {last}", f"555-{i:07d}", f"{first.lower()}.{last.lower()}{i}@example.com")
+
+def load_list(customers):
+    """Append every row, as the GUI did before registries."""
+    kept = []
+    for customer in customers:
+        kept.append(customer)
+    return kept
+
+def load_email_dict(customers):
+    """Keep the first customer per normalized email, as the service did before registries."""
+    kept = {}
+    for customer in customers:
+        kept.setdefault(normalize_key(customer.email), customer)
+    return kept
+
+def load_registry(customers):
+    """Merge every row into a registry."""
+    registry = CustomerRegistry()
+    registry.merge(customers)
+    return registry
+
+def timed(load, count: int, duplicate_share: float):
+    """Return (seconds, customers kept) for one load."""
+    gc.collect()
+    started = time.perf_counter()
+    result = load(iter_customers(count, duplicate_share))
+    elapsed = time.perf_counter() - started
+    return elapsed, len(result)
+
+def retained(load, count: int, duplicate_share: float) -> int:
+    """Return the bytes still allocated by whatever load() keeps."""
+    gc.collect()
+    tracemalloc.start()
+    result = load(iter_customers(count, duplicate_share))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return used
+
+def main():
+    """Run the registry benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of repeated rows")
+    args = parser.parse_args()
+
+    print(f"{args.customers:,} rows, {args.duplicates:.0%} duplicates")
+    print(f"{'loader':<18} {'seconds':>8} {'rows/s':>11} {'kept':>10} {'MB':>8} {'bytes/kept':>11}")
+    for label, load in (("list append", load_list), ("email dict", load_email_dict),
+                        ("CustomerRegistry", load_registry)):
+        elapsed, kept = timed(load, args.customers, args.duplicates)
+        used = retained(load, args.customers, args.duplicates)
+        print(f"{label:<18} {elapsed:>8.2f} {args.customers / elapsed:>11,.0f} {kept:>10,} "
+              f"{used / 1e6:>8.1f} {used / kept:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Book Ordering System - Sales Report Benchmark
+This script times BookStore.sales_report, the path the Reports tab uses.
+
+The first report builds the columnar table the store then keeps current;
+later reports, with new orders added between them, only aggregate. Both
+are compared with rebuilding the table from the invoices for every
+report, and each aggregation engine is timed on its own.
+"""
+
+import argparse
+import time
+
+import bookstore_core_inher
+from bookstore_core_inher import BookStore
+from bookstore_reports import build_report, np
+from bookstore_synthetic import SyntheticData
+
+def main():
+    """Run the report benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--new-orders", type=int, default=100, help="invoices added between repeated reports")
+    args = parser.parse_args()
+
+    engines = [("python", False)] + ([("numpy", True)] if np is not None else [])
+    total = args.invoices + len(engines) * args.repeat * args.new_orders
+    invoices = list(SyntheticData(bookstore_core_inher, total).iter_invoices())
+    bookstore = BookStore()
+    bookstore.add_invoices(invoices[:args.invoices])
+    extra = iter(invoices[args.invoices:])
+    print(f"{args.invoices:,} invoices")
+
+    started = time.perf_counter()
+    build_report(bookstore.iter_invoices())
+    print(f"{'rebuild table per report':<30} {time.perf_counter() - started:.3f}s")
+    started = time.perf_counter()
+    bookstore.sales_report()
+    print(f"{'first sales_report':<30} {time.perf_counter() - started:.3f}s")
+
+    for name, use_numpy in engines:
+        best = float("inf")
+        for _ in range(args.repeat):
+            bookstore.add_invoices([next(extra) for _ in range(args.new_orders)])
+            started = time.perf_counter()
+            bookstore.sales_report(use_numpy=use_numpy)
+            best = min(best, time.perf_counter() - started)
+        print(f"{'later sales_report (' + name + ')':<30} {best:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Book Ordering System - Order Intake Service Benchmark
+This script drives the HTTP order service with concurrent keep-alive clients
+and reports throughput and p50/p99 latency for order placement and invoice
+lookup.
+
+By default the service runs in a background thread of this process on an
+ephemeral port, backed by an in-memory BookStore; pass --url to load an
+already running service instead.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import bookstore_core_inher
+from bookstore_core_inher import BookStore
+from bookstore_service import OrderService
+from bookstore_synthetic import make_customers, make_stocks
+
+class Client:
+    """One keep-alive HTTP/1.1 connection issuing JSON requests."""
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, object]:
+        """Send a request and return (status, decoded JSON body)."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                           .encode("latin-1") + body)
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self._reader.readexactly(length)
+        return int(status_line.split(" ")[1]), json.loads(data) if data else None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at a fraction of a sorted list (nearest rank)."""
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def start_local_service(**options) -> Tuple[str, int, OrderService]:
+    """Run an OrderService over an in-memory BookStore in a daemon thread."""
+    service = OrderService(BookStore(), **options)
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        async def serve():
+            server = await service.start("127.0.0.1", 0)
+            address["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            async with server:
+                await server.serve_forever()
+        asyncio.run(serve())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return "127.0.0.1", address["port"], service
+
+async def seed(client: Client, customers: list, books: list) -> None:
+    """Register the synthetic customers and books with the service."""
+    for start in range(0, len(customers), 1000):
+        await client.request("POST", "/customers", [
+            {"name": customer.name, "phone": customer.phone, "email": customer.email}
+            for customer in customers[start:start + 1000]])
+    for start in range(0, len(books), 1000):
+        await client.request("POST", "/books", [
+            {"book_name": stock.book_name, "author": stock.author, "price": stock.price}
+            for stock in books[start:start + 1000]])
+
+async def run_phase(host: str, port: int, clients: int, requests: int, make_request) -> dict:
+    """Issue requests from concurrent clients; return latencies and status counts."""
+    latencies: List[float] = []
+    statuses = {}
+    remaining = [requests]
+
+    async def worker(number: int):
+        client = Client(host, port)
+        rng = random.Random(number)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                method, path, payload = make_request(rng)
+                started = time.perf_counter()
+                status, _ = await client.request(method, path, payload)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"requests": len(latencies), "seconds": elapsed, "statuses": statuses,
+            "p50": percentile(latencies, 0.50), "p99": percentile(latencies, 0.99)}
+
+def report(label: str, result: dict, per_request: int = 1) -> None:
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(result["statuses"].items()))
+    rate = result["requests"] / result["seconds"]
+    print(f"{label:<28} {rate:>9.0f} req/s {rate * per_request:>9.0f} items/s "
+          f"p50 {result['p50'] * 1000:>7.2f}ms p99 {result['p99'] * 1000:>7.2f}ms  [{statuses}]")
+
+async def run(args) -> None:
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port, _ = start_local_service(max_pending=args.max_pending, batch_size=args.batch_size)
+    customers = make_customers(bookstore_core_inher, args.customers)
+    books = make_stocks(bookstore_core_inher, args.books)
+    setup = Client(host, port)
+    await seed(setup, customers, books)
+    await setup.close()
+    print(f"{args.clients} clients against {host}:{port}")
+    emails = [customer.email for customer in customers]
+    titles = [stock.book_name for stock in books]
+
+    def order(rng):
+        return {"customer_email": rng.choice(emails), "book_name": rng.choice(titles), "urgent": rng.random() < 0.3}
+
+    result = await run_phase(host, port, args.clients, args.orders,
+                             lambda rng: ("POST", "/orders", order(rng)))
+    report("POST /orders (1 each)", result)
+
+    per_request = args.batch
+    result = await run_phase(host, port, args.clients, args.orders // per_request,
+                             lambda rng: ("POST", "/orders", {"orders": [order(rng) for _ in range(per_request)]}))
+    report(f"POST /orders ({per_request} each)", result, per_request)
+
+    placed = args.orders + args.orders // per_request * per_request
+    result = await run_phase(host, port, args.clients, args.lookups,
+                             lambda rng: ("GET", f"/invoices/INV{rng.randrange(1, placed + 1):010d}", None))
+    report("GET /invoices/<nbr>", result)
+
+    result = await run_phase(host, port, args.clients, args.lookups // 10,
+                             lambda rng: ("GET", f"/invoices?q={rng.choice(emails).partition('@')[0]}&limit=20",
+                                          None))
+    report("GET /invoices?q=", result)
+
+def main():
+    """Run the service load generator."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="load an existing service instead of starting one")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=20, help="orders per batched request")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--books", type=int, default=5_000)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
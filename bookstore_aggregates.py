@@ -0,0 +1,52 @@
+"""
+Book Ordering System - Running Aggregates
+This module keeps sales totals up to date as invoices are added.
+"""
+
+from typing import Dict
+
+class RunningAggregates:
+    """Sales totals updated in O(1) per invoice.
+
+    Revenue is grouped per book name and per customer email, matching the
+    title and customer groupings of the full sales report.
+    """
+    def __init__(self):
+        self.invoice_count = 0
+        self.total_revenue = 0.0
+        self.urgent_count = 0
+        self.revenue_by_book: Dict[str, float] = {}
+        self.revenue_by_customer: Dict[str, float] = {}
+
+    def add(self, invoice) -> None:
+        """Fold one invoice into the totals."""
+        total = invoice.total_cost
+        book = invoice.stock.book_name
+        email = invoice.ship_order.order.customer.email
+        self.invoice_count += 1
+        self.total_revenue += total
+        if invoice.ship_order.is_urgent:
+            self.urgent_count += 1
+        self.revenue_by_book[book] = self.revenue_by_book.get(book, 0.0) + total
+        self.revenue_by_customer[email] = self.revenue_by_customer.get(email, 0.0) + total
+
+    def merge(self, other: "RunningAggregates") -> None:
+        """Fold another set of totals into this one."""
+        self.invoice_count += other.invoice_count
+        self.total_revenue += other.total_revenue
+        self.urgent_count += other.urgent_count
+        for book, total in other.revenue_by_book.items():
+            self.revenue_by_book[book] = self.revenue_by_book.get(book, 0.0) + total
+        for email, total in other.revenue_by_customer.items():
+            self.revenue_by_customer[email] = self.revenue_by_customer.get(email, 0.0) + total
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the scalar totals without copying the groupings."""
+        count = self.invoice_count
+        return {
+            "invoice_count": count,
+            "total_revenue": self.total_revenue,
+            "urgent_count": self.urgent_count,
+            "standard_count": count - self.urgent_count,
+            "average_order_value": self.total_revenue / count if count else 0.0,
+        }
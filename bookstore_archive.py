@@ -0,0 +1,264 @@
+"""
+Book Ordering System - Invoice Archive
+This module writes and reads memory-mapped, read-only archives of past invoices.
+
+An archive file is laid out as:
+
+    header    magic, version, record size, record count and section offsets
+    records   one fixed-width record per invoice, in the order written
+    index     (invoice number, record number) entries sorted by number, with
+              numbers NUL-padded to the longest one so entries are fixed-width
+    strings   UTF-8 text of every distinct string, referenced by offset/length
+
+Opening an archive maps the file and reads only the header, so it takes the
+same time for any size. A lookup binary-searches the index through the map;
+since the keys are stored inline, it touches a handful of index pages and
+then the one record it returns. The operating system pages them in on demand
+and can drop them again, so resident memory follows what is actually read.
+
+Usage:
+    python -m bookstore_archive build invoices-2023.arch --db bookstore.db --before 2024-01-01
+    python -m bookstore_archive get invoices-2023.arch INV0000012345
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bookstore_core_inher import Invoice
+from bookstore_records import invoice_from_record, record_to_dict
+
+MAGIC = b"BKARCH01"
+VERSION = 1
+HEADER = struct.Struct("<8sHHHQQQQ")
+# invoice_nbr, customer name, phone, email, book name, author as (offset, length)
+# string references, then price, ship time, ship cost, urgent and total cost
+RECORD = struct.Struct("<IHIHIHIHIHIHdqd?d")
+RECORD_NO = struct.Struct("<I")
+STRING_FIELDS = 6
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+MAX_STRING_TABLE = 2 ** 32
+MAX_STRING_LENGTH = 2 ** 16
+
+class StringTable:
+    """Deduplicated UTF-8 strings addressed by (offset, length)."""
+    def __init__(self):
+        self._refs: Dict[str, Tuple[int, int]] = {}
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def ref(self, text: str) -> Tuple[int, int]:
+        """Return the reference of a string, adding it if new."""
+        ref = self._refs.get(text)
+        if ref is None:
+            data = text.encode("utf-8")
+            if len(data) >= MAX_STRING_LENGTH:
+                raise ValueError(f"String too long for the archive: {text[:40]!r}...")
+            if self.size + len(data) > MAX_STRING_TABLE:
+                raise OverflowError("Archive string table exceeds 4 GiB")
+            ref = self._refs[text] = (self.size, len(data))
+            self._chunks.append(data)
+            self.size += len(data)
+        return ref
+
+    def write_to(self, handle) -> None:
+        """Write the table contents to a file."""
+        handle.write(b"".join(self._chunks))
+
+def write_archive(path: str, invoices: Iterable[Invoice]) -> int:
+    """Write invoices to a new archive file and return how many were written.
+
+    Records are streamed to disk; only the strings and the (invoice number,
+    record number) pairs for the index are held in memory. The file is
+    written under a temporary name and renamed into place when complete.
+    """
+    strings = StringTable()
+    keys: List[Tuple[bytes, int]] = []
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(b"\0" * HEADER.size)
+        batch = []
+        for invoice in invoices:
+            shipping = invoice.ship_order
+            customer = shipping.order.customer
+            stock = invoice.stock
+            refs = [strings.ref(text) for text in (invoice.invoice_nbr, customer.name, customer.phone,
+                                                     customer.email, stock.book_name, stock.author)]
+            batch.append(RECORD.pack(*(value for ref in refs for value in ref), stock.price,
+                                     (shipping.ship_date - EPOCH) // MICROSECOND,
+                                     shipping.calc_ship_cost(), shipping.is_urgent, invoice.total_cost))
+            keys.append((invoice.invoice_nbr.encode("utf-8"), len(keys)))
+            if len(batch) >= 10_000:
+                handle.write(b"".join(batch))
+                batch = []
+        handle.write(b"".join(batch))
+
+        keys.sort()
+        for position in range(1, len(keys)):
+            if keys[position][0] == keys[position - 1][0]:
+                raise ValueError(f"Duplicate invoice number: {keys[position][0].decode('utf-8')}")
+        key_width = max((len(key) for key, _ in keys), default=0)
+        if key_width >= MAX_STRING_LENGTH:
+            raise ValueError("Invoice number too long for the archive")
+        index_offset = handle.tell()
+        for start in range(0, len(keys), 10_000):
+            handle.write(b"".join(key.ljust(key_width, b"\0") + RECORD_NO.pack(record_no)
+                                  for key, record_no in keys[start:start + 10_000]))
+        strings_offset = handle.tell()
+        strings.write_to(handle)
+
+        handle.seek(0)
+        handle.write(HEADER.pack(MAGIC, VERSION, RECORD.size, key_width, len(keys), index_offset,
+                                 strings_offset, strings.size))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    return len(keys)
+
+class InvoiceArchive:
+    """Read-only, memory-mapped invoice archive.
+
+    Invoices are rebuilt only when returned; nothing is loaded on open.
+    Instances are safe to share between threads since the map is never
+    written.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._map, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+            # Lookups jump around the file; readahead would only map pages never read
+            self._map.madvise(mmap.MADV_RANDOM)
+        (magic, version, record_size, self._key_width, self._count, self._index_offset,
+         self._strings_offset, strings_size) = HEADER.unpack_from(self._map, 0)
+        self._entry_size = self._key_width + RECORD_NO.size
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self._map.close()
+            raise ValueError(f"{path!r} is not a supported invoice archive")
+        if self._strings_offset + strings_size > len(self._map):
+            self._map.close()
+            raise ValueError(f"Invoice archive {path!r} is truncated")
+        # Numbers outside the archived range, such as every new invoice, are
+        # rejected without a binary search
+        self._lowest = self._key_at(0) if self._count else b""
+        self._highest = self._key_at(self._count - 1) if self._count else b""
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def highest_invoice_nbr(self) -> Optional[str]:
+        """Get the highest invoice number archived, or None for an empty archive."""
+        return self._highest.rstrip(b"\0").decode("utf-8") if self._count else None
+
+    def __contains__(self, invoice_nbr: str) -> bool:
+        return self.find(invoice_nbr) is not None
+
+    def __iter__(self) -> Iterator[Invoice]:
+        for record in self.iter_records():
+            yield invoice_from_record(record)
+
+    def iter_records(self) -> Iterator[tuple]:
+        """Yield every record tuple in the order written, without building objects."""
+        for record_no in range(self._count):
+            yield self.record(record_no)
+
+    def __enter__(self) -> "InvoiceArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the archive file."""
+        self._map.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _key_at(self, position: int) -> bytes:
+        start = self._index_offset + position * self._entry_size
+        return self._map[start:start + self._key_width]
+
+    def find(self, invoice_nbr: str) -> Optional[int]:
+        """Return the record number of an invoice, found by binary search of the index."""
+        key = invoice_nbr.encode("utf-8")
+        if len(key) > self._key_width:
+            return None
+        key = key.ljust(self._key_width, b"\0")
+        if not self._count or not self._lowest <= key <= self._highest:
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if self._key_at(low) != key:
+            return None
+        return RECORD_NO.unpack_from(self._map, self._index_offset + low * self._entry_size
+                                     + self._key_width)[0]
+
+    def record(self, record_no: int) -> tuple:
+        """Return a record tuple, ordered like INVOICE_FIELDS, by record number."""
+        if not 0 <= record_no < self._count:
+            raise IndexError(record_no)
+        values = RECORD.unpack_from(self._map, HEADER.size + record_no * RECORD.size)
+        texts = [self._string(values[i], values[i + 1]) for i in range(0, 2 * STRING_FIELDS, 2)]
+        price, ship_time, ship_cost, urgent, total_cost = values[2 * STRING_FIELDS:]
+        ship_date = (EPOCH + ship_time * MICROSECOND).isoformat()
+        return (*texts[:6], price, ship_date, ship_cost, urgent, total_cost)
+
+    def get(self, invoice_nbr: str) -> Optional[Invoice]:
+        """Return the archived invoice with a number, if any."""
+        record_no = self.find(invoice_nbr)
+        return None if record_no is None else invoice_from_record(self.record(record_no))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for building and reading archives."""
+    from bookstore_storage import SQLiteStorage
+
+    parser = argparse.ArgumentParser(prog="python -m bookstore_archive", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="archive invoices from the database")
+    build_parser.add_argument("path", help="archive file to create")
+    build_parser.add_argument("--db", required=True, help="SQLite database file")
+    build_parser.add_argument("--before", help="only archive invoices shipped before this date (YYYY-MM-DD)")
+
+    get_parser = commands.add_parser("get", help="print one archived invoice")
+    get_parser.add_argument("path", help="archive file")
+    get_parser.add_argument("invoice_nbr")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        storage = SQLiteStorage(args.db)
+        try:
+            invoices = storage.invoices.iter_all()
+            if args.before:
+                cutoff = datetime.strptime(args.before, "%Y-%m-%d")
+                invoices = (invoice for invoice in invoices if invoice.ship_order.ship_date < cutoff)
+            count = write_archive(args.path, invoices)
+            print(f"Archived {count} invoices to {args.path}")
+        finally:
+            storage.close()
+        return 0
+
+    with InvoiceArchive(args.path) as archive:
+        record_no = archive.find(args.invoice_nbr)
+        if record_no is None:
+            print(f"Invoice {args.invoice_nbr} not found")
+            return 1
+        for field, value in record_to_dict(archive.record(record_no)).items():
+            print(f"{field}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
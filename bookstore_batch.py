@@ -0,0 +1,143 @@
+"""
+Book Ordering System - Batch Processing
+This module renders and aggregates invoice history across worker processes.
+
+Invoices are split into chunks and sent to a ProcessPoolExecutor as lists of
+record tuples rather than Invoice object graphs: tuples of strings and floats
+pickle compactly, and pickle's memo stores repeated customer and book strings
+once per chunk. Workers return small results (a count or a partial
+SalesReport) that are merged in the parent.
+
+Usage:
+    python -m bookstore_batch print invoices/ --db bookstore.db --workers 4
+    python -m bookstore_batch report --archive invoices-2023.arch --workers 8
+"""
+
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from bookstore_columnar import InvoiceTable
+from bookstore_render import render_record
+from bookstore_reports import SalesReport, build_report
+
+DEFAULT_CHUNK_SIZE = 5_000
+
+def iter_chunks(records: Iterable[tuple], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """Split records into lists of at most chunk_size."""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def render_chunk(records: List[tuple], path: str) -> int:
+    """Render a chunk of records into one text file and return the count."""
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("".join(render_record(record) for record in records))
+    return len(records)
+
+def report_chunk(records: List[tuple]) -> SalesReport:
+    """Aggregate a chunk of records into a partial sales report."""
+    return build_report(InvoiceTable.from_records(records))
+
+def run_chunks(fn: Callable, jobs: Iterable[tuple], workers: Optional[int] = None) -> Iterator:
+    """Yield fn(*job) for each job, computed on worker processes.
+
+    At most two jobs per worker are in flight, so chunks are read from the
+    source only as fast as they are processed. Results arrive in completion
+    order. workers=0 runs everything in this process.
+    """
+    if workers == 0:
+        for job in jobs:
+            yield fn(*job)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = 2 * workers
+        pending = set()
+        for job in jobs:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(fn, *job))
+        for future in pending:
+            yield future.result()
+
+def print_invoices(records: Iterable[tuple], out_dir: str, workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Render invoices to numbered text files in out_dir and return how many were printed.
+
+    Each chunk becomes one file, invoices-00001.txt and so on, written by the
+    worker that rendered it.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = ((chunk, os.path.join(out_dir, f"invoices-{number:05d}.txt"))
+            for number, chunk in enumerate(iter_chunks(records, chunk_size), 1))
+    return sum(run_chunks(render_chunk, jobs, workers))
+
+def parallel_report(records: Iterable[tuple], workers: Optional[int] = None,
+                    chunk_size: int = 50_000) -> SalesReport:
+    """Compute a sales report over records by merging per-chunk reports."""
+    report = SalesReport()
+    for partial in run_chunks(report_chunk, ((chunk,) for chunk in iter_chunks(records, chunk_size)), workers):
+        report.merge(partial)
+    return report
+
+def iter_source_records(db: Optional[str] = None, journal: Optional[str] = None,
+                        archives: Iterable[str] = ()) -> Iterator[tuple]:
+    """Yield invoice records from archives, an order journal and a database, oldest first."""
+    from bookstore_archive import InvoiceArchive
+    from bookstore_records import invoice_to_record
+
+    for path in archives:
+        with InvoiceArchive(path) as archive:
+            yield from archive.iter_records()
+    if journal:
+        # Read-only, so a journal still being written by the GUI or service is left intact
+        from bookstore_journal import load_invoices
+        yield from map(invoice_to_record, load_invoices(journal))
+    if db:
+        from bookstore_storage import SQLiteStorage
+        storage = SQLiteStorage(db)
+        try:
+            yield from storage.invoices.iter_records()
+        finally:
+            storage.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for batch invoice printing and reports."""
+    parser = argparse.ArgumentParser(prog="python -m bookstore_batch", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    print_parser = commands.add_parser("print", help="render invoices to text files")
+    print_parser.add_argument("out_dir", help="directory for the invoice files")
+    report_parser = commands.add_parser("report", help="print a sales report")
+    report_parser.add_argument("--limit", type=int, default=10, help="rows per report section")
+    for command in (print_parser, report_parser):
+        command.add_argument("--db", help="SQLite database file")
+        command.add_argument("--journal", help="order journal directory")
+        command.add_argument("--archive", action="append", default=[], metavar="PATH",
+                             help="invoice archive file (repeatable)")
+        command.add_argument("--workers", type=int, help="worker processes (default: CPU count; 0 runs inline)")
+        command.add_argument("--chunk-size", type=int, help="invoices per worker job")
+
+    args = parser.parse_args(argv)
+    if not (args.db or args.journal or args.archive):
+        parser.error("give at least one of --db, --journal or --archive")
+    records = iter_source_records(args.db, args.journal, args.archive)
+    if args.command == "print":
+        count = print_invoices(records, args.out_dir, args.workers, args.chunk_size or DEFAULT_CHUNK_SIZE)
+        print(f"Printed {count} invoices to {args.out_dir}")
+    else:
+        report = parallel_report(records, args.workers, args.chunk_size or 50_000)
+        print(report.format(args.limit))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
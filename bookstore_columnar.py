@@ -0,0 +1,139 @@
+"""
+Book Ordering System - Columnar Invoice Table
+This module stores invoice fields in parallel columns instead of object graphs.
+"""
+
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from bookstore_core_inher import Invoice
+from bookstore_records import invoice_from_record
+
+class DictionaryColumn:
+    """Text column stored as integer codes into a table of distinct values."""
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+    def append(self, value: str) -> None:
+        """Append a value, adding it to the value table on first sight."""
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes.append(code)
+
+class InvoiceTable:
+    """Invoices held as parallel columns, one entry per invoice.
+
+    Numeric fields live in typed arrays and repeated text fields in dictionary
+    encoded columns, so each distinct customer or book detail is stored once.
+    Rows are materialized back into Invoice objects only when asked for.
+    """
+    def __init__(self):
+        self.invoice_nbr: List[str] = []
+        self.customer_name = DictionaryColumn()
+        self.customer_phone = DictionaryColumn()
+        self.customer_email = DictionaryColumn()
+        self.book_name = DictionaryColumn()
+        self.author = DictionaryColumn()
+        self.price = array("d")
+        self.ship_time = array("d")
+        self.ship_day = array("i")
+        self.ship_cost = array("d")
+        self.urgent = array("b")
+        self.total_cost = array("d")
+        self._rows: Dict[str, int] = {}
+
+    @classmethod
+    def from_invoices(cls, invoices: Iterable[Invoice]) -> "InvoiceTable":
+        """Build a table from invoice objects."""
+        table = cls()
+        table.extend(invoices)
+        return table
+
+    @classmethod
+    def from_records(cls, records: Iterable[tuple]) -> "InvoiceTable":
+        """Build a table from record tuples ordered like INVOICE_FIELDS."""
+        table = cls()
+        for record in records:
+            table.append_record(record)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.invoice_nbr)
+
+    def __contains__(self, invoice_nbr: str) -> bool:
+        return invoice_nbr in self._rows
+
+    def append(self, invoice: Invoice) -> None:
+        """Append an invoice as a new row."""
+        shipping = invoice.ship_order
+        customer = shipping.order.customer
+        stock = invoice.stock
+        self._append_row(invoice.invoice_nbr, customer.name, customer.phone, customer.email,
+                         stock.book_name, stock.author, stock.price, shipping.ship_date,
+                         shipping.calc_ship_cost(), shipping.is_urgent, invoice.total_cost)
+
+    def append_record(self, record: tuple) -> None:
+        """Append a record tuple ordered like INVOICE_FIELDS as a new row."""
+        (invoice_nbr, name, phone, email, book_name, author, price,
+         ship_date, ship_cost, urgent, total_cost) = record
+        self._append_row(invoice_nbr, name, phone, email, book_name, author, price,
+                         datetime.fromisoformat(ship_date), ship_cost, urgent, total_cost)
+
+    def _append_row(self, invoice_nbr: str, name: str, phone: str, email: str, book_name: str,
+                    author: str, price: float, ship_date: datetime, ship_cost: float,
+                    urgent: bool, total_cost: float) -> None:
+        self._rows.setdefault(invoice_nbr, len(self.invoice_nbr))
+        self.invoice_nbr.append(invoice_nbr)
+        self.customer_name.append(name)
+        self.customer_phone.append(phone)
+        self.customer_email.append(email)
+        self.book_name.append(book_name)
+        self.author.append(author)
+        self.price.append(price)
+        self.ship_time.append(ship_date.timestamp())
+        self.ship_day.append(ship_date.toordinal())
+        self.ship_cost.append(ship_cost)
+        self.urgent.append(1 if urgent else 0)
+        self.total_cost.append(total_cost)
+
+    def extend(self, invoices: Iterable[Invoice]) -> None:
+        """Append many invoices."""
+        for invoice in invoices:
+            self.append(invoice)
+
+    def row_of(self, invoice_nbr: str) -> Optional[int]:
+        """Return the row holding an invoice number, if any."""
+        return self._rows.get(invoice_nbr)
+
+    def record(self, row: int) -> tuple:
+        """Return a row as a record tuple ordered like INVOICE_FIELDS."""
+        return (self.invoice_nbr[row], self.customer_name[row], self.customer_phone[row],
+                self.customer_email[row], self.book_name[row], self.author[row], self.price[row],
+                datetime.fromtimestamp(self.ship_time[row]).isoformat(), self.ship_cost[row],
+                bool(self.urgent[row]), self.total_cost[row])
+
+    def invoice_at(self, row: int) -> Invoice:
+        """Materialize a row as an Invoice object."""
+        return invoice_from_record(self.record(row))
+
+    def get(self, invoice_nbr: str) -> Optional[Invoice]:
+        """Return the invoice with the given number, if any."""
+        row = self._rows.get(invoice_nbr)
+        return None if row is None else self.invoice_at(row)
+
+    def records(self) -> Iterator[tuple]:
+        """Yield every row as a record tuple."""
+        for row in range(len(self)):
+            yield self.record(row)
@@ -3,8 +3,11 @@ Book Ordering System - Core Classes
 This module contains the core classes for the book ordering system without inheritance.
 """
 
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterator, Optional, List, Union
+
+from bookstore_index import InvoiceIndex
 
 class Customer:
     """Customer class to store customer information."""
@@ -96,22 +99,45 @@ class BookStore:
     """BookStore class to manage the overall system."""
     def __init__(self):
         self.invoices: List[Invoice] = []
+        self._index = InvoiceIndex()
 
     def add_invoice(self, invoice: Invoice) -> None:
         """Add an invoice to the repository."""
         self.invoices.append(invoice)
+        self._index.add(invoice)
 
     def search_invoice(self, invoice_nbr: str) -> Optional[Invoice]:
         """Search for an invoice by number."""
-        for invoice in self.invoices:
-            if invoice.invoice_nbr == invoice_nbr:
-                return invoice
-        return None
+        return self._index.get(invoice_nbr)
+
+    def search_by_customer_email(self, email: str) -> List[Invoice]:
+        """Return all invoices for a customer email."""
+        return self._index.by_customer_email(email)
+
+    def search_by_book(self, book_name: str) -> List[Invoice]:
+        """Return all invoices for a book name."""
+        return self._index.by_book(book_name)
+
+    def search_by_author(self, author: str) -> List[Invoice]:
+        """Return all invoices for books by an author."""
+        return self._index.by_author(author)
+
+    def search_by_ship_date(self, ship_date: Union[date, datetime]) -> List[Invoice]:
+        """Return all invoices shipped on the given day."""
+        return self._index.by_ship_date(ship_date)
 
     def get_all_invoices(self) -> List[Invoice]:
         """Return all invoices in the repository."""
         return self.invoices.copy()
 
+    def iter_invoices(self) -> Iterator[Invoice]:
+        """Yield the invoices held now, in insertion order, without copying them."""
+        return islice(self.invoices, len(self.invoices))
+
+    def page(self, offset: int, limit: int) -> List[Invoice]:
+        """Return up to limit invoices in insertion order, skipping the first offset."""
+        return self.invoices[offset:offset + limit]
+
     def get_invoice_count(self) -> int:
         """Return the total number of invoices."""
         return len(self.invoices)
@@ -195,5 +221,11 @@ def test_book_ordering_system():
         print("Invoice Search Test:")
         print(f"Found Invoice {test_invoice.invoice_nbr} - Total: £{test_invoice.total_cost:.2f}")
 
+    # Test secondary indexes
+    print("\nIndexed Search Test:")
+    print(f"Invoices for jane@example.com: {len(bookstore.search_by_customer_email('jane@example.com'))}")
+    print(f"Invoices for 'Web Development': {len(bookstore.search_by_book('Web Development'))}")
+    print(f"Invoices shipped today: {len(bookstore.search_by_ship_date(datetime.now()))}")
+
 if __name__ == "__main__":
     test_book_ordering_system() 
\ No newline at end of file
@@ -3,11 +3,29 @@ Book Ordering System - Core Classes with Inheritance
 This module contains the core classes for the book ordering system with inheritance structure.
 """
 
-from datetime import datetime
-from typing import Optional, List
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from itertools import islice
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Mapping, Optional, List, Sequence, Tuple, Union
+
+from bookstore_aggregates import RunningAggregates
+from bookstore_idempotency import IdempotencyCache
+from bookstore_ids import HighWaterFile, InvoiceNumberAllocator, InvoiceNumberBlock
+from bookstore_index import InvoiceIndex, date_key
+from bookstore_paging import InvoiceListSnapshot, StoredInvoiceSnapshot
+from bookstore_profiling import instrument
+
+if TYPE_CHECKING:
+    from bookstore_columnar import InvoiceTable
+    from bookstore_reports import SalesReport
+    from bookstore_search import SearchResults
 
 class Person:
     """Base class for persons in the system."""
+    __slots__ = ("_name", "_phone", "_email")
+
     def __init__(self, name: str, phone: str, email: str):
         self._name = name
         self._phone = phone
@@ -30,11 +48,15 @@ class Person:
 
 class Customer(Person):
     """Customer class inheriting from Person."""
+    __slots__ = ()
+
     def __init__(self, name: str, phone: str, email: str):
         super().__init__(name, phone, email)
 
 class Product:
     """Base class for products in the system."""
+    __slots__ = ("_name", "_price")
+
     def __init__(self, name: str, price: float):
         self._name = name
         self._price = price
@@ -51,6 +73,8 @@ class Product:
 
 class Stock(Product):
     """Stock class inheriting from Product."""
+    __slots__ = ("_author",)
+
     def __init__(self, book_name: str, author: str, price: float):
         super().__init__(book_name, price)
         self._author = author
@@ -67,12 +91,15 @@ class Stock(Product):
 
 class Order:
     """Class representing an order in the system."""
+    __slots__ = ("customer", "stock")
+
     def __init__(self, customer: Customer, stock: Stock):
         self.customer = customer
         self.stock = stock
 
 class Shipping:
     """Class handling shipping details and calculations."""
+    __slots__ = ("order", "ship_date", "_ship_cost", "_is_urgent", "count_urgent")
     URGENT_COST = 5.45
     STANDARD_COST = 3.95
 
@@ -80,15 +107,24 @@ class Shipping:
         self.order = order
         self.ship_date = ship_date
         self._ship_cost = 0.0
+        self._is_urgent = False
         self.count_urgent = 0
 
-    def set_ship_cost(self, is_urgent: bool = False) -> None:
-        """Set shipping cost based on urgency."""
+    @property
+    def is_urgent(self) -> bool:
+        """Check whether urgent shipping was chosen."""
+        return self._is_urgent
+
+    def set_ship_cost(self, is_urgent: bool = False, cost: Optional[float] = None) -> None:
+        """Set shipping cost based on urgency, or to a quoted cost when given."""
+        self._is_urgent = bool(is_urgent)
         if is_urgent:
             self._ship_cost = self.URGENT_COST
             self.count_urgent += 1
         else:
             self._ship_cost = self.STANDARD_COST
+        if cost is not None:
+            self._ship_cost = cost
 
     def calc_ship_cost(self) -> float:
         """Calculate and return shipping cost."""
@@ -96,6 +132,8 @@ class Shipping:
 
 class Invoice:
     """Class handling invoice generation and calculations."""
+    __slots__ = ("invoice_nbr", "stock", "ship_order", "total_cost")
+
     def __init__(self, invoice_nbr: str, stock: Stock, ship_order: Shipping):
         self.invoice_nbr = invoice_nbr
         self.stock = stock
@@ -108,29 +146,615 @@ class Invoice:
         return self.total_cost
 
 class BookStore:
-    """Class managing the bookstore operations and invoice repository."""
-    def __init__(self):
+    """Class managing the bookstore operations and invoice repository.
+
+    When a storage backend is given, every invoice is also persisted there and
+    the storage becomes the source of truth for lookups, counts and listings;
+    the in-memory list then only holds invoices added in this session.
+
+    Sales totals are kept up to date on every add_invoice; with storage they
+    are seeded from the database on first use. New invoice numbers come from
+    the store's allocator, whose high-water mark is kept in the storage (or in
+    sequence_path) so numbers are not reused after a restart. The mark is
+    read when the first number is allocated, so constructing a store does not
+    open its database.
+
+    With a journal instead of storage, the invoices it holds are replayed on
+    construction, or by recover when constructed with recover=False (at the
+    latest by the first method that adds invoices), and every added invoice
+    is journaled before add_invoice returns. Call
+    checkpoint periodically to compact the journal into a snapshot.
+
+    With a PricingEngine, create_invoices and place_orders_bulk take ship
+    costs and totals from its quotes (discounts, promo codes and VAT
+    included) instead of the flat Shipping rates.
+
+    With an Inventory, create_invoices and place_orders_bulk reserve a copy
+    per order before invoicing and commit the reservation once the invoices
+    are stored, releasing it if they are not.
+
+    Orders may carry client idempotency keys (see create_invoices); the key
+    of every invoice created is remembered by the store's IdempotencyCache,
+    whose persistent index is the storage's when there is one, so a retried
+    order returns its original invoice instead of being placed again.
+
+    Read-only archives of past invoices can be attached with attach_archive;
+    search_invoice falls through to them, newest first, when an invoice
+    number is not found in memory or storage.
+
+    The free-text search index is built on the first search_invoices call,
+    or ahead of time by warm_search_index, and kept current by add_invoice
+    and add_invoices after that. The columnar table behind sales_report is
+    built and kept current the same way (see warm_report_table), so repeated
+    reports only aggregate.
+
+    For reading many invoices, prefer snapshot_invoices, iter_invoices, page
+    and the range scans to get_all_invoices: they see the invoices as they
+    were when called, without copying the whole list or loading every row.
+
+    All methods are safe to call from worker threads; mutations are serialized
+    through the store's lock.
+    """
+    def __init__(self, storage=None, sequence_path: Optional[str] = None, journal=None, pricing=None,
+                 inventory=None, idempotency: Optional[IdempotencyCache] = None, recover: bool = True):
+        if storage is not None and journal is not None:
+            raise ValueError("Use either storage or a journal, not both")
         self.invoices: List[Invoice] = []
+        # Whether self.invoices is sorted by number, so number ranges can bisect
+        self._numbers_ordered = True
+        self._index = InvoiceIndex()
+        self._aggregates: Optional[RunningAggregates] = None if storage is not None else RunningAggregates()
+        self._search_index = None
+        self._report_table: Optional["InvoiceTable"] = None
+        self._recovered = journal is None
+        self.archives: List = []
+        self.storage = storage
+        self.journal = journal
+        self.pricing = pricing
+        self.inventory = inventory
+        if idempotency is None:
+            idempotency = IdempotencyCache()
+        if idempotency.index is None and storage is not None:
+            idempotency.index = storage.idempotency
+        self.idempotency = idempotency
+        self.lock = threading.RLock()
+        if journal is not None and not sequence_path:
+            sequence_path = journal.sequence_path
+        if storage is None and sequence_path:
+            number_store = HighWaterFile(sequence_path)
+        else:
+            number_store = storage
+        self.invoice_numbers = InvoiceNumberAllocator(store=number_store)
+        if recover:
+            self.recover()
+
+    def recover(self) -> int:
+        """Replay the journal's invoices, once, and return how many there were.
+
+        Holds the store's lock throughout, so orders placed from other threads
+        meanwhile wait for recovery instead of racing it. Methods that add
+        invoices run it first if it has not run yet: an order journaled before
+        the replay would otherwise be replayed a second time.
+        """
+        with self.lock:
+            if self._recovered:
+                return 0
+            self._recovered = True
+            return self.journal.recover(self._apply)
+
+    def _ensure_recovered(self) -> None:
+        # Called with the lock held, before anything is journaled
+        if not self._recovered:
+            self.recover()
+
+    def next_invoice_number(self) -> str:
+        """Allocate a new invoice number."""
+        return self.invoice_numbers.next()
+
+    def reserve_invoice_numbers(self, count: int) -> InvoiceNumberBlock:
+        """Allocate a block of invoice numbers for a batch of orders."""
+        return self.invoice_numbers.reserve(count)
 
+    @instrument()
     def add_invoice(self, invoice: Invoice) -> None:
-        """Add an invoice to the repository."""
-        self.invoices.append(invoice)
+        """Add an invoice to the repository.
+
+        Raises ValueError if an invoice with the same number already exists.
+        """
+        with self.lock:
+            self._ensure_recovered()
+            if invoice.invoice_nbr in self._index or self._in_archives(invoice.invoice_nbr):
+                raise ValueError(f"Duplicate invoice number: {invoice.invoice_nbr}")
+            aggregates = self._get_aggregates()
+            if self.storage is not None:
+                self.storage.invoices.add(invoice)
+            ticket = self.journal.append((invoice,)) if self.journal is not None else None
+            self._track_order((invoice,))
+            self.invoices.append(invoice)
+            self._index.add(invoice)
+            aggregates.add(invoice)
+            if self._search_index is not None:
+                self._search_index.add(invoice)
+            if self._report_table is not None:
+                self._report_table.append(invoice)
+        # Wait for the fsync outside the lock so concurrent orders share one
+        if ticket is not None:
+            self.journal.wait_durable(ticket)
+
+    @instrument()
+    def add_invoices(self, invoices: List[Invoice], idempotency_keys: Optional[Sequence[Optional[str]]] = None) -> None:
+        """Add a batch of invoices in one step.
+
+        The whole batch is rejected with ValueError if any invoice number is
+        already present or repeated within the batch. idempotency_keys, one
+        per invoice (None for unkeyed ones), are remembered with the invoices
+        and, with storage, persisted in the same transaction.
+        """
+        with self.lock:
+            self._ensure_recovered()
+            numbers = set()
+            for invoice in invoices:
+                nbr = invoice.invoice_nbr
+                if nbr in numbers or nbr in self._index or self._in_archives(nbr):
+                    raise ValueError(f"Duplicate invoice number: {nbr}")
+                numbers.add(nbr)
+            if self.storage is not None:
+                self._get_aggregates()
+                self.storage.invoices.add_many(
+                    invoices, self.idempotency.records(idempotency_keys, invoices) if idempotency_keys else ())
+            ticket = self.journal.append(invoices) if self.journal is not None else None
+            self._apply(invoices)
+            if idempotency_keys:
+                self.idempotency.remember(idempotency_keys, invoices, persisted=self.storage is not None)
+        if ticket is not None:
+            self.journal.wait_durable(ticket)
+
+    def _apply(self, invoices: List[Invoice]) -> None:
+        aggregates = self._get_aggregates()
+        self._track_order(invoices)
+        self.invoices.extend(invoices)
+        self._index.add_many(invoices)
+        aggregate_add = aggregates.add
+        for invoice in invoices:
+            aggregate_add(invoice)
+        if self._search_index is not None:
+            self._search_index.add_many(invoices)
+        if self._report_table is not None:
+            self._report_table.extend(invoices)
+
+    def _track_order(self, invoices: Iterable[Invoice]) -> None:
+        if not self._numbers_ordered:
+            return
+        last = self.invoices[-1].invoice_nbr if self.invoices else ""
+        for invoice in invoices:
+            if invoice.invoice_nbr < last:
+                self._numbers_ordered = False
+                return
+            last = invoice.invoice_nbr
+
+    @instrument()
+    def checkpoint(self) -> bool:
+        """Compact the journal into a snapshot of the current invoices.
+
+        Only the segment rotation holds the store's lock; the snapshot itself
+        is written while orders keep being accepted. Returns False if there is
+        no journal or a newer snapshot won the race.
+        """
+        if self.journal is None:
+            return False
+        with self.lock:
+            self._ensure_recovered()
+            generation = self.journal.rotate()
+            invoices = InvoiceListSnapshot(self.invoices, len(self.invoices))
+        return self.journal.write_snapshot(invoices, generation)
+
+    @instrument()
+    def place_orders_bulk(self, orders: Iterable[tuple], customers: Optional[Mapping] = None,
+                          books: Optional[Mapping] = None, ship_date: Optional[datetime] = None,
+                          chunk_size: Optional[int] = None) -> "BulkOrderSummary":
+        """Place many (customer, book, urgent) orders and return a summary.
+
+        Customers and books may be given as objects or as keys into the
+        customers and books mappings. Orders that cannot be resolved, or whose
+        book is out of stock, are reported in the summary instead of raising.
+        Invoices are numbered from one reserved block and appended with
+        add_invoices, per chunk_size orders or all at once.
+        """
+        summary = BulkOrderSummary()
+        ship_date = ship_date or datetime.now()
+        pending: List[tuple] = []
+        reservation = self.inventory.reservation() if self.inventory is not None else None
+        for position, (customer, stock, urgent) in enumerate(orders):
+            if not isinstance(customer, Customer):
+                customer = customers.get(customer) if customers is not None else None
+            if not isinstance(stock, Stock):
+                stock = books.get(stock) if books is not None else None
+            if customer is None or stock is None:
+                summary.failed.append((position, "unknown customer" if customer is None else "unknown book"))
+                continue
+            if reservation is not None:
+                try:
+                    reservation.add(stock)
+                except ValueError:
+                    summary.failed.append((position, "out of stock"))
+                    continue
+            pending.append((customer, stock, urgent))
+            if chunk_size and len(pending) >= chunk_size:
+                self._place_resolved(pending, ship_date, summary, reservation)
+                pending = []
+                reservation = self.inventory.reservation() if self.inventory is not None else None
+        if pending:
+            self._place_resolved(pending, ship_date, summary, reservation)
+        return summary
+
+    @instrument()
+    def create_invoices(self, orders: List[tuple], ship_date: Optional[datetime] = None,
+                        reservation=None, idempotency_keys: Optional[Sequence[Optional[str]]] = None) -> List[Invoice]:
+        """Create and add one invoice per (customer, stock, urgent) order, in order.
+
+        Orders may carry a destination and promo code as (customer, stock,
+        urgent, destination, promo); they are used when the store has a
+        pricing engine, which raises ValueError for ones it does not know
+        before any invoice is created. Numbers come from one reserved block
+        and the invoices are added with add_invoices, so the batch is stored
+        all-or-nothing.
+
+        With an inventory, a copy per order is reserved first, raising
+        OutOfStock before anything is created if a title runs short; pass a
+        reservation already holding the copies to skip that step. It is
+        committed once the invoices are stored and released if they are not.
+
+        With idempotency_keys, one per order (None for unkeyed ones), an order
+        whose key already created an invoice is not placed again: its original
+        invoice is returned in its place and any copy reserved for it is
+        released. A key repeated within the batch is placed once. Keyed
+        batches hold the store's lock until they are stored, so the same key
+        arriving concurrently cannot be placed twice.
+        """
+        ship_date = ship_date or datetime.now()
+        if idempotency_keys is not None:
+            return self._create_invoices_once(orders, ship_date, reservation, idempotency_keys)
+        return self._create_invoices(orders, ship_date, reservation)
+
+    def _create_invoices_once(self, orders: List[tuple], ship_date: datetime, reservation,
+                              keys: Sequence[Optional[str]]) -> List[Invoice]:
+        with self.lock:
+            self._ensure_recovered()
+            results: List[Optional[Invoice]] = [None] * len(orders)
+            new_orders, new_keys, positions = [], [], []
+            # Key -> position in new_orders, for keys repeated within the batch
+            placing: Dict[str, int] = {}
+            repeats: List[Tuple[int, int]] = []
+            placed = self.idempotency.lookup_many({key for key in keys if key is not None}, self.search_invoice)
+            for position, (order, key) in enumerate(zip(orders, keys)):
+                if key is not None:
+                    existing = placed.get(key)
+                    if existing is not None or key in placing:
+                        if reservation is not None:
+                            reservation.remove(order[1])
+                        if existing is not None:
+                            results[position] = existing
+                        else:
+                            repeats.append((position, placing[key]))
+                        continue
+                    placing[key] = len(new_orders)
+                new_orders.append(order)
+                new_keys.append(key)
+                positions.append(position)
+            if new_orders:
+                invoices = self._create_invoices(new_orders, ship_date, reservation, new_keys)
+                for position, invoice in zip(positions, invoices):
+                    results[position] = invoice
+                for position, first in repeats:
+                    results[position] = invoices[first]
+            elif reservation is not None:
+                reservation.release()
+            return results
+
+    def _create_invoices(self, orders: List[tuple], ship_date: datetime, reservation=None,
+                         idempotency_keys: Optional[Sequence[Optional[str]]] = None) -> List[Invoice]:
+        if reservation is None and self.inventory is not None:
+            reservation = self.inventory.reserve(order[1] for order in orders)
+        try:
+            invoices = self._invoice_orders(orders, ship_date)
+            self.add_invoices(invoices, idempotency_keys)
+        except BaseException:
+            if reservation is not None:
+                reservation.release()
+            raise
+        if reservation is not None:
+            reservation.commit()
+        return invoices
 
+    def _invoice_orders(self, orders: List[tuple], ship_date: datetime) -> List[Invoice]:
+        quotes = None
+        if self.pricing is not None:
+            quotes = [self.pricing.quote(order[1], order[2], *order[3:5]) for order in orders]
+        numbers = iter(self.reserve_invoice_numbers(len(orders)))
+        invoices = []
+        for position, (order, invoice_nbr) in enumerate(zip(orders, numbers)):
+            customer, stock, urgent = order[:3]
+            shipping = Shipping(Order(customer, stock), ship_date)
+            if quotes is None:
+                shipping.set_ship_cost(urgent)
+                invoice = Invoice(invoice_nbr, stock, shipping)
+                invoice.calculate_total()
+            else:
+                quote = quotes[position]
+                shipping.set_ship_cost(urgent, quote.shipping)
+                invoice = Invoice(invoice_nbr, stock, shipping)
+                invoice.total_cost = quote.total
+            invoices.append(invoice)
+        return invoices
+
+    def _place_resolved(self, pending: List[tuple], ship_date: datetime,
+                        summary: "BulkOrderSummary", reservation=None) -> None:
+        invoices = self.create_invoices(pending, ship_date, reservation)
+        summary.placed += len(invoices)
+        summary.total_revenue += sum(invoice.total_cost for invoice in invoices)
+        summary.first_invoice_nbr = summary.first_invoice_nbr or invoices[0].invoice_nbr
+        summary.last_invoice_nbr = invoices[-1].invoice_nbr
+
+    def find_by_idempotency_key(self, key: str) -> Optional[Invoice]:
+        """Return the invoice a client idempotency key created, if it is still remembered."""
+        return self.idempotency.lookup(key, self.search_invoice)
+
+    def attach_archive(self, archive) -> None:
+        """Make an InvoiceArchive's invoices findable by number.
+
+        Archives attached later are searched first, so attach older years first.
+        New invoice numbers are allocated above the archive's highest.
+        """
+        with self.lock:
+            self.archives.insert(0, archive)
+        highest = archive.highest_invoice_nbr
+        number = self.invoice_numbers.parse(highest) if highest else None
+        if number is not None:
+            self.invoice_numbers.raise_floor(number)
+
+    def _in_archives(self, invoice_nbr: str) -> bool:
+        return any(invoice_nbr in archive for archive in self.archives)
+
+    @instrument()
     def search_invoice(self, invoice_nbr: str) -> Optional[Invoice]:
-        """Search for an invoice by number."""
-        for invoice in self.invoices:
-            if invoice.invoice_nbr == invoice_nbr:
-                return invoice
-        return None
+        """Search for an invoice by number, then in the attached archives."""
+        invoice = self._index.get(invoice_nbr)
+        if invoice is None and self.storage is not None:
+            invoice = self.storage.invoices.get(invoice_nbr)
+        if invoice is None:
+            for archive in self.archives:
+                invoice = archive.get(invoice_nbr)
+                if invoice is not None:
+                    break
+        return invoice
+
+    @instrument()
+    def search_by_customer_email(self, email: str) -> List[Invoice]:
+        """Return all invoices for a customer email."""
+        if self.storage is not None:
+            return self.storage.invoices.find_by_customer_email(email)
+        with self.lock:
+            return self._index.by_customer_email(email)
+
+    @instrument()
+    def search_by_book(self, book_name: str) -> List[Invoice]:
+        """Return all invoices for a book name."""
+        if self.storage is not None:
+            return self.storage.invoices.find_by_book(book_name)
+        with self.lock:
+            return self._index.by_book(book_name)
+
+    @instrument()
+    def search_by_author(self, author: str) -> List[Invoice]:
+        """Return all invoices for books by an author."""
+        if self.storage is not None:
+            return self.storage.invoices.find_by_author(author)
+        with self.lock:
+            return self._index.by_author(author)
+
+    @instrument()
+    def search_by_ship_date(self, ship_date: Union[date, datetime]) -> List[Invoice]:
+        """Return all invoices shipped on the given day."""
+        if self.storage is not None:
+            return self.storage.invoices.find_by_ship_date(date_key(ship_date))
+        with self.lock:
+            return self._index.by_ship_date(ship_date)
+
+    @instrument()
+    def search_invoices(self, query: str, start_date: Optional[Union[date, datetime]] = None,
+                        end_date: Optional[Union[date, datetime]] = None) -> "SearchResults":
+        """Return invoices matching a free-text query, best matches first.
+
+        Words match customer names and emails, titles, authors and invoice
+        numbers by prefix or with one typo. start_date and end_date bound the
+        ship date, both inclusive.
+        """
+        self.warm_search_index()
+        with self.lock:
+            return self._search_index.search(query, start_date, end_date)
+
+    @instrument()
+    def warm_search_index(self) -> None:
+        """Build the free-text search index if it is not built yet.
+
+        The invoices are indexed from a snapshot without holding the store's
+        lock, so orders keep flowing; only invoices added meanwhile are
+        indexed under the lock.
+        """
+        # Imported on first use, keeping it off the startup path
+        from bookstore_search import InvoiceSearchIndex
+
+        if self._search_index is not None:
+            return
+        snapshot = self.snapshot_invoices()
+        index = InvoiceSearchIndex()
+        index.add_many(snapshot)
+        with self.lock:
+            if self._search_index is not None:
+                return
+            if self.storage is not None:
+                after = snapshot.up_to_id
+                while True:
+                    page, after = self.storage.invoices.page_after(after, 1000)
+                    if not page:
+                        break
+                    index.add_many(page)
+            else:
+                index.add_many(self.invoices[len(snapshot):])
+            self._search_index = index
+
+    @instrument()
+    def sales_report(self, use_numpy: Optional[bool] = None) -> "SalesReport":
+        """Return a sales report over every invoice held now.
+
+        Builds the report table on first use (see warm_report_table); after
+        that only the aggregation runs, over the rows present when called.
+        """
+        from bookstore_reports import build_report
+
+        self.warm_report_table()
+        with self.lock:
+            rows = len(self._report_table)
+        return build_report(self._report_table, use_numpy, rows)
+
+    @instrument()
+    def warm_report_table(self) -> None:
+        """Build the columnar table sales reports aggregate over, if it is not built yet.
+
+        Built from a snapshot without holding the store's lock, like the
+        search index, and extended by add_invoice and add_invoices after that.
+        """
+        from bookstore_columnar import InvoiceTable
+
+        if self._report_table is not None:
+            return
+        snapshot = self.snapshot_invoices()
+        table = InvoiceTable.from_invoices(snapshot)
+        with self.lock:
+            if self._report_table is not None:
+                return
+            if self.storage is not None:
+                after = snapshot.up_to_id
+                while True:
+                    page, after = self.storage.invoices.page_after(after, 1000)
+                    if not page:
+                        break
+                    table.extend(page)
+            else:
+                table.extend(self.invoices[len(snapshot):])
+            self._report_table = table
 
+    @instrument()
     def get_all_invoices(self) -> List[Invoice]:
-        """Return all invoices in the repository."""
-        return self.invoices.copy()
+        """Return a copy of all invoices in the repository.
+
+        Kept for callers that need a list of their own; snapshot_invoices and
+        iter_invoices give the same invoices without the copy.
+        """
+        if self.storage is not None:
+            return list(self.storage.invoices.iter_all())
+        with self.lock:
+            return self.invoices.copy()
+
+    def snapshot_invoices(self) -> Sequence[Invoice]:
+        """Return a read-only sequence of the invoices held now, in insertion order.
+
+        Nothing is copied: the sequence reads the live list (or, with storage,
+        the database a page at a time) but never shows invoices added after
+        this call, so its length and indexes stay stable.
+        """
+        if self.storage is not None:
+            return StoredInvoiceSnapshot(self.storage.invoices)
+        with self.lock:
+            return InvoiceListSnapshot(self.invoices, len(self.invoices))
+
+    def iter_invoices(self) -> Iterator[Invoice]:
+        """Yield the invoices held now, in insertion order, without copying them."""
+        return iter(self.snapshot_invoices())
+
+    @instrument()
+    def page(self, offset: int, limit: int) -> List[Invoice]:
+        """Return up to limit invoices in insertion order, skipping the first offset."""
+        if self.storage is not None:
+            return self.storage.invoices.page(offset, limit)
+        with self.lock:
+            return self.invoices[offset:offset + limit]
+
+    def iter_invoice_range(self, start_nbr: Optional[str] = None,
+                           end_nbr: Optional[str] = None) -> Iterator[Invoice]:
+        """Yield invoices numbered from start_nbr to end_nbr inclusive, in number order.
+
+        Either bound may be omitted.
+        """
+        if self.storage is not None:
+            return self.storage.invoices.iter_number_range(start_nbr, end_nbr, self.storage.invoices.snapshot_id())
+        with self.lock:
+            invoices, length, ordered = self.invoices, len(self.invoices), self._numbers_ordered
+        if not ordered:
+            return iter(sorted((invoice for invoice in islice(invoices, length)
+                                if (start_nbr is None or invoice.invoice_nbr >= start_nbr)
+                                and (end_nbr is None or invoice.invoice_nbr <= end_nbr)),
+                               key=attrgetter("invoice_nbr")))
+        number = attrgetter("invoice_nbr")
+        low = 0 if start_nbr is None else bisect_left(invoices, start_nbr, 0, length, key=number)
+        high = length if end_nbr is None else bisect_right(invoices, end_nbr, low, length, key=number)
+        return islice(invoices, low, high)
+
+    def iter_ship_date_range(self, start: Optional[Union[date, datetime]] = None,
+                             end: Optional[Union[date, datetime]] = None) -> Iterator[Invoice]:
+        """Yield invoices shipped from day start to day end inclusive, in ship day order.
+
+        Either bound may be omitted.
+        """
+        if self.storage is not None:
+            return self.storage.invoices.iter_ship_date_range(
+                date_key(start) if start is not None else None, date_key(end) if end is not None else None,
+                self.storage.invoices.snapshot_id())
+        with self.lock:
+            buckets = self._index.ship_date_buckets(start, end)
+        return (invoice for bucket, length in buckets for invoice in islice(bucket, length))
 
     def get_invoice_count(self) -> int:
         """Return the total number of invoices."""
+        if self.storage is not None:
+            return self.storage.invoices.count()
         return len(self.invoices)
 
+    @instrument()
+    def get_stats(self) -> Dict[str, float]:
+        """Return invoice count, revenue and shipping mix totals."""
+        with self.lock:
+            return self._get_aggregates().snapshot()
+
+    def get_revenue_by_book(self) -> Dict[str, float]:
+        """Return revenue per book name."""
+        with self.lock:
+            return dict(self._get_aggregates().revenue_by_book)
+
+    def get_revenue_by_customer(self) -> Dict[str, float]:
+        """Return revenue per customer email."""
+        with self.lock:
+            return dict(self._get_aggregates().revenue_by_customer)
+
+    def _get_aggregates(self) -> RunningAggregates:
+        if self._aggregates is None:
+            self._aggregates = self.storage.invoices.aggregates()
+        return self._aggregates
+
+class BulkOrderSummary:
+    """Outcome of a bulk order placement."""
+    def __init__(self):
+        self.placed = 0
+        self.total_revenue = 0.0
+        self.first_invoice_nbr: Optional[str] = None
+        self.last_invoice_nbr: Optional[str] = None
+        self.failed: List[Tuple[int, str]] = []
+
+    def __repr__(self) -> str:
+        return (f"BulkOrderSummary(placed={self.placed}, failed={len(self.failed)}, "
+                f"total_revenue={self.total_revenue:.2f}, "
+                f"invoices={self.first_invoice_nbr}..{self.last_invoice_nbr})")
+
 def test_inheritance_system():
     """Test function to verify inheritance functionality."""
     # Test Person and Customer inheritance
@@ -166,5 +790,46 @@ def test_inheritance_system():
     print(f"Shipping Cost: £{shipping.calc_ship_cost():.2f}")
     print(f"Total Cost: £{invoice.total_cost:.2f}")
 
+    # Test bulk order placement with key lookups
+    print("\n=== Testing Bulk Order Placement ===")
+    bookstore = BookStore()
+    summary = bookstore.place_orders_bulk(
+        [("john@example.com", "Python Programming", True),
+         (customer, stock, False),
+         ("nobody@example.com", "Python Programming", False)],
+        customers={customer.email: customer}, books={stock.book_name: stock})
+    print(summary)
+    print(f"Failed orders: {summary.failed}")
+    print(f"Invoice count: {bookstore.get_invoice_count()}")
+
+    # Test free-text search with a typo
+    print("\n=== Testing Free-text Search ===")
+    results = bookstore.search_invoices("jhon pyth")
+    print(f"Matches for 'jhon pyth': {[invoice.invoice_nbr for invoice in results]}")
+
+    # Test snapshot paging while invoices keep arriving
+    print("\n=== Testing Invoice Paging ===")
+    snapshot = bookstore.snapshot_invoices()
+    bookstore.place_orders_bulk([(customer, stock, False)])
+    print(f"Snapshot length: {len(snapshot)}, store now holds: {bookstore.get_invoice_count()}")
+    print(f"First page: {[invoice.invoice_nbr for invoice in bookstore.page(0, 2)]}")
+    first, last = snapshot[0].invoice_nbr, snapshot[-1].invoice_nbr
+    print(f"Numbers {first}..{last}: {[i.invoice_nbr for i in bookstore.iter_invoice_range(first, last)]}")
+    print(f"Shipped today: {sum(1 for _ in bookstore.iter_ship_date_range(date.today(), date.today()))}")
+
+    # Test numbering above an attached archive
+    print("\n=== Testing Archived Invoice Numbers ===")
+    import os
+    import tempfile
+    from bookstore_archive import InvoiceArchive, write_archive
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.arch")
+        write_archive(path, bookstore.iter_invoices())
+        with InvoiceArchive(path) as archive:
+            fresh = BookStore()
+            fresh.attach_archive(archive)
+            summary = fresh.place_orders_bulk([(customer, stock, False)])
+            print(f"Archived up to {archive.highest_invoice_nbr}, next order {summary.first_invoice_nbr}")
+
 if __name__ == "__main__":
     test_inheritance_system() 
\ No newline at end of file
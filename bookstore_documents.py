@@ -0,0 +1,200 @@
+"""
+Book Ordering System - Invoice Documents
+This module streams rendered invoices into one text, HTML or PDF file for printing or emailing.
+
+Invoices are rendered and written a chunk at a time, so exporting millions
+of them holds only one chunk in memory. The PDF writer needs no third-party
+package: it writes each page (A4, Helvetica) as soon as it is full and
+keeps only the byte offsets needed for the cross-reference table.
+
+Usage:
+    python -m bookstore_documents invoices.pdf --db bookstore.db
+    python -m bookstore_documents invoices.html --journal journal/ --archive invoices-2023.arch
+"""
+
+import argparse
+import os
+from array import array
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, List, Optional
+
+from bookstore_render import RENDERERS, RenderCache, invoice_fields, record_fields
+
+FORMATS = ("text", "html", "pdf")
+EXTENSIONS = {".txt": "text", ".html": "html", ".htm": "html", ".pdf": "pdf"}
+DEFAULT_CHUNK_SIZE = 500
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Invoices</title>
+<style>
+.invoice { page-break-inside: avoid; margin-bottom: 2em; }
+th { text-align: left; padding-right: 1em; }
+</style>
+</head>
+<body>
+"""
+HTML_FOOTER = "</body>\n</html>\n"
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Return the document format, from the argument or the file extension."""
+    if fmt is None:
+        fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported document format for {path!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+class PdfWriter:
+    """Minimal streaming PDF writer for pages of plain text lines.
+
+    Text is set in Helvetica with WinAnsiEncoding, which covers the pound
+    sign; characters outside it print as '?'.
+    """
+    PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+    MARGIN = 50
+    FONT_SIZE = 10
+    LEADING = 12
+    # Object numbers fixed up front; then each page is a content stream and a page object
+    CATALOG, PAGES, FONT = 1, 2, 3
+    FIRST_PAGE_OBJECT = 4
+    XREF_CHUNK = 1000
+
+    def __init__(self, handle: BinaryIO):
+        self._handle = handle
+        # Byte offset of each object by number, for the cross-reference table
+        self._offsets = array("q", [0] * self.FIRST_PAGE_OBJECT)
+        self._page_count = 0
+        self._lines: List[str] = []
+        self.lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING
+        handle.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>".encode("ascii"))
+        self._write_object(self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                      b"/Encoding /WinAnsiEncoding >>")
+
+    def add_block(self, lines: List[str]) -> None:
+        """Add lines that are kept together on one page where they fit."""
+        if len(self._lines) + len(lines) > self.lines_per_page and self._lines:
+            self._flush_page()
+        for line in lines:
+            self._lines.append(line)
+            if len(self._lines) >= self.lines_per_page:
+                self._flush_page()
+
+    def close(self) -> None:
+        """Write the last page, the page tree and the cross-reference table."""
+        if self._lines or not self._page_count:
+            self._flush_page()
+        handle = self._handle
+        self._offsets[self.PAGES] = handle.tell()
+        handle.write(b"%d 0 obj\n<< /Type /Pages /Kids [" % self.PAGES)
+        # Each page's content stream is written just before it
+        pages = range(self.FIRST_PAGE_OBJECT + 1, len(self._offsets), 2)
+        for start in range(0, len(pages), self.XREF_CHUNK):
+            handle.write(b"".join(b"%d 0 R " % number for number in pages[start:start + self.XREF_CHUNK]))
+        handle.write(b"] /Count %d >>\nendobj\n" % self._page_count)
+        xref = handle.tell()
+        size = len(self._offsets)
+        handle.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for start in range(1, size, self.XREF_CHUNK):
+            handle.write(b"".join(b"%010d 00000 n \n" % offset
+                                  for offset in self._offsets[start:start + self.XREF_CHUNK]))
+        handle.write(f"trailer\n<< /Size {size} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+                     .encode("ascii"))
+
+    def _flush_page(self) -> None:
+        top = self.PAGE_HEIGHT - self.MARGIN
+        parts = [f"BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL {self.MARGIN} {top} Td".encode("ascii")]
+        for line in self._lines:
+            parts.append(b"(" + _pdf_string(line) + b") Tj T*")
+        parts.append(b"ET")
+        content = b"\n".join(parts)
+        self._lines = []
+        stream_number, page_number = len(self._offsets), len(self._offsets) + 1
+        self._write_object(stream_number, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        self._write_object(page_number, (
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {self.FONT} 0 R >> >> /Contents {stream_number} 0 R >>").encode("ascii"))
+        self._page_count += 1
+
+    def _write_object(self, number: int, body: bytes) -> None:
+        if number == len(self._offsets):
+            self._offsets.append(0)
+        self._offsets[number] = self._handle.tell()
+        self._handle.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def export_documents(invoices: Iterable, path: str, fmt: Optional[str] = None,
+                     cache: Optional[RenderCache] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     on_chunk: Optional[Callable[[int], None]] = None) -> int:
+    """Render invoices (Invoice objects or record tuples) into one document and return how many were written.
+
+    Renders through cache when given, so invoices already shown are not
+    formatted again. on_chunk is called with the running count after each
+    chunk, e.g. to report progress or cancel by raising.
+    """
+    fmt = detect_format(path, fmt)
+    # PDF pages are laid out from the text rendering
+    render_format = "html" if fmt == "html" else "text"
+    renderer = RENDERERS[render_format]
+    count = 0
+    handle = open(path, "wb") if fmt == "pdf" else open(path, "w", encoding="utf-8")
+    with handle:
+        pdf = PdfWriter(handle) if fmt == "pdf" else None
+        if fmt == "html":
+            handle.write(HTML_HEADER)
+        invoices = iter(invoices)
+        while True:
+            chunk = list(islice(invoices, chunk_size))
+            if not chunk:
+                break
+            fields = [record_fields(item) if isinstance(item, tuple) else invoice_fields(item) for item in chunk]
+            if cache is not None:
+                rendered = [cache.render_fields(item, render_format) for item in fields]
+            else:
+                rendered = [renderer(item) for item in fields]
+            if pdf is not None:
+                for text in rendered:
+                    pdf.add_block(text.strip("\n").split("\n") + [""])
+            else:
+                handle.write("".join(rendered))
+            count += len(chunk)
+            if on_chunk is not None:
+                on_chunk(count)
+        if pdf is not None:
+            pdf.close()
+        elif fmt == "html":
+            handle.write(HTML_FOOTER)
+    return count
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for exporting invoice documents."""
+    from bookstore_batch import iter_source_records
+
+    parser = argparse.ArgumentParser(prog="python -m bookstore_documents", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="output file; .txt, .html or .pdf")
+    parser.add_argument("--format", choices=FORMATS, help="document format (default: from the file extension)")
+    parser.add_argument("--db", help="SQLite database file")
+    parser.add_argument("--journal", help="order journal directory")
+    parser.add_argument("--archive", action="append", default=[], metavar="PATH",
+                        help="invoice archive file (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="invoices rendered per chunk")
+    args = parser.parse_args(argv)
+    if not (args.db or args.journal or args.archive):
+        parser.error("give at least one of --db, --journal or --archive")
+    try:
+        fmt = detect_format(args.path, args.format)
+    except ValueError as exc:
+        parser.error(str(exc))
+    records = iter_source_records(args.db, args.journal, args.archive)
+    count = export_documents(records, args.path, fmt, chunk_size=args.chunk_size)
+    print(f"Wrote {count} invoices to {args.path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
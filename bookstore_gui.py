@@ -1,44 +1,202 @@
 """
 Book Ordering System - GUI Implementation
 This module contains the Tkinter-based GUI implementation of the book ordering system.
+
+The window is shown before anything slow happens: only the first tab is
+built up front and the others on first selection, modules only some
+features need are imported when first used, and saved data is loaded and
+the search index and report table warmed on worker threads once the
+window is up.
+Run with --startup-timing to print import, first-paint and
+time-to-interactive times and exit.
 """
 
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-from bookstore_core_inher import Customer, Stock, Order, Shipping, Invoice, BookStore
+from bookstore_core_inher import Customer, Stock, BookStore
+from bookstore_lookup import ItemLookup
+from bookstore_registry import ADDED, DUPLICATE, CatalogueRegistry, CustomerRegistry
+from bookstore_inventory import Inventory, load_inventory, save_inventory
+from bookstore_profiling import PROFILER, StartupTimer, install_tk_hooks
+from bookstore_tasks import TaskRunner
+
+_IMPORTED = time.perf_counter()
+
+LOW_STOCK_ROWS = 20
 
 class BookOrderingSystemGUI:
     """Main GUI class for the Book Ordering System."""
     
-    def __init__(self, root):
-        """Initialize the GUI with main window and tabs."""
+    def __init__(self, root, db_path=None, journal_dir=None, archive_paths=(), pricing_path=None,
+                 inventory_path=None, startup=None):
+        """Initialize the GUI with main window and tabs.
+
+        With a StartupTimer as startup, milestones are recorded on it and
+        printed, and the window closes, once the search index and report table are warm.
+        """
         self.root = root
         self.root.title("Book Ordering System")
         self.root.geometry("800x600")
+        # Time Tk callbacks from here on when BOOKSTORE_PROFILE is set
+        install_tk_hooks(root)
+        self.startup = startup
+        if startup is not None:
+            root.bind('<Expose>', self._on_first_expose, add='+')
         
-        # Initialize BookStore
-        self.bookstore = BookStore()
+        # Initialize BookStore, backed by SQLite or an order journal replayed after the window is up
+        self.storage = None
+        journal = pricing = None
+        if db_path:
+            from bookstore_storage import SQLiteStorage
+            self.storage = SQLiteStorage(db_path)
+        elif journal_dir:
+            from bookstore_journal import OrderJournal
+            journal = OrderJournal(journal_dir)
+        if pricing_path:
+            from bookstore_pricing import PricingEngine, load_rules
+            pricing = PricingEngine(load_rules(pricing_path))
+        # Books added without a quantity are not tracked and never run out
+        self.inventory_path = inventory_path
+        if inventory_path and os.path.exists(inventory_path):
+            inventory = load_inventory(inventory_path)
+        else:
+            inventory = Inventory()
+        self.bookstore = BookStore(self.storage, journal=journal, pricing=pricing, inventory=inventory,
+                                   recover=False)
+        if archive_paths:
+            from bookstore_archive import InvoiceArchive
+            for path in archive_paths:
+                # Opening only maps the file, so even multi-GB archives attach instantly
+                self.bookstore.attach_archive(InvoiceArchive(path))
         
-        # Data storage
-        self.customers = []
-        self.stocks = []
+        # Data storage: registries keep one object per customer and book, and
+        # type-ahead lookups resolve labels to them
+        self.customers = CustomerRegistry()
+        self.stocks = CatalogueRegistry()
+        self.customer_lookup = ItemLookup(lambda c: f"{c.name} <{c.email}>", lambda c: (c.name, c.email))
+        self.book_lookup = ItemLookup(lambda s: f"{s.book_name} by {s.author}", lambda s: (s.book_name, s.author))
+        self._lookup_after = {}
+        # Rendered invoices, shared by the details pane and printing; built on first use
+        self.render_cache = None
         
-        # Create main notebook for tabs
+        # Background workers for slow operations
+        self.tasks = TaskRunner(root, on_busy_change=self.set_busy)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.create_status_bar()
+        
+        # Create main notebook for tabs; each is filled in when first selected
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=True, fill='both', padx=10, pady=5)
+        self._tab_builders = {}
+        self.customer_dropdown = self.book_dropdown = None
+        self.add_tab("Customer Management", self.create_customer_tab)
+        self.add_tab("Book Management", self.create_book_tab)
+        self.add_tab("Order Management", self.create_order_tab)
+        self.add_tab("Invoice Management", self.create_invoice_tab)
+        self.add_tab("Reports", self.create_report_tab)
+        self.add_tab("Diagnostics", self.create_diagnostics_tab)
+        self.notebook.bind('<<NotebookTabChanged>>', self.build_selected_tab)
+        self.build_selected_tab()
         
-        # Create tabs
-        self.create_customer_tab()
-        self.create_book_tab()
-        self.create_order_tab()
-        self.create_invoice_tab()
+        # Load saved customers and books once the window is up
+        if self.storage is not None or journal is not None:
+            self.root.after_idle(self.load_saved_data)
+        else:
+            self.refresh_status()
+            self.root.after_idle(self.startup_complete)
 
-    def create_customer_tab(self):
-        """Create the Customer Management tab."""
-        customer_frame = ttk.Frame(self.notebook)
-        self.notebook.add(customer_frame, text="Customer Management")
+    def add_tab(self, text, builder):
+        """Add an empty tab whose contents builder(frame) creates on first selection."""
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=text)
+        self._tab_builders[str(frame)] = (builder, frame)
+
+    def build_selected_tab(self, event=None):
+        """Build the selected tab's contents if this is its first selection."""
+        entry = self._tab_builders.pop(self.notebook.select(), None)
+        if entry is not None:
+            builder, frame = entry
+            builder(frame)
+
+    def _on_first_expose(self, event):
+        # Exposed widgets are drawn at the next idle point
+        self.root.unbind('<Expose>')
+        self.root.after_idle(self.startup.mark, "first_paint")
+
+    def startup_complete(self):
+        """Warm the search index and report table in the background once startup loading is done."""
+        if self.startup is not None:
+            self.startup.mark("interactive")
         
+        def finish(_result):
+            if self.startup is not None:
+                self.startup.mark("indexes_warm")
+                print(self.startup.report())
+                self.root.after_idle(self.close)
+        
+        def warm():
+            self.bookstore.warm_search_index()
+            self.bookstore.warm_report_table()
+        
+        self.tasks.submit(warm, on_success=finish, on_error=self.show_task_error)
+
+    def create_status_bar(self):
+        """Create the status bar with busy indicator and cancel button."""
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side='bottom', fill='x', padx=10, pady=(0, 5))
+        
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(status_frame, textvariable=self.status_var).pack(side='left')
+        self.stats_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.stats_var).pack(side='left', padx=20)
+        
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.tasks.cancel_all, state='disabled')
+        self.cancel_button.pack(side='right')
+        self.progress = ttk.Progressbar(status_frame, mode='indeterminate', length=150)
+        self.progress.pack(side='right', padx=5)
+
+    def set_busy(self, busy):
+        """Show or hide the busy state while background tasks run."""
+        if busy:
+            self.status_var.set("Working...")
+            self.progress.start(10)
+            self.cancel_button.configure(state='normal')
+        else:
+            self.status_var.set("Ready")
+            self.progress.stop()
+            self.cancel_button.configure(state='disabled')
+
+    def refresh_status(self):
+        """Show the running sales totals in the status bar."""
+        stats = self.bookstore.get_stats()
+        self.stats_var.set(
+            f"Invoices: {stats['invoice_count']}  |  Revenue: £{stats['total_revenue']:.2f}  |  "
+            f"Urgent: {stats['urgent_count']}  |  Avg order: £{stats['average_order_value']:.2f}")
+
+    def show_task_error(self, exc):
+        """Report an exception raised by a background task."""
+        messagebox.showerror("Error", f"Operation failed:\n{exc}")
+
+    def close(self):
+        """Stop background work and close the window."""
+        self.tasks.shutdown()
+        if self.inventory_path:
+            save_inventory(self.bookstore.inventory, self.inventory_path)
+        if self.bookstore.journal is not None:
+            self.bookstore.journal.close()
+        for archive in self.bookstore.archives:
+            archive.close()
+        self.root.destroy()
+
+    def create_customer_tab(self, customer_frame):
+        """Create the Customer Management tab."""
         # Customer input fields
         ttk.Label(customer_frame, text="Customer Details", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
@@ -63,11 +221,8 @@ class BookOrderingSystemGUI:
         # Add button
         ttk.Button(input_frame, text="Add Customer", command=self.add_customer).grid(row=3, column=0, columnspan=2, pady=10)
 
-    def create_book_tab(self):
+    def create_book_tab(self, book_frame):
         """Create the Book Management tab."""
-        book_frame = ttk.Frame(self.notebook)
-        self.notebook.add(book_frame, text="Book Management")
-        
         ttk.Label(book_frame, text="Book Details", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         input_frame = ttk.Frame(book_frame)
@@ -88,14 +243,19 @@ class BookOrderingSystemGUI:
         self.book_price = ttk.Entry(input_frame)
         self.book_price.grid(row=2, column=1, padx=5, pady=5)
         
+        # Quantity field; left blank, the book's stock is not tracked
+        ttk.Label(input_frame, text="Quantity:").grid(row=3, column=0, padx=5, pady=5)
+        self.book_quantity = ttk.Entry(input_frame)
+        self.book_quantity.grid(row=3, column=1, padx=5, pady=5)
+        
         # Add button
-        ttk.Button(input_frame, text="Add Book", command=self.add_book).grid(row=3, column=0, columnspan=2, pady=10)
+        ttk.Button(input_frame, text="Add Book", command=self.add_book).grid(row=4, column=0, columnspan=2, pady=10)
+        
+        # Bulk import button
+        ttk.Button(input_frame, text="Import Catalogue...", command=self.import_books).grid(row=5, column=0, columnspan=2, pady=5)
 
-    def create_order_tab(self):
+    def create_order_tab(self, order_frame):
         """Create the Order Management tab."""
-        order_frame = ttk.Frame(self.notebook)
-        self.notebook.add(order_frame, text="Order Management")
-        
         ttk.Label(order_frame, text="Place Order", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         input_frame = ttk.Frame(order_frame)
@@ -104,14 +264,16 @@ class BookOrderingSystemGUI:
         # Customer selection
         ttk.Label(input_frame, text="Select Customer:").grid(row=0, column=0, padx=5, pady=5)
         self.customer_var = tk.StringVar()
-        self.customer_dropdown = ttk.Combobox(input_frame, textvariable=self.customer_var)
+        self.customer_dropdown = ttk.Combobox(input_frame, textvariable=self.customer_var, width=40)
         self.customer_dropdown.grid(row=0, column=1, padx=5, pady=5)
+        self.customer_dropdown.bind('<KeyRelease>', lambda event: self.schedule_lookup(self.update_customer_dropdown))
         
         # Book selection
         ttk.Label(input_frame, text="Select Book:").grid(row=1, column=0, padx=5, pady=5)
         self.book_var = tk.StringVar()
-        self.book_dropdown = ttk.Combobox(input_frame, textvariable=self.book_var)
+        self.book_dropdown = ttk.Combobox(input_frame, textvariable=self.book_var, width=40)
         self.book_dropdown.grid(row=1, column=1, padx=5, pady=5)
+        self.book_dropdown.bind('<KeyRelease>', lambda event: self.schedule_lookup(self.update_book_dropdown))
         
         # Shipping options
         self.urgent_shipping = tk.BooleanVar()
@@ -119,12 +281,11 @@ class BookOrderingSystemGUI:
         
         # Place order button
         ttk.Button(input_frame, text="Place Order", command=self.place_order).grid(row=3, column=0, columnspan=2, pady=10)
+        self.update_customer_dropdown()
+        self.update_book_dropdown()
 
-    def create_invoice_tab(self):
+    def create_invoice_tab(self, invoice_frame):
         """Create the Invoice Management tab."""
-        invoice_frame = ttk.Frame(self.notebook)
-        self.notebook.add(invoice_frame, text="Invoice Management")
-        
         ttk.Label(invoice_frame, text="Invoice Management", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         # Invoice search
@@ -136,11 +297,99 @@ class BookOrderingSystemGUI:
         self.invoice_search.grid(row=0, column=1, padx=5, pady=5)
         
         ttk.Button(search_frame, text="Search Invoice", command=self.search_invoice).grid(row=0, column=2, padx=5, pady=5)
-        ttk.Button(search_frame, text="View All Invoices", command=self.view_all_invoices).grid(row=1, column=0, columnspan=3, pady=10)
         
-        # Results area
-        self.invoice_text = tk.Text(invoice_frame, height=10, width=50)
-        self.invoice_text.pack(pady=10, padx=20)
+        # Free-text search with an optional ship date range
+        ttk.Label(search_frame, text="Find:").grid(row=1, column=0, padx=5, pady=5)
+        self.invoice_query = ttk.Entry(search_frame)
+        self.invoice_query.grid(row=1, column=1, padx=5, pady=5)
+        ttk.Button(search_frame, text="Find Invoices", command=self.find_invoices).grid(row=1, column=2, padx=5, pady=5)
+        
+        date_frame = ttk.Frame(search_frame)
+        date_frame.grid(row=2, column=0, columnspan=3)
+        ttk.Label(date_frame, text="Shipped from (YYYY-MM-DD):").pack(side='left', padx=5)
+        self.invoice_from = ttk.Entry(date_frame, width=12)
+        self.invoice_from.pack(side='left')
+        ttk.Label(date_frame, text="to:").pack(side='left', padx=5)
+        self.invoice_to = ttk.Entry(date_frame, width=12)
+        self.invoice_to.pack(side='left')
+        
+        ttk.Button(search_frame, text="View All Invoices", command=self.view_all_invoices).grid(row=3, column=0, columnspan=3, pady=10)
+        ttk.Button(search_frame, text="Export Invoices...", command=self.export_all_invoices).grid(row=4, column=0, columnspan=3, pady=5)
+        ttk.Button(search_frame, text="Print Invoices...", command=self.print_invoices).grid(row=5, column=0, columnspan=3, pady=5)
+        
+        # Invoice list; only the rows in view are built, however long the history
+        from bookstore_invoice_view import InvoiceListView
+        self.invoice_list = InvoiceListView(
+            invoice_frame, on_select=self.display_invoice,
+            run_task=lambda fn, done: self.tasks.submit(fn, on_success=done, on_error=self.show_task_error))
+        self.invoice_list.pack(expand=True, fill='both', pady=5, padx=20)
+        
+        # Details of the selected invoice
+        self.invoice_text = tk.Text(invoice_frame, height=9, width=50)
+        self.invoice_text.pack(pady=5, padx=20)
+
+    def create_report_tab(self, report_frame):
+        """Create the Reports tab."""
+        ttk.Label(report_frame, text="Sales Reports", font=('Helvetica', 12, 'bold')).pack(pady=10)
+        ttk.Button(report_frame, text="Refresh Report", command=self.refresh_report).pack(pady=5)
+        
+        # Report output
+        self.report_text = tk.Text(report_frame, height=20, width=70)
+        self.report_text.pack(expand=True, fill='both', pady=10, padx=20)
+
+    def create_diagnostics_tab(self, diagnostics_frame):
+        """Create the Diagnostics tab showing recorded operation timings."""
+        if PROFILER.enabled:
+            modes = ", ".join(sorted(PROFILER.modes))
+            status = f"Profiling on ({modes}); callbacks over {PROFILER.slow_ms:.0f}ms are reported as slow."
+        else:
+            status = "Profiling is off. Start with BOOKSTORE_PROFILE=1 to record timings."
+        ttk.Label(diagnostics_frame, text=status).pack(pady=10)
+        
+        button_frame = ttk.Frame(diagnostics_frame)
+        button_frame.pack()
+        ttk.Button(button_frame, text="Refresh", command=self.refresh_diagnostics).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Reset", command=self.reset_diagnostics).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Save JSON...", command=self.save_diagnostics).pack(side='left', padx=5)
+        
+        columns = ("count", "mean", "p50", "p99", "max", "total")
+        self.diagnostics_tree = ttk.Treeview(diagnostics_frame, columns=columns, height=12)
+        self.diagnostics_tree.heading('#0', text="Operation")
+        self.diagnostics_tree.column('#0', width=300)
+        for column, heading in zip(columns, ("Calls", "Mean ms", "p50 ms", "p99 ms", "Max ms", "Total ms")):
+            self.diagnostics_tree.heading(column, text=heading)
+            self.diagnostics_tree.column(column, width=70, anchor='e')
+        self.diagnostics_tree.pack(expand=True, fill='both', pady=5, padx=20)
+        
+        ttk.Label(diagnostics_frame, text="Slow callbacks (most recent last):").pack(anchor='w', padx=20)
+        self.slow_text = tk.Text(diagnostics_frame, height=6, width=70)
+        self.slow_text.pack(fill='x', pady=5, padx=20)
+
+    def refresh_diagnostics(self):
+        """Show the latest operation timings and slow callbacks."""
+        data = PROFILER.snapshot()
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        operations = sorted(data["operations"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, stats in operations:
+            self.diagnostics_tree.insert('', tk.END, text=name, values=(
+                stats["count"], f"{stats['mean_ms']:.3f}", f"{stats['p50_ms']:.3f}", f"{stats['p99_ms']:.3f}",
+                f"{stats['max_ms']:.3f}", f"{stats['total_ms']:.1f}"))
+        self.slow_text.delete(1.0, tk.END)
+        for entry in data["slow_callbacks"]:
+            when = datetime.fromtimestamp(entry["time"]).strftime("%H:%M:%S")
+            self.slow_text.insert(tk.END, f"{when}  {entry['kind']:<8} {entry['elapsed_ms']:>8.0f}ms  {entry['name']}\n")
+
+    def reset_diagnostics(self):
+        """Forget the timings recorded so far."""
+        PROFILER.reset()
+        self.refresh_diagnostics()
+
+    def save_diagnostics(self):
+        """Save the recorded timings, and any profiler captures, to a JSON file."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if path:
+            PROFILER.dump(path)
+            messagebox.showinfo("Diagnostics", f"Saved diagnostics to {path}")
 
     def add_customer(self):
         """Add a new customer to the system."""
@@ -149,10 +398,17 @@ class BookOrderingSystemGUI:
         email = self.customer_email.get()
         
         if name and phone and email:
-            customer = Customer(name, phone, email)
-            self.customers.append(customer)
-            self.update_customer_dropdown()
-            messagebox.showinfo("Success", "Customer added successfully!")
+            customer, status = self.customers.upsert(Customer(name, phone, email))
+            if status is DUPLICATE:
+                messagebox.showinfo("Customer Exists", f"{customer.name} <{customer.email}> is already registered.")
+                return
+            if self.storage is not None:
+                self.storage.customers.add(customer)
+            if status is ADDED:
+                self.customer_lookup.add(customer)
+                self.update_customer_dropdown()
+            messagebox.showinfo("Success", "Customer added successfully!" if status is ADDED
+                                else "Customer details updated!")
             # Clear fields
             self.customer_name.delete(0, tk.END)
             self.customer_phone.delete(0, tk.END)
@@ -166,51 +422,182 @@ class BookOrderingSystemGUI:
         author = self.book_author.get()
         try:
             price = float(self.book_price.get())
-            if name and author:
-                stock = Stock(name, author, price)
-                self.stocks.append(stock)
-                self.update_book_dropdown()
-                messagebox.showinfo("Success", "Book added successfully!")
-                # Clear fields
-                self.book_name.delete(0, tk.END)
-                self.book_author.delete(0, tk.END)
-                self.book_price.delete(0, tk.END)
-            else:
-                messagebox.showerror("Error", "Please fill all book details!")
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid price!")
+            return
+        quantity = self.book_quantity.get().strip()
+        if quantity and not quantity.isdigit():
+            messagebox.showerror("Error", "Please enter a valid quantity!")
+            return
+        if name and author:
+            stock, status = self.stocks.upsert(Stock(name, author, price))
+            if self.storage is not None and status is not DUPLICATE:
+                self.storage.catalogue.add(stock)
+            # A quantity entered for a book already listed restocks it, and says so
+            restocked = f"\nStock set to {int(quantity)}." if quantity else ""
+            if quantity:
+                self.bookstore.inventory.set_quantity(stock, int(quantity))
+            if status is ADDED:
+                self.book_lookup.add(stock)
+                self.update_book_dropdown()
+            if status is DUPLICATE:
+                messagebox.showinfo("Book Restocked" if quantity else "Book Exists",
+                                    f"{stock.book_name} by {stock.author} is already in the catalogue.{restocked}")
+            else:
+                message = "Book added successfully!" if status is ADDED else "Book price updated!"
+                messagebox.showinfo("Success", f"{message}{restocked}")
+            # Clear fields
+            self.book_name.delete(0, tk.END)
+            self.book_author.delete(0, tk.END)
+            self.book_price.delete(0, tk.END)
+            self.book_quantity.delete(0, tk.END)
+        else:
+            messagebox.showerror("Error", "Please fill all book details!")
+
+    def import_books(self):
+        """Import books from a CSV or JSONL catalogue file."""
+        path = filedialog.askopenfilename(
+            title="Import Catalogue",
+            filetypes=[("Catalogue files", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
+            return
+        
+        def run_import(task):
+            def add_batch(batch):
+                task.check_cancelled()
+                summary = self.stocks.merge(batch)
+                if self.storage is not None:
+                    self.storage.catalogue.add_many(summary.added + summary.updated)
+                self.book_lookup.add_many(summary.added)
+            
+            from bookstore_import import import_catalogue
+            return import_catalogue(path, add_batch)
+        
+        def finish(report):
+            # Refresh the dropdown once for the whole import
+            self.update_book_dropdown()
+            details = "\n".join(f"Line {line_no}: {message}" for line_no, message in report.errors[:10])
+            messagebox.showinfo("Import Complete", f"{report.summary()}\n{details}".strip())
+        
+        self.tasks.submit(run_import, pass_task=True, on_success=finish, on_error=self.show_task_error)
+
+    def export_all_invoices(self):
+        """Export all invoices to a CSV or JSONL file."""
+        path = filedialog.asksaveasfilename(
+            title="Export Invoices", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl")])
+        if not path:
+            return
+        
+        def run_export(task):
+            def invoices():
+                for invoice in self.bookstore.iter_invoices():
+                    task.check_cancelled()
+                    yield invoice
+            
+            from bookstore_import import export_invoices
+            return export_invoices(invoices(), path)
+        
+        self.tasks.submit(
+            run_export, pass_task=True, on_error=self.show_task_error,
+            on_success=lambda count: messagebox.showinfo("Export Complete", f"Exported {count} invoices to {path}"))
+
+    def print_invoices(self):
+        """Render the listed invoices, or all invoices if none are listed, into a PDF, HTML or text file."""
+        path = filedialog.asksaveasfilename(
+            title="Print Invoices", defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("HTML files", "*.html"), ("Text files", "*.txt")])
+        if not path:
+            return
+        # Taken now, so the list can change while the file is written
+        invoices = self.invoice_list.iter_invoices() if len(self.invoice_list) else None
+        cache = self.get_render_cache()
+        
+        def run_print(task):
+            from bookstore_documents import export_documents
+            source = invoices if invoices is not None else self.bookstore.iter_invoices()
+            return export_documents(source, path, cache=cache, on_chunk=lambda _count: task.check_cancelled())
+        
+        self.tasks.submit(
+            run_print, pass_task=True, on_error=self.show_task_error,
+            on_success=lambda count: messagebox.showinfo("Print Complete", f"Wrote {count} invoices to {path}"))
+
+    def load_saved_data(self):
+        """Load persisted customers and books into the dropdowns."""
+        def load():
+            if self.storage is None:
+                self.bookstore.recover()
+                # Journaled stores only keep invoices; offer their customers and books
+                invoices = self.bookstore.snapshot_invoices()
+                customers = self.customers.merge(i.ship_order.order.customer for i in invoices)
+                stocks = self.stocks.merge(i.stock for i in invoices)
+            else:
+                # Seed the running totals from the database while off the main loop
+                self.bookstore.get_stats()
+                # Rows are appended as details change, so later rows win
+                customers = self.customers.merge(self.storage.customers.iter_all())
+                stocks = self.stocks.merge(self.storage.catalogue.iter_all())
+            self.customer_lookup.add_many(customers.added)
+            self.book_lookup.add_many(stocks.added)
+        
+        def finish(_result):
+            self.update_customer_dropdown()
+            self.update_book_dropdown()
+            self.refresh_status()
+            self.root.after_idle(self.startup_complete)
+        
+        self.tasks.submit(load, on_success=finish, on_error=self.show_task_error)
+
+    def schedule_lookup(self, update):
+        """Run a dropdown update once typing pauses."""
+        pending = self._lookup_after.pop(update.__name__, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self._lookup_after[update.__name__] = self.root.after(150, update)
 
     def update_customer_dropdown(self):
-        """Update the customer selection dropdown."""
-        self.customer_dropdown['values'] = [customer.name for customer in self.customers]
+        """Update the customer dropdown with the best matches for the typed text."""
+        self._lookup_after.pop('update_customer_dropdown', None)
+        if self.customer_dropdown is None:
+            return
+        self.customer_dropdown['values'] = self.customer_lookup.search(self.customer_var.get())
 
     def update_book_dropdown(self):
-        """Update the book selection dropdown."""
-        self.book_dropdown['values'] = [stock.book_name for stock in self.stocks]
+        """Update the book dropdown with the best matches for the typed text."""
+        self._lookup_after.pop('update_book_dropdown', None)
+        if self.book_dropdown is None:
+            return
+        self.book_dropdown['values'] = self.book_lookup.search(self.book_var.get())
 
     def place_order(self):
         """Place a new order in the system."""
-        customer_name = self.customer_var.get()
-        book_name = self.book_var.get()
+        customer_label = self.customer_var.get()
+        book_label = self.book_var.get()
         
-        if not customer_name or not book_name:
+        if not customer_label or not book_label:
             messagebox.showerror("Error", "Please select both customer and book!")
             return
         
-        customer = next((c for c in self.customers if c.name == customer_name), None)
-        stock = next((s for s in self.stocks if s.book_name == book_name), None)
+        # Labels resolve to the object first registered; use its latest details
+        customer = self.customer_lookup.get(customer_label)
+        stock = self.book_lookup.get(book_label)
+        customer = customer and self.customers.current(customer)
+        stock = stock and self.stocks.current(stock)
         
         if customer and stock:
-            order = Order(customer, stock)
-            shipping = Shipping(order, datetime.now())
-            shipping.set_ship_cost(self.urgent_shipping.get())
+            urgent = self.urgent_shipping.get()
+            
+            def create_invoice():
+                return self.bookstore.create_invoices([(customer, stock, urgent)])[0]
             
-            invoice_nbr = f"INV{self.bookstore.get_invoice_count() + 1:03d}"
-            invoice = Invoice(invoice_nbr, stock, shipping)
-            invoice.calculate_total()
+            def finish(invoice):
+                self.refresh_status()
+                journal = self.bookstore.journal
+                if journal is not None and journal.needs_snapshot:
+                    self.tasks.submit(self.bookstore.checkpoint, on_error=self.show_task_error)
+                messagebox.showinfo("Success", f"Order placed successfully!\nInvoice Number: {invoice.invoice_nbr}\nTotal Cost: £{invoice.total_cost:.2f}")
             
-            self.bookstore.add_invoice(invoice)
-            messagebox.showinfo("Success", f"Order placed successfully!\nInvoice Number: {invoice_nbr}\nTotal Cost: £{invoice.total_cost:.2f}")
+            self.tasks.submit(create_invoice, on_success=finish, on_error=self.show_task_error)
         else:
             messagebox.showerror("Error", "Invalid customer or book selection!")
 
@@ -221,44 +608,104 @@ class BookOrderingSystemGUI:
             messagebox.showerror("Error", "Please enter an invoice number!")
             return
             
-        invoice = self.bookstore.search_invoice(invoice_nbr)
-        if invoice:
-            self.display_invoice(invoice)
-        else:
-            messagebox.showerror("Error", "Invoice not found!")
+        def finish(invoice):
+            if invoice:
+                self.invoice_list.set_invoices([invoice])
+                self.display_invoice(invoice)
+            else:
+                messagebox.showerror("Error", "Invoice not found!")
+        
+        self.tasks.submit(self.bookstore.search_invoice, invoice_nbr, on_success=finish, on_error=self.show_task_error)
+
+    def find_invoices(self):
+        """Run a free-text invoice search within the entered ship dates."""
+        query = self.invoice_query.get()
+        if not query.strip():
+            messagebox.showerror("Error", "Please enter search words!")
+            return
+        try:
+            dates = [datetime.strptime(entry.get().strip(), "%Y-%m-%d").date() if entry.get().strip() else None
+                     for entry in (self.invoice_from, self.invoice_to)]
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format!")
+            return
+        
+        def finish(results):
+            self.invoice_text.delete(1.0, tk.END)
+            if not results:
+                messagebox.showinfo("Info", "No matching invoices found!")
+            self.invoice_list.set_invoices(results)
+        
+        self.tasks.submit(self.bookstore.search_invoices, query, *dates, on_success=finish, on_error=self.show_task_error)
 
     def view_all_invoices(self):
         """Display all invoices in the system."""
-        invoices = self.bookstore.get_all_invoices()
-        if not invoices:
-            messagebox.showinfo("Info", "No invoices found!")
-            return
+        def finish(invoices):
+            if not invoices:
+                messagebox.showinfo("Info", "No invoices found!")
+                return
             
-        self.invoice_text.delete(1.0, tk.END)
-        for invoice in invoices:
-            self.display_invoice(invoice, append=True)
+            self.invoice_text.delete(1.0, tk.END)
+            self.invoice_list.set_invoices(invoices)
+        
+        self.tasks.submit(self.bookstore.snapshot_invoices, on_success=finish, on_error=self.show_task_error)
+
+    def refresh_report(self):
+        """Compute the sales report in the background and show it."""
+        def build():
+            text = self.bookstore.sales_report().format()
+            low = self.bookstore.inventory.low_stock(LOW_STOCK_ROWS)
+            if low:
+                text += "\n\nLow Stock\n" + "\n".join(
+                    f"  {available:>5}  {book_name}" + (f" by {author}" if author else "")
+                    for book_name, author, available in low)
+            return text
+        
+        def finish(text):
+            self.report_text.delete(1.0, tk.END)
+            self.report_text.insert(tk.END, text)
+        
+        self.tasks.submit(build, on_success=finish, on_error=self.show_task_error)
+
+    def get_render_cache(self):
+        """Return the render cache, creating it on first use."""
+        if self.render_cache is None:
+            from bookstore_render import RenderCache
+            self.render_cache = RenderCache()
+        return self.render_cache
 
     def display_invoice(self, invoice, append=False):
         """Display invoice details in the text area."""
         if not append:
             self.invoice_text.delete(1.0, tk.END)
-            
-        invoice_text = f"""
-Invoice Number: {invoice.invoice_nbr}
-Customer: {invoice.ship_order.order.customer.name}
-Book: {invoice.stock.book_name}
-Author: {invoice.stock.author}
-Price: £{invoice.stock.price:.2f}
-Shipping Cost: £{invoice.ship_order.calc_ship_cost():.2f}
-Total Cost: £{invoice.total_cost:.2f}
-{'='*50}
-"""
-        self.invoice_text.insert(tk.END, invoice_text)
+        self.invoice_text.insert(tk.END, self.get_render_cache().render(invoice))
 
 def main():
     """Main function to start the GUI application."""
+    parser = argparse.ArgumentParser(description="Book Ordering System")
+    parser.add_argument("--db", default=os.environ.get("BOOKSTORE_DB"),
+                        help="SQLite database file to persist data in (default: $BOOKSTORE_DB)")
+    parser.add_argument("--journal", default=os.environ.get("BOOKSTORE_JOURNAL"),
+                        help="Directory for the order journal when no database is used (default: $BOOKSTORE_JOURNAL)")
+    parser.add_argument("--archive", action="append", default=[], metavar="PATH",
+                        help="Read-only invoice archive to search by number (repeatable, oldest first)")
+    parser.add_argument("--pricing", default=os.environ.get("BOOKSTORE_PRICING"),
+                        help="JSON pricing rules file (default: $BOOKSTORE_PRICING; flat shipping rates)")
+    parser.add_argument("--inventory", default=os.environ.get("BOOKSTORE_INVENTORY"),
+                        help="JSON stock levels file, saved back on exit (default: $BOOKSTORE_INVENTORY)")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print import, first-paint and time-to-interactive times, then exit")
+    args = parser.parse_args()
+
+    startup = None
+    if args.startup_timing:
+        startup = StartupTimer(_STARTED)
+        startup.mark("imports", at=_IMPORTED)
     root = tk.Tk()
-    app = BookOrderingSystemGUI(root)
+    app = BookOrderingSystemGUI(root, db_path=args.db, journal_dir=args.journal, archive_paths=args.archive,
+                                pricing_path=args.pricing, inventory_path=args.inventory, startup=startup)
+    if startup is not None:
+        startup.mark("window_built")
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+"""
+Book Ordering System - Idempotency Keys
+This module remembers which invoice each client idempotency key created, so a
+retried order returns its original invoice instead of being placed twice.
+
+Recent keys live in a bounded in-memory cache that maps them straight to
+their Invoice objects, evicting the least recently used once full and
+expiring them after ttl seconds. A persistent index (an
+IdempotencyRepository, normally the BookStore's own SQLite storage) keeps
+keys for a much longer window; a cache miss falls back to it and loads the
+invoice by number. Without an index, keys are only remembered for as long
+as the cache holds them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_TTL = 15 * 60.0
+DEFAULT_WINDOW = 30 * 24 * 3600.0
+MAX_KEY_LENGTH = 255
+# Keys recorded between sweeps of the persistent index for expired keys
+PURGE_EVERY = 10_000
+
+class IdempotencyCache:
+    """Bounded LRU cache of idempotency key -> Invoice with TTL expiry, over an optional persistent index."""
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, ttl: float = DEFAULT_TTL,
+                 window: float = DEFAULT_WINDOW, index=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.window = window
+        self.index = index
+        self._entries: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._since_purge = 0
+        self.counters: Dict[str, int] = {"hits": 0, "index_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        """Return the cached invoice for a key, without consulting the index."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+        return None
+
+    def lookup(self, key: str, load_invoice: Callable[[str], object]):
+        """Return the invoice a key created, from the cache or else the index, or None.
+
+        load_invoice turns an invoice number found in the index into the
+        Invoice, which is then cached.
+        """
+        return self.lookup_many([key], load_invoice).get(key)
+
+    def lookup_many(self, keys: Iterable[str], load_invoice: Callable[[str], object]) -> Dict[str, object]:
+        """Return key -> invoice for the keys that created one, with one index query for all cache misses."""
+        found, missing = {}, []
+        for key in keys:
+            invoice = self.get(key)
+            if invoice is not None:
+                found[key] = invoice
+            else:
+                missing.append(key)
+        if missing and self.index is not None:
+            for key, invoice_nbr in self.index.get_many(missing, time.time() - self.window).items():
+                invoice = load_invoice(invoice_nbr)
+                if invoice is not None:
+                    found[key] = invoice
+                    self.put(key, invoice)
+                    self.counters["index_hits"] += 1
+        self.counters["misses"] += sum(1 for key in missing if key not in found)
+        return found
+
+    def put(self, key: str, invoice) -> None:
+        """Cache the invoice a key created, evicting the least recently used key if full."""
+        with self._lock:
+            self._entries[key] = (invoice, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def records(self, keys: Sequence[Optional[str]], invoices: Sequence) -> List[Tuple[str, str, float]]:
+        """Return the (key, invoice number, created at) rows to persist for keyed invoices."""
+        now = time.time()
+        return [(key, invoice.invoice_nbr, now) for key, invoice in zip(keys, invoices) if key is not None]
+
+    def remember(self, keys: Sequence[Optional[str]], invoices: Sequence, persisted: bool = False) -> None:
+        """Cache newly created keyed invoices, recording them in the index unless already persisted."""
+        records = self.records(keys, invoices)
+        if not records:
+            return
+        if self.index is not None:
+            if not persisted:
+                self.index.add_many(records)
+            self._since_purge += len(records)
+            if self._since_purge >= PURGE_EVERY:
+                self._since_purge = 0
+                self.index.purge(time.time() - self.window)
+        for key, invoice in zip(keys, invoices):
+            if key is not None:
+                self.put(key, invoice)
+
+def validate_key(key) -> str:
+    """Return a client idempotency key, raising ValueError if it is unusable."""
+    if not isinstance(key, str) or not key.strip() or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"Idempotency keys must be non-empty strings of at most {MAX_KEY_LENGTH} characters")
+    return key
+
+def test_idempotency():
+    """Test function to verify replays return the original invoice."""
+    import os
+    import tempfile
+    from bookstore_core_inher import BookStore, Customer, Stock
+    from bookstore_inventory import Inventory
+    from bookstore_storage import SQLiteStorage
+
+    print("\n=== Testing Idempotent Orders ===")
+    customer = Customer("John Doe", "123-456-7890", "john@example.com")
+    stock = Stock("Python Programming", "John Smith", 29.99)
+    inventory = Inventory.from_dict({"books": {stock.book_name: 5}})
+    bookstore = BookStore(inventory=inventory)
+    first = bookstore.create_invoices([(customer, stock, False)], idempotency_keys=["order-1"])[0]
+    again = bookstore.create_invoices([(customer, stock, False), (customer, stock, True)],
+                                      idempotency_keys=["order-1", "order-2"])
+    print(f"Replay returned {again[0].invoice_nbr} (original {first.invoice_nbr}), same object: {again[0] is first}")
+    print(f"Invoices: {bookstore.get_invoice_count()}, copies left: {inventory.available(stock)}")
+    same_batch = bookstore.create_invoices([(customer, stock, False)] * 2, idempotency_keys=["order-3"] * 2)
+    print(f"Repeated within a batch: {[invoice.invoice_nbr for invoice in same_batch]}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bookstore.db")
+        bookstore = BookStore(SQLiteStorage(path))
+        placed = bookstore.create_invoices([(customer, stock, False)], idempotency_keys=["order-1"])[0]
+        bookstore.storage.close()
+        # A fresh store has an empty cache, so the replay is answered from the index
+        restarted = BookStore(SQLiteStorage(path))
+        replay = restarted.create_invoices([(customer, stock, False)], idempotency_keys=["order-1"])[0]
+        print(f"After restart: replay {replay.invoice_nbr} (original {placed.invoice_nbr}), "
+              f"invoices stored: {restarted.get_invoice_count()}, cache: {restarted.idempotency.counters}")
+        restarted.storage.close()
+
+if __name__ == "__main__":
+    test_idempotency()
@@ -0,0 +1,154 @@
+"""
+Book Ordering System - Invoice Numbers
+This module hands out unique, fixed-width, sortable invoice numbers.
+"""
+
+import os
+import threading
+from typing import Iterator, Optional
+
+class HighWaterFile:
+    """Stores an allocator's high-water mark in a small text file."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def load_high_water(self) -> int:
+        """Return the saved high-water mark, or 0 if none was saved."""
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                return int(handle.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def save_high_water(self, value: int) -> None:
+        """Save the high-water mark atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            handle.write(str(value))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.path)
+
+class InvoiceNumberBlock:
+    """A contiguous run of reserved invoice numbers."""
+    def __init__(self, allocator: "InvoiceNumberAllocator", start: int, stop: int):
+        self._allocator = allocator
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __iter__(self) -> Iterator[str]:
+        fmt = self._allocator.format
+        for number in range(self.start, self.stop):
+            yield fmt(number)
+
+class InvoiceNumberAllocator:
+    """Thread-safe invoice number allocator with a persisted high-water mark.
+
+    Numbers are leased from the store in chunks: the high-water mark is saved
+    once per lease rather than once per number, and a restart resumes above it,
+    so numbers are never reused even if some in the last lease went unissued.
+    The mark is loaded on first use, not on construction, so building an
+    allocator does no I/O.
+    """
+    def __init__(self, prefix: str = "INV", width: int = 10, lease_size: int = 1000,
+                 store=None):
+        self.prefix = prefix
+        self.width = width
+        self.lease_size = lease_size
+        self._store = store
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+        self._ceiling = 0
+        self._floor = 0
+
+    @property
+    def high_water_mark(self) -> int:
+        """Get the highest number that may already have been issued."""
+        with self._lock:
+            self._load()
+            return self._ceiling - 1
+
+    def _load(self) -> None:
+        # Called with the lock held
+        if self._next is None:
+            self._next = (self._store.load_high_water() if self._store is not None else 0) + 1
+            self._ceiling = self._next
+        if self._next <= self._floor:
+            # Nothing between here and the floor was leased: the next _take
+            # leases, and saves, from above it
+            self._next = self._ceiling = self._floor + 1
+
+    def raise_floor(self, number: int) -> None:
+        """Never issue number or anything below it.
+
+        Used for numbers issued elsewhere, such as those in an attached
+        archive. The floor is applied, and saved with the next lease, when
+        numbers are next taken, so this does no I/O itself.
+        """
+        with self._lock:
+            self._floor = max(self._floor, number)
+
+    def parse(self, invoice_nbr: str) -> Optional[int]:
+        """Return the number behind an invoice number, or None if this allocator could not have formatted it."""
+        digits = invoice_nbr[len(self.prefix):]
+        if not invoice_nbr.startswith(self.prefix) or not digits.isdigit() or len(digits) > self.width:
+            return None
+        return int(digits)
+
+    def format(self, number: int) -> str:
+        """Format a number as a fixed-width invoice number."""
+        digits = str(number)
+        if len(digits) > self.width:
+            raise OverflowError(f"Invoice number {number} exceeds {self.width} digits")
+        return f"{self.prefix}{digits.zfill(self.width)}"
+
+    def next(self) -> str:
+        """Return the next unused invoice number."""
+        with self._lock:
+            number = self._take(1)
+        return self.format(number)
+
+    def reserve(self, count: int) -> InvoiceNumberBlock:
+        """Reserve a block of consecutive numbers with a single lock round-trip."""
+        if count < 0:
+            raise ValueError("count must not be negative")
+        with self._lock:
+            start = self._take(count)
+        return InvoiceNumberBlock(self, start, start + count)
+
+    def _take(self, count: int) -> int:
+        self._load()
+        start = self._next
+        stop = start + count
+        if stop > self._ceiling:
+            ceiling = max(stop, self._ceiling + self.lease_size)
+            if self._store is not None:
+                self._store.save_high_water(ceiling - 1)
+            self._ceiling = ceiling
+        self._next = stop
+        return start
+
+def test_invoice_numbers():
+    """Test function to verify invoice number allocation."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HighWaterFile(os.path.join(tmp, "invoice.seq"))
+        allocator = InvoiceNumberAllocator(lease_size=10, store=store)
+        print("\n=== Testing Invoice Number Allocator ===")
+        print(f"First numbers: {allocator.next()}, {allocator.next()}")
+        block = allocator.reserve(3)
+        print(f"Reserved block: {list(block)}")
+        print(f"Saved high-water mark: {store.load_high_water()}")
+
+        restarted = InvoiceNumberAllocator(lease_size=10, store=store)
+        print(f"After restart: {restarted.next()}")
+
+        restarted.raise_floor(restarted.parse("INV0000000050"))
+        print(f"Above a floor of 50: {restarted.next()}, saved {store.load_high_water()}")
+
+if __name__ == "__main__":
+    test_invoice_numbers()
@@ -0,0 +1,171 @@
+"""
+Book Ordering System - Catalogue Import and Invoice Export
+This module streams supplier catalogues into Stock objects and invoices out to files.
+
+Usage:
+    python -m bookstore_import import catalogue.csv --db bookstore.db
+    python -m bookstore_import export invoices.jsonl --db bookstore.db
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bookstore_core_inher import Stock, Invoice
+from bookstore_records import INVOICE_FIELDS, invoice_to_record, record_to_dict
+
+FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 100
+
+class ImportReport:
+    """Summary of a catalogue import."""
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def add_error(self, line_no: int, message: str) -> None:
+        """Record a rejected row, keeping only the first few messages."""
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+    def summary(self) -> str:
+        """Return a one-line summary of the import."""
+        return f"Imported {self.imported} books, skipped {self.skipped} rows"
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Return the file format, from the argument or the file extension."""
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(extension)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file format for {path!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+def iter_rows(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, object]]:
+    """Yield (line number, row) pairs from a CSV or JSONL file one at a time.
+
+    Rows that cannot be decoded are yielded as the ValueError describing them,
+    so the caller decides whether to skip or stop.
+    """
+    fmt = detect_format(path, fmt)
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield line_no, ValueError(f"invalid JSON: {exc}")
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, ValueError("expected a JSON object")
+                    continue
+                yield line_no, row
+
+def parse_stock(row: Dict[str, object]) -> Stock:
+    """Build a Stock from a row, validating it like the Book Management tab."""
+    name = str(row.get("book_name") or row.get("name") or "").strip()
+    author = str(row.get("author") or "").strip()
+    try:
+        price = float(row.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {row.get('price')!r}")
+    if not name or not author:
+        raise ValueError("missing book name or author")
+    return Stock(name, author, price)
+
+def iter_stock_batches(path: str, report: ImportReport, batch_size: int = 1000,
+                       fmt: Optional[str] = None) -> Iterator[List[Stock]]:
+    """Yield lists of valid Stock objects, recording bad rows in the report."""
+    batch: List[Stock] = []
+    for line_no, row in iter_rows(path, fmt):
+        if isinstance(row, ValueError):
+            report.add_error(line_no, str(row))
+            continue
+        try:
+            batch.append(parse_stock(row))
+        except ValueError as exc:
+            report.add_error(line_no, str(exc))
+            continue
+        if len(batch) >= batch_size:
+            report.imported += len(batch)
+            yield batch
+            batch = []
+    if batch:
+        report.imported += len(batch)
+        yield batch
+
+def import_catalogue(path: str, on_batch: Callable[[List[Stock]], None], batch_size: int = 1000,
+                     fmt: Optional[str] = None) -> ImportReport:
+    """Stream a catalogue file into on_batch and return the import report."""
+    report = ImportReport()
+    for batch in iter_stock_batches(path, report, batch_size, fmt):
+        on_batch(batch)
+    return report
+
+def export_invoices(invoices: Iterable[Invoice], path: str, fmt: Optional[str] = None) -> int:
+    """Stream invoices to a CSV or JSONL file and return how many were written."""
+    fmt = detect_format(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            writer = csv.writer(handle)
+            writer.writerow(INVOICE_FIELDS)
+            for invoice in invoices:
+                writer.writerow(invoice_to_record(invoice))
+                count += 1
+        else:
+            for invoice in invoices:
+                handle.write(json.dumps(record_to_dict(invoice_to_record(invoice))))
+                handle.write("\n")
+                count += 1
+    return count
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for catalogue import and invoice export."""
+    from bookstore_storage import SQLiteStorage
+
+    parser = argparse.ArgumentParser(prog="python -m bookstore_import", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import a catalogue into the database")
+    import_parser.add_argument("path", help="CSV or JSONL file with book_name, author and price")
+    import_parser.add_argument("--db", required=True, help="SQLite database file")
+    import_parser.add_argument("--format", choices=FORMATS, help="override format detection")
+    import_parser.add_argument("--batch-size", type=int, default=5000)
+
+    export_parser = commands.add_parser("export", help="export invoices from the database")
+    export_parser.add_argument("path", help="CSV or JSONL output file")
+    export_parser.add_argument("--db", required=True, help="SQLite database file")
+    export_parser.add_argument("--format", choices=FORMATS, help="override format detection")
+
+    args = parser.parse_args(argv)
+    storage = SQLiteStorage(args.db)
+    try:
+        if args.command == "import":
+            report = import_catalogue(args.path, storage.catalogue.add_many,
+                                      args.batch_size, args.format)
+            print(report.summary())
+            for line_no, message in report.errors:
+                print(f"  line {line_no}: {message}")
+            if report.skipped > len(report.errors):
+                print(f"  ... {report.skipped - len(report.errors)} more")
+        else:
+            count = export_invoices(storage.invoices.iter_all(), args.path, args.format)
+            print(f"Exported {count} invoices to {args.path}")
+    finally:
+        storage.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
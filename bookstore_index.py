@@ -0,0 +1,105 @@
+"""
+Book Ordering System - Invoice Index
+This module contains the hash-based invoice index used by the BookStore classes.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+def normalize_key(value: str) -> str:
+    """Normalize a text key for case-insensitive lookups."""
+    return value.strip().casefold()
+
+def date_key(value: Union[date, datetime]) -> date:
+    """Reduce a ship date or datetime to its calendar day."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+class InvoiceIndex:
+    """Primary and secondary hash indexes over invoices.
+
+    The primary index maps invoice numbers to invoices; the secondary indexes
+    map customer email, book name, author and ship day to the invoices that
+    share them, in insertion order.
+    """
+    def __init__(self):
+        self._by_number: Dict[str, object] = {}
+        self._by_email: Dict[str, List[object]] = {}
+        self._by_book: Dict[str, List[object]] = {}
+        self._by_author: Dict[str, List[object]] = {}
+        self._by_ship_date: Dict[date, List[object]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_number)
+
+    def __contains__(self, invoice_nbr: str) -> bool:
+        return invoice_nbr in self._by_number
+
+    def add(self, invoice) -> None:
+        """Index an invoice under its number and secondary keys."""
+        # Keep the first invoice for a number, matching the old linear scan
+        self._by_number.setdefault(invoice.invoice_nbr, invoice)
+        customer = invoice.ship_order.order.customer
+        self._by_email.setdefault(normalize_key(customer.email), []).append(invoice)
+        self._by_book.setdefault(normalize_key(invoice.stock.book_name), []).append(invoice)
+        self._by_author.setdefault(normalize_key(invoice.stock.author), []).append(invoice)
+        self._by_ship_date.setdefault(date_key(invoice.ship_order.ship_date), []).append(invoice)
+
+    def add_many(self, invoices) -> None:
+        """Index many invoices, normalizing each distinct key only once."""
+        by_number = self._by_number
+        # Per-batch maps from raw text straight to its bucket, so invoices for
+        # repeat customers and books cost one dict lookup per index
+        emails: Dict[str, List[object]] = {}
+        books: Dict[str, List[object]] = {}
+        authors: Dict[str, List[object]] = {}
+        days: Dict[date, List[object]] = {}
+        for invoice in invoices:
+            by_number.setdefault(invoice.invoice_nbr, invoice)
+            shipping = invoice.ship_order
+            stock = invoice.stock
+            for buckets, index, text in ((emails, self._by_email, shipping.order.customer.email),
+                                         (books, self._by_book, stock.book_name),
+                                         (authors, self._by_author, stock.author)):
+                bucket = buckets.get(text)
+                if bucket is None:
+                    bucket = buckets[text] = index.setdefault(normalize_key(text), [])
+                bucket.append(invoice)
+            day = date_key(shipping.ship_date)
+            bucket = days.get(day)
+            if bucket is None:
+                bucket = days[day] = self._by_ship_date.setdefault(day, [])
+            bucket.append(invoice)
+
+    def get(self, invoice_nbr: str) -> Optional[object]:
+        """Return the invoice with the given number, if any."""
+        return self._by_number.get(invoice_nbr)
+
+    def by_customer_email(self, email: str) -> List[object]:
+        """Return invoices for a customer email."""
+        return list(self._by_email.get(normalize_key(email), ()))
+
+    def by_book(self, book_name: str) -> List[object]:
+        """Return invoices for a book name."""
+        return list(self._by_book.get(normalize_key(book_name), ()))
+
+    def by_author(self, author: str) -> List[object]:
+        """Return invoices for books by an author."""
+        return list(self._by_author.get(normalize_key(author), ()))
+
+    def by_ship_date(self, ship_date: Union[date, datetime]) -> List[object]:
+        """Return invoices shipped on the given day."""
+        return list(self._by_ship_date.get(date_key(ship_date), ()))
+
+    def ship_date_buckets(self, start: Optional[Union[date, datetime]] = None,
+                          end: Optional[Union[date, datetime]] = None) -> List[Tuple[List[object], int]]:
+        """Return (invoices, length) for each ship day from start to end inclusive, in day order.
+
+        The buckets are the index's own append-only lists; reading only the
+        first length invoices of each gives the contents as of this call.
+        """
+        low = date_key(start) if start is not None else date.min
+        high = date_key(end) if end is not None else date.max
+        return [(self._by_ship_date[day], len(self._by_ship_date[day]))
+                for day in sorted(day for day in self._by_ship_date if low <= day <= high)]
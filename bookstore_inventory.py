@@ -0,0 +1,379 @@
+"""
+Book Ordering System - Inventory
+This module tracks on-hand and reserved copies per title and reserves stock for orders.
+
+Placing an order reserves its copies first and commits the reservation once
+the invoice is stored; if invoicing fails the copies are released again, so
+stock is never sold twice nor lost to a failed order. Titles that were never
+given a quantity are not tracked and never run out.
+
+Levels are spread over lock stripes by title, so orders for different
+titles rarely wait on each other; a reservation covering several titles
+takes their stripe locks in a fixed order, so it cannot deadlock with another.
+Each stripe keeps the set of its titles at or below their reorder level, so
+low_stock reads that small index instead of scanning the catalogue.
+
+Levels set for a Stock are kept per title and author, as the catalogue
+registry keeps books, so two books sharing a title are counted apart. A
+level set for a bare title covers every author of that title that has no
+level of its own.
+
+Quantities can be loaded from and saved to a JSON file. Books are keyed by
+title; a list holds the levels of several authors of one title:
+
+    {"reorder_level": 5,
+     "books": {"Python Programming": 12,
+               "Web Development": {"on_hand": 3, "reorder_level": 1},
+               "Design Patterns": [{"author": "Erich Gamma", "on_hand": 4},
+                                   {"author": "Jane Doe", "on_hand": 2}]}}
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from bookstore_index import normalize_key
+
+DEFAULT_STRIPES = 64
+DEFAULT_REORDER_LEVEL = 5
+
+class OutOfStock(ValueError):
+    """Raised when an order asks for more copies of a title than are available."""
+    def __init__(self, book_name: str, requested: int, available: int):
+        super().__init__(f"Out of stock: '{book_name}' has {available} available, {requested} requested")
+        self.book_name = book_name
+        self.requested = requested
+        self.available = available
+
+# (normalized title, normalized author); the author is "" for a level covering the whole title
+LevelKey = Tuple[str, str]
+
+class StockLevel:
+    """On-hand and reserved copies of one title, by one author unless author is empty."""
+    __slots__ = ("book_name", "author", "on_hand", "reserved", "reorder_level")
+
+    def __init__(self, book_name: str, on_hand: int = 0, reorder_level: int = DEFAULT_REORDER_LEVEL,
+                 author: str = ""):
+        self.book_name = book_name
+        self.author = author
+        self.on_hand = on_hand
+        self.reserved = 0
+        self.reorder_level = reorder_level
+
+    @property
+    def available(self) -> int:
+        """Copies that can still be reserved."""
+        return self.on_hand - self.reserved
+
+class Reservation:
+    """Copies held for orders until they are committed or released.
+
+    Only tracked titles are held. Committing or releasing empties the
+    reservation, so doing either twice is harmless.
+    """
+    __slots__ = ("_inventory", "counts")
+
+    def __init__(self, inventory: "Inventory"):
+        self._inventory = inventory
+        self.counts: Dict[LevelKey, int] = {}
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, stock, quantity: int = 1) -> None:
+        """Reserve quantity more copies of a book, raising OutOfStock if too few are available."""
+        if quantity < 1:
+            raise ValueError("Quantity must be at least 1")
+        for key, held in self._inventory._reserve({self._inventory._key(stock): quantity}).items():
+            self.counts[key] = self.counts.get(key, 0) + held
+
+    def remove(self, stock, quantity: int = 1) -> None:
+        """Return up to quantity held copies of a book to stock, e.g. for an order that was dropped."""
+        key = self._inventory._key(stock)
+        held = self.counts.get(key, 0)
+        if not held:
+            # Held under the title-wide level, if the book gained its own since
+            key = (key[0], "")
+            held = self.counts.get(key, 0)
+        if not held:
+            return
+        released = min(held, quantity)
+        if released == held:
+            del self.counts[key]
+        else:
+            self.counts[key] = held - released
+        self._inventory._settle({key: released}, sold=False)
+
+    def commit(self) -> None:
+        """Take the reserved copies off the shelf."""
+        counts, self.counts = self.counts, {}
+        self._inventory._settle(counts, sold=True)
+
+    def release(self) -> None:
+        """Return the reserved copies to stock."""
+        counts, self.counts = self.counts, {}
+        self._inventory._settle(counts, sold=False)
+
+class Inventory:
+    """Stock levels per title, safe to use from many threads."""
+    def __init__(self, stripes: int = DEFAULT_STRIPES, reorder_level: int = DEFAULT_REORDER_LEVEL):
+        self.reorder_level = reorder_level
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._levels: List[Dict[LevelKey, StockLevel]] = [{} for _ in range(stripes)]
+        self._low: List[Set[LevelKey]] = [set() for _ in range(stripes)]
+        # Lock acquisitions that had to wait, per stripe; updated under that stripe's lock
+        self._contended = [0] * stripes
+
+    @classmethod
+    def from_dict(cls, data: dict, stripes: int = DEFAULT_STRIPES) -> "Inventory":
+        """Build an inventory from its JSON form (see the module docstring)."""
+        inventory = cls(stripes, int(data.get("reorder_level", DEFAULT_REORDER_LEVEL)))
+        for book_name, levels in data.get("books", {}).items():
+            for level in levels if isinstance(levels, list) else [levels]:
+                if isinstance(level, dict):
+                    inventory.set_quantity((book_name, level.get("author", "")), int(level["on_hand"]),
+                                           level.get("reorder_level"))
+                else:
+                    inventory.set_quantity(book_name, int(level))
+        return inventory
+
+    def to_dict(self) -> dict:
+        """Return the JSON form of the current on-hand quantities."""
+        titles: Dict[str, List[StockLevel]] = {}
+        for stripe, levels in enumerate(self._levels):
+            with self._locks[stripe]:
+                for (title_key, _), level in levels.items():
+                    titles.setdefault(title_key, []).append(level)
+        books = {}
+        for levels in titles.values():
+            levels.sort(key=lambda level: level.author)
+            entries = []
+            for level in levels:
+                entry = {"author": level.author} if level.author else {}
+                entry["on_hand"] = level.on_hand
+                if level.reorder_level != self.reorder_level:
+                    entry["reorder_level"] = level.reorder_level
+                entries.append(entry)
+            if len(entries) > 1:
+                books[levels[0].book_name] = entries
+            elif len(entries[0]) == 1:
+                books[levels[0].book_name] = entries[0]["on_hand"]
+            else:
+                books[levels[0].book_name] = entries[0]
+        return {"reorder_level": self.reorder_level, "books": books}
+
+    def set_quantity(self, stock, on_hand: int, reorder_level: Optional[int] = None) -> None:
+        """Start tracking a book, or correct its on-hand count after a stocktake.
+
+        stock is a Stock, a (book name, author) pair, or a bare title for a
+        level covering every author of it.
+        """
+        if on_hand < 0:
+            raise ValueError("Quantity cannot be negative")
+        book_name, author = _identify(stock)
+        key = (normalize_key(book_name), normalize_key(author))
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            level = self._levels[stripe].get(key)
+            if level is None:
+                level = self._levels[stripe][key] = StockLevel(book_name, 0, self.reorder_level, author)
+            level.on_hand = on_hand
+            if reorder_level is not None:
+                level.reorder_level = int(reorder_level)
+            self._index_low(stripe, key, level)
+
+    def receive(self, stock, quantity: int) -> int:
+        """Add delivered copies of a book and return its new on-hand count."""
+        if quantity < 1:
+            raise ValueError("Quantity must be at least 1")
+        book_name, author = _identify(stock)
+        key = self._key(stock)
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            level = self._levels[stripe].get(key)
+            if level is None:
+                level = self._levels[stripe][key] = StockLevel(book_name, 0, self.reorder_level, author)
+            level.on_hand += quantity
+            self._index_low(stripe, key, level)
+            return level.on_hand
+
+    def available(self, stock) -> Optional[int]:
+        """Return the copies of a book that can be reserved, or None if it is not tracked."""
+        key = self._key(stock)
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            level = self._levels[stripe].get(key)
+            return None if level is None else level.available
+
+    def reservation(self) -> Reservation:
+        """Return an empty reservation to add copies to one order at a time."""
+        return Reservation(self)
+
+    def reserve(self, stocks: Iterable) -> Reservation:
+        """Reserve one copy per book given, all or nothing.
+
+        Raises OutOfStock, reserving nothing, if any title has too few copies.
+        """
+        counts: Dict[LevelKey, int] = {}
+        for stock in stocks:
+            key = self._key(stock)
+            counts[key] = counts.get(key, 0) + 1
+        reservation = Reservation(self)
+        reservation.counts = self._reserve(counts)
+        return reservation
+
+    def low_stock(self, limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """Return (book name, author, available) for books at or below their reorder level, scarcest first.
+
+        The author is empty for a level covering the whole title.
+        """
+        low = []
+        for stripe, keys in enumerate(self._low):
+            with self._locks[stripe]:
+                levels = self._levels[stripe]
+                low.extend((levels[key].book_name, levels[key].author, levels[key].available) for key in keys)
+        low.sort(key=lambda item: (item[2], item[0], item[1]))
+        return low[:limit] if limit is not None else low
+
+    def stats(self) -> Dict[str, int]:
+        """Return tracked titles, copies on hand and reserved, and contended lock waits."""
+        titles = on_hand = reserved = 0
+        for stripe, levels in enumerate(self._levels):
+            with self._locks[stripe]:
+                titles += len(levels)
+                for level in levels.values():
+                    on_hand += level.on_hand
+                    reserved += level.reserved
+        return {"titles": titles, "on_hand": on_hand, "reserved": reserved,
+                "stripes": len(self._locks), "contended": sum(self._contended)}
+
+    def _key(self, stock) -> LevelKey:
+        """Return the key of the level counting a book: its own, else its title's, else its own untracked key."""
+        book_name, author = _identify(stock)
+        key = (normalize_key(book_name), normalize_key(author))
+        if key[1] and key not in self._levels[self._stripe(key)]:
+            title_key = (key[0], "")
+            if title_key in self._levels[self._stripe(title_key)]:
+                return title_key
+        return key
+
+    def _stripe(self, key: LevelKey) -> int:
+        return hash(key) % len(self._locks)
+
+    def _lock_stripes(self, keys: Iterable[LevelKey]) -> List[int]:
+        # Sorted, so two multi-title reservations never wait on each other in a cycle
+        stripes = sorted({self._stripe(key) for key in keys})
+        for stripe in stripes:
+            lock = self._locks[stripe]
+            if not lock.acquire(blocking=False):
+                lock.acquire()
+                self._contended[stripe] += 1
+        return stripes
+
+    def _unlock_stripes(self, stripes: List[int]) -> None:
+        for stripe in reversed(stripes):
+            self._locks[stripe].release()
+
+    def _reserve(self, counts: Dict[LevelKey, int]) -> Dict[LevelKey, int]:
+        """Reserve copies per title key, all or nothing; return the counts held for tracked titles."""
+        stripes = self._lock_stripes(counts)
+        try:
+            held = {}
+            for key, quantity in counts.items():
+                level = self._levels[self._stripe(key)].get(key)
+                if level is None:
+                    continue
+                if level.available < quantity:
+                    raise OutOfStock(level.book_name, quantity, level.available)
+                held[key] = quantity
+            for key, quantity in held.items():
+                stripe = self._stripe(key)
+                level = self._levels[stripe][key]
+                level.reserved += quantity
+                self._index_low(stripe, key, level)
+            return held
+        finally:
+            self._unlock_stripes(stripes)
+
+    def _settle(self, counts: Dict[LevelKey, int], sold: bool) -> None:
+        """Commit (sold) or release reserved copies per title key."""
+        if not counts:
+            return
+        stripes = self._lock_stripes(counts)
+        try:
+            for key, quantity in counts.items():
+                stripe = self._stripe(key)
+                level = self._levels[stripe][key]
+                level.reserved -= quantity
+                if sold:
+                    level.on_hand -= quantity
+                self._index_low(stripe, key, level)
+        finally:
+            self._unlock_stripes(stripes)
+
+    def _index_low(self, stripe: int, key: LevelKey, level: StockLevel) -> None:
+        if level.available <= level.reorder_level:
+            self._low[stripe].add(key)
+        else:
+            self._low[stripe].discard(key)
+
+def _identify(stock: Union[str, Tuple[str, str], object]) -> Tuple[str, str]:
+    """Return (book name, author) for a Stock, a (book name, author) pair or a bare title."""
+    if isinstance(stock, str):
+        return stock, ""
+    if isinstance(stock, tuple):
+        return stock
+    return stock.book_name, stock.author
+
+def load_inventory(path: str) -> Inventory:
+    """Load stock levels from a JSON file."""
+    with open(path, encoding="utf-8") as handle:
+        return Inventory.from_dict(json.load(handle))
+
+def save_inventory(inventory: Inventory, path: str) -> None:
+    """Save on-hand quantities to a JSON file, replacing it atomically."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(inventory.to_dict(), handle, indent=2)
+    os.replace(temp_path, path)
+
+def test_inventory_system():
+    """Test function to verify reservations and the low-stock index."""
+    from bookstore_core_inher import BookStore, Customer, Stock
+
+    print("\n=== Testing Inventory ===")
+    python = Stock("Python Programming", "John Smith", 29.99)
+    web = Stock("Web Development", "Jane Doe", 34.99)
+    inventory = Inventory.from_dict({"reorder_level": 2, "books": {python.book_name: 3, web.book_name: 10}})
+    reservation = inventory.reserve([python, python])
+    print(f"After reserving 2: available {inventory.available(python)}, stats {inventory.stats()}")
+    try:
+        inventory.reserve([web, python, python])
+    except OutOfStock as exc:
+        print(f"Rejected: {exc}; Web Development still {inventory.available(web)}")
+    reservation.commit()
+    print(f"After commit: {inventory.to_dict()['books']}")
+    print(f"Untracked title available: {inventory.available('Unknown Book')}")
+    print(f"Low stock: {inventory.low_stock()}")
+    inventory.receive(python, 5)
+    print(f"Low stock after delivery: {inventory.low_stock()}")
+    # Same title, different authors: counted apart, as the catalogue keeps them
+    other_python = Stock("Python Programming", "Jane Doe", 24.99)
+    inventory.set_quantity(other_python, 1)
+    print(f"By author: {inventory.available(python)} vs {inventory.available(other_python)}")
+    print(f"Saved form: {inventory.to_dict()['books'][python.book_name]}")
+
+    print("\n=== Testing Orders Against Stock ===")
+    customer = Customer("John Doe", "123-456-7890", "john@example.com")
+    bookstore = BookStore(inventory=Inventory.from_dict({"books": {web.book_name: 2}}))
+    summary = bookstore.place_orders_bulk([(customer, web, False)] * 3 + [(customer, python, True)])
+    print(f"{summary}, failed: {summary.failed}")
+    try:
+        bookstore.create_invoices([(customer, web, False)])
+    except OutOfStock as exc:
+        print(f"Order rejected: {exc}")
+    print(f"Stock now: {bookstore.inventory.to_dict()['books']}, reserved: {bookstore.inventory.stats()['reserved']}")
+
+if __name__ == "__main__":
+    test_inventory_system()
@@ -0,0 +1,249 @@
+"""
+Book Ordering System - Invoice List View
+This module contains the virtualized Treeview used to browse large invoice histories.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Iterator, Optional, Sequence
+
+from bookstore_paging import ReorderedSnapshot
+
+# Sort key per field, for sequences that cannot sort themselves
+SORT_KEYS = {
+    "invoice_nbr": lambda invoice: invoice.invoice_nbr,
+    "customer_name": lambda invoice: invoice.ship_order.order.customer.name.casefold(),
+    "book_name": lambda invoice: invoice.stock.book_name.casefold(),
+    "total_cost": lambda invoice: invoice.total_cost,
+}
+
+def sorted_invoices(invoices: Sequence, field: str, descending: bool = False) -> Sequence:
+    """Return a sequence of the invoices ordered by a SORT_KEYS field.
+
+    Sequences with a sorted_by method (stored snapshots) sort in the
+    database; anything else is read once, front to back, for its sort keys.
+    Either way this can take seconds for a long history, so call it off the
+    Tk main loop.
+    """
+    sorted_by = getattr(invoices, "sorted_by", None)
+    if sorted_by is not None:
+        return sorted_by(field, descending)
+    keys = [SORT_KEYS[field](invoice) for invoice in invoices]
+    return ReorderedSnapshot(invoices, sorted(range(len(keys)), key=keys.__getitem__, reverse=descending))
+
+class InvoiceListView(ttk.Frame):
+    """Treeview over an invoice sequence that only builds the rows in view.
+
+    The Treeview holds one item per visible row however long the sequence
+    is: the scrollbar, mouse wheel and arrow and page keys move a window
+    over the sequence and refill those items in place, so memory and redraw
+    cost follow the widget's height rather than the history's length.
+    Sorting builds a reordered sequence (see sorted_invoices) through
+    run_task, which should run it on a worker thread and pass the result
+    back on the main loop; the rows stay as they are until it arrives.
+    Without run_task it sorts inline.
+    """
+    COLUMNS = (
+        ("invoice_nbr", "Invoice Number", 120),
+        ("customer", "Customer", 160),
+        ("book", "Book", 220),
+        ("total", "Total", 80),
+    )
+    # Invoice field each column sorts by
+    SORT_FIELDS = {"invoice_nbr": "invoice_nbr", "customer": "customer_name", "book": "book_name",
+                   "total": "total_cost"}
+    # Rows moved per mouse wheel notch
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, on_select: Optional[Callable[[object], None]] = None,
+                 run_task: Optional[Callable[[Callable, Callable], None]] = None):
+        super().__init__(master)
+        self.on_select = on_select
+        self.run_task = run_task
+        self._invoices: Sequence = ()
+        # The invoices in display order: _invoices itself until sorted
+        self._shown: Sequence = ()
+        # Display position of the first row in view, and how many rows fit
+        self._top = 0
+        self._rows = 1
+        self._selected: Optional[int] = None
+        self._sort_column: Optional[str] = None
+        self._sort_descending = False
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in self.COLUMNS],
+                                 show="headings", selectmode="browse")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading, command=lambda column=name: self.sort_by(column))
+            self.tree.column(name, width=width, anchor="e" if name == "total" else "w")
+        self._rows = int(self.tree.cget("height"))
+        # Items are positions in the window, "0" at the top; see _fill
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self._scrollbar = scrollbar
+        self.tree.pack(side="left", expand=True, fill="both")
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self._on_wheel(-1 if event.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda event: self._on_wheel(-1))
+        self.tree.bind("<Button-5>", lambda event: self._on_wheel(1))
+        for key, move in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page up"), ("<Next>", "page down"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda event, move=move: self._on_key(move))
+
+    def __len__(self) -> int:
+        return len(self._invoices)
+
+    @property
+    def rendered_count(self) -> int:
+        """Get the number of rows built as Treeview items, at most the rows in view."""
+        return len(self.tree.get_children())
+
+    def set_invoices(self, invoices: Sequence) -> None:
+        """Show a new invoice sequence, keeping the current sort column."""
+        self._invoices = self._shown = invoices
+        # Shown unsorted only while a background sort is pending
+        if self._sort_column is None or self.run_task is not None:
+            self._reset()
+        if self._sort_column is not None:
+            self._sort()
+
+    def clear(self) -> None:
+        """Remove all invoices from the view."""
+        self.set_invoices(())
+
+    def sort_by(self, column: str) -> None:
+        """Sort by a column, toggling direction when it is already the sort column."""
+        if column == self._sort_column:
+            self._sort_descending = not self._sort_descending
+        else:
+            self._sort_column = column
+            self._sort_descending = False
+        self._sort()
+
+    def invoice_at(self, row: int):
+        """Return the invoice shown at a row position."""
+        return self._shown[row]
+
+    def iter_invoices(self) -> Iterator:
+        """Iterate the listed invoices in display order, as they are listed now."""
+        return iter(self._shown)
+
+    def scroll_to(self, row: int) -> None:
+        """Scroll so that the row at a display position is the first in view, as far as possible."""
+        top = max(0, min(row, len(self._shown) - self._rows))
+        if top != self._top:
+            self._top = top
+            self._fill()
+
+    def select_row(self, row: int) -> None:
+        """Select the row at a display position, scrolling it into view."""
+        if not 0 <= row < len(self._shown):
+            return
+        if row < self._top:
+            self._top = row
+        elif row >= self._top + self._rows:
+            self._top = row - self._rows + 1
+        self._selected = row
+        self._fill()
+        if self.on_select is not None:
+            self.on_select(self.invoice_at(row))
+
+    def _sort(self) -> None:
+        invoices, column, descending = self._invoices, self._sort_column, self._sort_descending
+
+        def apply(shown: Sequence) -> None:
+            # Dropped if the list or the sort changed while it was computed
+            if (self._invoices is invoices and self._sort_column == column
+                    and self._sort_descending == descending):
+                self._shown = shown
+                self._reset()
+
+        def compute() -> Sequence:
+            return sorted_invoices(invoices, self.SORT_FIELDS[column], descending)
+
+        if self.run_task is None:
+            apply(compute())
+        else:
+            self.run_task(compute, apply)
+
+    def _reset(self) -> None:
+        self._top = 0
+        self._selected = None
+        self._fill()
+
+    def _fill(self) -> None:
+        """Make the Treeview items show the rows from _top down, reusing the items already built."""
+        tree = self.tree
+        count = max(0, min(self._rows, len(self._shown) - self._top))
+        built = len(tree.get_children())
+        if built > count:
+            tree.delete(*(str(slot) for slot in range(count, built)))
+        for slot in range(count):
+            invoice = self.invoice_at(self._top + slot)
+            values = (invoice.invoice_nbr, invoice.ship_order.order.customer.name,
+                      invoice.stock.book_name, f"£{invoice.total_cost:.2f}")
+            if slot < built:
+                tree.item(str(slot), values=values)
+            else:
+                tree.insert("", "end", iid=str(slot), values=values)
+        # The selection follows its invoice, not its item
+        slot = None if self._selected is None else self._selected - self._top
+        if slot is not None and 0 <= slot < count:
+            if tree.selection() != (str(slot),):
+                tree.selection_set(str(slot))
+        elif tree.selection():
+            tree.selection_remove(*tree.selection())
+        total = len(self._shown)
+        if total:
+            self._scrollbar.set(self._top / total, (self._top + count) / total)
+        else:
+            self._scrollbar.set(0, 1)
+
+    def _on_resize(self, event: tk.Event) -> None:
+        # Only as many items as fit below the headings, so the Treeview never scrolls itself
+        row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        rows = max(1, event.height // row_height - 1)
+        if rows != self._rows:
+            self._rows = rows
+            self._top = max(0, min(self._top, len(self._shown) - rows))
+            self._fill()
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self._shown)))
+        elif unit == "pages":
+            self.scroll_to(self._top + int(amount) * self._rows)
+        else:
+            self.scroll_to(self._top + int(amount))
+
+    def _on_wheel(self, direction: int) -> str:
+        self.scroll_to(self._top + direction * self.WHEEL_ROWS)
+        return "break"
+
+    def _on_key(self, move) -> str:
+        last = len(self._shown) - 1
+        current = self._top if self._selected is None else self._selected
+        if move == "home":
+            row = 0
+        elif move == "end":
+            row = last
+        elif move == "page up":
+            row = current - self._rows
+        elif move == "page down":
+            row = current + self._rows
+        else:
+            row = current + move if self._selected is not None else current
+        self.select_row(max(0, min(row, last)))
+        return "break"
+
+    def _on_tree_select(self, _event: tk.Event) -> None:
+        selection = self.tree.selection()
+        if not selection:
+            return
+        row = self._top + int(selection[0])
+        # Reselecting after a scroll or refill is not a new selection
+        if row == self._selected:
+            return
+        self._selected = row
+        if self.on_select is not None:
+            self.on_select(self.invoice_at(row))
@@ -0,0 +1,131 @@
+"""
+Book Ordering System - Type-ahead Lookup
+This module contains the prefix index behind the customer and book search boxes.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case word tokens."""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+class PrefixIndex:
+    """Maps word prefixes to item ids for type-ahead search.
+
+    Every word of an item's text is kept in one sorted list of (token, id)
+    pairs, so all tokens sharing a prefix sit next to each other and are found
+    with a binary search. New items are buffered and merged in on the next
+    query, which keeps bulk loading cheap.
+    """
+    def __init__(self):
+        self._entries: List[Tuple[str, int]] = []
+        self._pending: List[Tuple[str, int]] = []
+        self._tokens: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def add(self, item_id: int, *texts: str) -> None:
+        """Index an item under every word of the given texts."""
+        tokens = tuple(sorted({token for text in texts for token in tokenize(text)}))
+        self._tokens[item_id] = tokens
+        self._pending.extend((token, item_id) for token in tokens)
+
+    def add_many(self, items: Iterable[Tuple[int, Tuple[str, ...]]]) -> None:
+        """Index many (item id, texts) pairs."""
+        for item_id, texts in items:
+            self.add(item_id, *texts)
+
+    def search(self, query: str, limit: int = 20) -> List[int]:
+        """Return up to limit item ids whose words start with every query word."""
+        words = tokenize(query)
+        if not words:
+            return []
+        if self._pending:
+            self._entries.extend(self._pending)
+            self._entries.sort()
+            self._pending = []
+
+        # Scan the narrowest word range, then check the other words per item
+        entries = self._entries
+        ranges = [(bisect_left(entries, (word + "\U0010ffff",)) - bisect_left(entries, (word,)), i)
+                  for i, word in enumerate(words)]
+        _, anchor_position = min(ranges)
+        anchor = words[anchor_position]
+        others = words[:anchor_position] + words[anchor_position + 1:]
+        position = bisect_left(entries, (anchor,))
+        seen = set()
+        results = []
+        while position < len(entries) and len(results) < limit:
+            token, item_id = entries[position]
+            if not token.startswith(anchor):
+                break
+            position += 1
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            tokens = self._tokens[item_id]
+            if all(any(t.startswith(word) for t in tokens) for word in others):
+                results.append(item_id)
+        return results
+
+class ItemLookup:
+    """Items with stable ids, unique display labels and a prefix index.
+
+    Ids are positions in the items list, so resolving a selected label is a
+    dict lookup followed by a list index. Labels are made unique by appending
+    the id, which keeps items with identical names apart. Methods lock
+    internally, so a worker thread can add items while the GUI searches.
+    """
+    def __init__(self, label_of: Callable[[object], str],
+                 texts_of: Callable[[object], Tuple[str, ...]]):
+        self.label_of = label_of
+        self.texts_of = texts_of
+        self.items: List[object] = []
+        self.labels: List[str] = []
+        self._ids_by_label: Dict[str, int] = {}
+        self._index = PrefixIndex()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, item) -> int:
+        """Add an item and return its id."""
+        return self.add_many([item])
+
+    def add_many(self, items: Iterable) -> int:
+        """Add many items under a single lock acquisition; return the first new id."""
+        with self._lock:
+            first_id = len(self.items)
+            for item in items:
+                item_id = len(self.items)
+                label = self.label_of(item)
+                if label in self._ids_by_label:
+                    label = f"{label} (#{item_id + 1})"
+                self.items.append(item)
+                self.labels.append(label)
+                self._ids_by_label[label] = item_id
+                self._index.add(item_id, *self.texts_of(item))
+            return first_id
+
+    def id_of(self, label: str) -> Optional[int]:
+        """Return the id of the item shown with a label."""
+        return self._ids_by_label.get(label)
+
+    def get(self, label: str):
+        """Return the item shown with a label, if any."""
+        item_id = self._ids_by_label.get(label)
+        return None if item_id is None else self.items[item_id]
+
+    def search(self, query: str, limit: int = 20) -> List[str]:
+        """Return labels of up to limit items matching the query."""
+        with self._lock:
+            if not query.strip():
+                return self.labels[:limit]
+            return [self.labels[item_id] for item_id in self._index.search(query, limit)]
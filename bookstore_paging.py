@@ -0,0 +1,141 @@
+"""
+Book Ordering System - Invoice Paging
+This module provides read-only, snapshot-consistent sequences over a BookStore's invoices.
+
+Both snapshots fix their contents when taken, without copying anything:
+
+- InvoiceListSnapshot remembers the length of the store's append-only invoice
+  list, so invoices added later are never seen and indexes stay stable.
+- StoredInvoiceSnapshot remembers the highest database row id, and fetches
+  invoices a page at a time as they are indexed. Pages are read by row id
+  (keyset paging) when the previous page is known, so scrolling through
+  millions of rows never pays for a growing OFFSET.
+
+A stored snapshot can also be sorted in the database (sorted_by): the
+resulting SortedInvoiceSnapshot holds only the row ids in sort order and
+fetches each page by id, so neither sorting nor reading it in that order
+loads every invoice or revisits pages.
+"""
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import islice
+from typing import Dict, Iterator, List
+
+PAGE_SIZE = 500
+CACHED_PAGES = 8
+
+class InvoiceListSnapshot(Sequence):
+    """The first `length` invoices of an append-only list, as they were when taken."""
+    def __init__(self, invoices: List, length: int):
+        self._invoices = invoices
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._invoices[i] for i in range(self._length)[position]]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError(position)
+        return self._invoices[position]
+
+    def __iter__(self) -> Iterator:
+        # A list iterator tolerates appends; stopping at the snapshot length
+        # keeps later invoices out
+        return islice(self._invoices, self._length)
+
+class _PagedSnapshot(Sequence):
+    """Sequence read from storage a page at a time, keeping the last few pages."""
+    def __init__(self, repository, length: int, page_size: int):
+        self._repository = repository
+        self.page_size = page_size
+        self._length = length
+        self._pages: "OrderedDict[int, List]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(self._length)[position]]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError(position)
+        number, offset = divmod(position, self.page_size)
+        return self._page(number)[offset]
+
+    def _page(self, number: int) -> List:
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        page = self._pages[number] = self._fetch(number)
+        if len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def _fetch(self, number: int) -> List:
+        raise NotImplementedError
+
+class StoredInvoiceSnapshot(_PagedSnapshot):
+    """Invoices persisted up to a row id, fetched from storage page by page."""
+    def __init__(self, repository, page_size: int = PAGE_SIZE):
+        self.up_to_id = repository.snapshot_id()
+        super().__init__(repository, repository.count(self.up_to_id), page_size)
+        # Row id each page starts after, for keyset reads
+        self._page_after: Dict[int, int] = {0: 0}
+
+    def __iter__(self) -> Iterator:
+        return self._repository.iter_all(self.up_to_id)
+
+    def sorted_by(self, field: str, descending: bool = False) -> "SortedInvoiceSnapshot":
+        """Return these invoices ordered by a field (see InvoiceRepository.sorted_ids), sorted by the database."""
+        return SortedInvoiceSnapshot(self._repository, self._repository.sorted_ids(field, descending, self.up_to_id),
+                                     self.page_size)
+
+    def _fetch(self, number: int) -> List:
+        after = self._page_after.get(number)
+        if after is None:
+            return self._repository.page(number * self.page_size, self.page_size, self.up_to_id)
+        page, last_id = self._repository.page_after(after, self.page_size, self.up_to_id)
+        if page:
+            self._page_after[number + 1] = last_id
+        return page
+
+class SortedInvoiceSnapshot(_PagedSnapshot):
+    """Stored invoices in an order fixed by their row ids, fetched page by page by id."""
+    def __init__(self, repository, ids: array, page_size: int = PAGE_SIZE):
+        super().__init__(repository, len(ids), page_size)
+        self._ids = ids
+
+    def __iter__(self) -> Iterator:
+        for start in range(0, self._length, self.page_size):
+            yield from self._repository.get_by_ids(self._ids[start:start + self.page_size])
+
+    def _fetch(self, number: int) -> List:
+        start = number * self.page_size
+        return self._repository.get_by_ids(self._ids[start:start + self.page_size])
+
+class ReorderedSnapshot(Sequence):
+    """Another sequence read in the order of a list of its positions."""
+    def __init__(self, invoices: Sequence, order: List[int]):
+        self._invoices = invoices
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._invoices[i] for i in self._order[position]]
+        return self._invoices[self._order[position]]
+
+    def __iter__(self) -> Iterator:
+        invoices = self._invoices
+        return (invoices[row] for row in self._order)
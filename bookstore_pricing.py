@@ -0,0 +1,294 @@
+"""
+Book Ordering System - Pricing Rules
+This module quotes order totals from shipping tiers, bulk discounts, promo codes and VAT.
+
+A RuleSet holds the rules as written. PricingEngine compiles it into lookup
+tables (per-destination weight bounds and bulk thresholds searched with
+bisect, dicts for promo codes and book weights), so evaluating a quote costs
+a few dict lookups and two binary searches however many rules there are.
+
+Quotes are memoized per (book, price, weight, shipping class, destination,
+promo, quantity) in an LRU cache. Price and weight are part of the key, so a
+repriced Stock or a reweighed book never sees a stale quote; the old entries
+simply age out. Replacing the rules clears the cache.
+
+The default RuleSet reproduces the classic flat rates: standard 3.95,
+urgent 5.45, no discounts and no VAT.
+
+Rules can be loaded from a JSON file:
+
+    {"vat_rate": 0.2,
+     "default_weight": 0.5,
+     "weights": {"Python Programming": 1.2},
+     "shipping": [{"destination": "domestic", "max_weight": 2, "standard": 3.95, "urgent": 5.45},
+                  {"destination": "domestic", "max_weight": 20, "standard": 6.5, "urgent": 9.0}],
+     "bulk_discounts": [{"min_quantity": 10, "rate": 0.05}],
+     "promos": [{"code": "SPRING10", "rate": 0.1}, {"code": "FREESHIP", "free_shipping": true}]}
+"""
+
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bookstore_index import normalize_key
+
+DEFAULT_DESTINATION = "domestic"
+
+class ShippingTier:
+    """Shipping costs for parcels up to max_weight kg to a destination."""
+    __slots__ = ("destination", "max_weight", "standard_cost", "urgent_cost")
+
+    def __init__(self, destination: str, max_weight: float, standard_cost: float, urgent_cost: float):
+        self.destination = destination
+        self.max_weight = max_weight
+        self.standard_cost = standard_cost
+        self.urgent_cost = urgent_cost
+
+class BulkDiscount:
+    """A discount rate for orders of at least min_quantity copies."""
+    __slots__ = ("min_quantity", "rate")
+
+    def __init__(self, min_quantity: int, rate: float):
+        self.min_quantity = min_quantity
+        self.rate = rate
+
+class Promo:
+    """A promo code: a rate off, a fixed amount off and/or free shipping.
+
+    When books is given, the code only applies to those book names.
+    """
+    __slots__ = ("code", "rate", "amount_off", "free_shipping", "books")
+
+    def __init__(self, code: str, rate: float = 0.0, amount_off: float = 0.0, free_shipping: bool = False,
+                 books: Iterable[str] = ()):
+        self.code = code
+        self.rate = rate
+        self.amount_off = amount_off
+        self.free_shipping = free_shipping
+        self.books = frozenset(normalize_key(book) for book in books)
+
+class RuleSet:
+    """The pricing rules as configured; compiled by PricingEngine."""
+    def __init__(self, shipping_tiers: Optional[Iterable[ShippingTier]] = None,
+                 bulk_discounts: Iterable[BulkDiscount] = (), promos: Iterable[Promo] = (),
+                 vat_rate: float = 0.0, weights: Optional[Dict[str, float]] = None,
+                 default_weight: float = 0.5):
+        if shipping_tiers is None:
+            shipping_tiers = [ShippingTier(DEFAULT_DESTINATION, float("inf"), 3.95, 5.45)]
+        self.shipping_tiers = list(shipping_tiers)
+        self.bulk_discounts = list(bulk_discounts)
+        self.promos = list(promos)
+        self.vat_rate = vat_rate
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RuleSet":
+        """Build a rule set from its JSON form (see the module docstring)."""
+        tiers = None
+        if "shipping" in data:
+            tiers = [ShippingTier(tier.get("destination", DEFAULT_DESTINATION),
+                                  float(tier.get("max_weight", float("inf"))),
+                                  float(tier["standard"]), float(tier["urgent"])) for tier in data["shipping"]]
+        return cls(tiers,
+                   [BulkDiscount(int(rule["min_quantity"]), float(rule["rate"]))
+                    for rule in data.get("bulk_discounts", ())],
+                   [Promo(promo["code"], float(promo.get("rate", 0.0)), float(promo.get("amount_off", 0.0)),
+                          bool(promo.get("free_shipping", False)), promo.get("books", ()))
+                    for promo in data.get("promos", ())],
+                   float(data.get("vat_rate", 0.0)),
+                   {book: float(weight) for book, weight in data.get("weights", {}).items()},
+                   float(data.get("default_weight", 0.5)))
+
+def load_rules(path: str) -> RuleSet:
+    """Load a rule set from a JSON file."""
+    with open(path, encoding="utf-8") as handle:
+        return RuleSet.from_dict(json.load(handle))
+
+class Quote:
+    """Price breakdown of one order line; all amounts are rounded to pence."""
+    __slots__ = ("subtotal", "discount", "shipping", "vat", "total")
+
+    def __init__(self, subtotal: float, discount: float, shipping: float, vat: float, total: float):
+        self.subtotal = subtotal
+        self.discount = discount
+        self.shipping = shipping
+        self.vat = vat
+        self.total = total
+
+    def __repr__(self) -> str:
+        return (f"Quote(subtotal={self.subtotal:.2f}, discount={self.discount:.2f}, "
+                f"shipping={self.shipping:.2f}, vat={self.vat:.2f}, total={self.total:.2f})")
+
+class CompiledRules:
+    """Lookup tables built from a RuleSet."""
+    def __init__(self, rules: RuleSet):
+        tiers: Dict[str, List[ShippingTier]] = {}
+        for tier in rules.shipping_tiers:
+            tiers.setdefault(normalize_key(tier.destination), []).append(tier)
+        # destination -> (sorted weight bounds, standard costs, urgent costs)
+        self.shipping: Dict[str, Tuple[List[float], List[float], List[float]]] = {}
+        for destination, entries in tiers.items():
+            entries.sort(key=lambda tier: tier.max_weight)
+            self.shipping[destination] = ([tier.max_weight for tier in entries],
+                                          [tier.standard_cost for tier in entries],
+                                          [tier.urgent_cost for tier in entries])
+        discounts = sorted(rules.bulk_discounts, key=lambda rule: rule.min_quantity)
+        self.bulk_thresholds = [rule.min_quantity for rule in discounts]
+        self.bulk_rates = [rule.rate for rule in discounts]
+        self.promos = {promo.code.strip().upper(): promo for promo in rules.promos}
+        self.weights = {normalize_key(book): weight for book, weight in rules.weights.items()}
+        self.default_weight = rules.default_weight
+        self.vat_rate = rules.vat_rate
+
+    def quote(self, book_key: str, price: float, urgent: bool, destination: str,
+              promo_code: Optional[str], quantity: int) -> Quote:
+        """Evaluate the rules for one order line."""
+        subtotal = price * quantity
+        position = bisect_right(self.bulk_thresholds, quantity) - 1
+        discount = subtotal * self.bulk_rates[position] if position >= 0 else 0.0
+
+        table = self.shipping.get(destination)
+        if table is None:
+            raise ValueError(f"No shipping to {destination!r}")
+        bounds, standard_costs, urgent_costs = table
+        weight = self.weights.get(book_key, self.default_weight) * quantity
+        tier = bisect_left(bounds, weight)
+        if tier == len(bounds):
+            raise ValueError(f"No shipping tier for {weight:g}kg to {destination!r}")
+        shipping = urgent_costs[tier] if urgent else standard_costs[tier]
+
+        if promo_code is not None:
+            promo = self.promos.get(promo_code)
+            if promo is None:
+                raise ValueError(f"Unknown promo code: {promo_code}")
+            if not promo.books or book_key in promo.books:
+                remaining = subtotal - discount
+                discount += min(remaining, remaining * promo.rate + promo.amount_off)
+                if promo.free_shipping:
+                    shipping = 0.0
+
+        subtotal = round(subtotal, 2)
+        discount = round(discount, 2)
+        vat = round((subtotal - discount + shipping) * self.vat_rate, 2)
+        return Quote(subtotal, discount, shipping, vat, round(subtotal - discount + shipping + vat, 2))
+
+class PricingEngine:
+    """Compiled pricing rules with an LRU cache of quotes.
+
+    Safe to share between threads: the cache is guarded by a lock, and
+    set_rules swaps in newly compiled tables as a whole.
+    """
+    def __init__(self, rules: Optional[RuleSet] = None, cache_size: int = 65_536):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, Quote]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.set_rules(rules or RuleSet())
+
+    @property
+    def rules(self) -> RuleSet:
+        """Get the rule set currently in force."""
+        return self._rules
+
+    def set_rules(self, rules: RuleSet) -> None:
+        """Compile and switch to a new rule set, dropping every cached quote."""
+        compiled = CompiledRules(rules)
+        with self._lock:
+            self._rules = rules
+            self._compiled = compiled
+            self._cache.clear()
+
+    def set_weight(self, book_name: str, weight: float) -> None:
+        """Change one book's shipping weight without recompiling."""
+        with self._lock:
+            self._rules.weights[book_name] = weight
+            self._compiled.weights[normalize_key(book_name)] = weight
+
+    def invalidate(self) -> None:
+        """Drop every cached quote."""
+        with self._lock:
+            self._cache.clear()
+
+    def quote(self, stock, urgent: bool = False, destination: Optional[str] = None,
+              promo: Optional[str] = None, quantity: int = 1) -> Quote:
+        """Return the quote for an order line of quantity copies of a book.
+
+        Raises ValueError for an unknown destination or promo code, or when
+        no shipping tier covers the parcel weight.
+        """
+        if quantity < 1:
+            raise ValueError("Quantity must be at least 1")
+        book_key = normalize_key(stock.book_name)
+        destination = normalize_key(destination) if destination else DEFAULT_DESTINATION
+        promo_code = promo.strip().upper() if promo else None
+        cache = self._cache
+        with self._lock:
+            compiled = self._compiled
+            key = (book_key, stock.price, compiled.weights.get(book_key), bool(urgent), destination,
+                   promo_code, quantity)
+            quote = cache.get(key)
+            if quote is not None:
+                cache.move_to_end(key)
+                self.hits += 1
+                return quote
+        quote = compiled.quote(book_key, stock.price, bool(urgent), destination, promo_code, quantity)
+        with self._lock:
+            self.misses += 1
+            # Skip caching if the rules changed while this quote was computed
+            if self.cache_size and compiled is self._compiled:
+                cache[key] = quote
+                if len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+        return quote
+
+    def cache_info(self) -> Dict[str, int]:
+        """Return cache hits, misses and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                    "max_size": self.cache_size}
+
+def test_pricing_system():
+    """Test function to verify pricing rules and quote caching."""
+    from bookstore_core_inher import Stock
+
+    stock = Stock("Python Programming", "John Smith", 29.99)
+    print("\n=== Testing Default Pricing ===")
+    engine = PricingEngine()
+    print(f"Standard: {engine.quote(stock)}")
+    print(f"Urgent: {engine.quote(stock, urgent=True)}")
+
+    print("\n=== Testing Rule Set ===")
+    engine.set_rules(RuleSet.from_dict({
+        "vat_rate": 0.2,
+        "weights": {"Python Programming": 1.2},
+        "shipping": [{"destination": "domestic", "max_weight": 2, "standard": 3.95, "urgent": 5.45},
+                     {"destination": "domestic", "max_weight": 30, "standard": 6.5, "urgent": 9.0},
+                     {"destination": "EU", "max_weight": 30, "standard": 9.5, "urgent": 14.0}],
+        "bulk_discounts": [{"min_quantity": 5, "rate": 0.05}, {"min_quantity": 10, "rate": 0.1}],
+        "promos": [{"code": "SPRING10", "rate": 0.1}, {"code": "FREESHIP", "free_shipping": True}],
+    }))
+    print(f"1 copy: {engine.quote(stock)}")
+    print(f"10 copies: {engine.quote(stock, quantity=10)}")
+    print(f"1 copy to the EU, urgent: {engine.quote(stock, urgent=True, destination='eu')}")
+    print(f"1 copy with spring10: {engine.quote(stock, promo='spring10')}")
+    print(f"1 copy with FREESHIP: {engine.quote(stock, promo='FREESHIP')}")
+    try:
+        engine.quote(stock, promo="BOGUS")
+    except ValueError as exc:
+        print(f"Bogus promo rejected: {exc}")
+
+    print("\n=== Testing Quote Cache ===")
+    engine.quote(stock)
+    print(f"Cache: {engine.cache_info()}")
+    repriced = Stock("Python Programming", "John Smith", 24.99)
+    print(f"Repriced: {engine.quote(repriced)}")
+    engine.set_weight("Python Programming", 2.5)
+    print(f"Heavier edition: {engine.quote(stock)}")
+    print(f"Cache: {engine.cache_info()}")
+
+if __name__ == "__main__":
+    test_pricing_system()
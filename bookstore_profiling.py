@@ -0,0 +1,372 @@
+"""
+Book Ordering System - Profiling and Instrumentation
+This module records call counts and latency histograms for hot operations and
+watches the Tk main loop for slow callbacks.
+
+Instrumentation is switched on with the BOOKSTORE_PROFILE environment variable,
+read once at import:
+
+    BOOKSTORE_PROFILE=1                     counts, histograms and Tk callback timing
+    BOOKSTORE_PROFILE=1,cprofile            ... plus a cProfile capture of the main thread
+    BOOKSTORE_PROFILE=1,tracemalloc         ... plus tracemalloc allocation snapshots
+    BOOKSTORE_PROFILE_OUT=profile.json      dump everything to JSON at exit
+    BOOKSTORE_SLOW_MS=100                   slow-callback warning threshold
+
+When it is off, @instrument returns the function it decorates unchanged and
+measure() returns a shared no-op context manager, so disabled instrumentation
+costs nothing on decorated functions and one attribute check per measure().
+
+Latencies go into power-of-two histogram buckets (1us, 2us, 4us, ...), so
+recording is a bit_length() and a list increment, and percentiles are
+reported to within a factor of two.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+BUCKETS = 32
+SLOW_CALLBACKS_KEPT = 50
+NO_OP = nullcontext()
+
+class OperationStats:
+    """Call count, total and histogram of latencies for one operation."""
+    __slots__ = ("name", "count", "total_ns", "max_ns", "buckets", "_lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # buckets[i] counts calls taking under 2**i microseconds (and at least half that)
+        self.buckets = [0] * BUCKETS
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ns: int) -> None:
+        """Fold one call's duration into the stats."""
+        bucket = min((elapsed_ns >> 10).bit_length(), BUCKETS - 1)
+        with self._lock:
+            self.count += 1
+            self.total_ns += elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.buckets[bucket] += 1
+
+    def clear(self) -> None:
+        """Forget every recorded call."""
+        with self._lock:
+            self.count = self.total_ns = self.max_ns = 0
+            self.buckets = [0] * BUCKETS
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Return the upper bound of the bucket holding a percentile, in ms."""
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min((1 << bucket) * 1.024e-3, self.max_ns / 1e6)
+        return 0.0
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the stats as a JSON-friendly dict."""
+        with self._lock:
+            count = self.count
+            return {
+                "count": count,
+                "total_ms": self.total_ns / 1e6,
+                "mean_ms": self.total_ns / count / 1e6 if count else 0.0,
+                "p50_ms": self.percentile_ms(0.50),
+                "p90_ms": self.percentile_ms(0.90),
+                "p99_ms": self.percentile_ms(0.99),
+                "max_ms": self.max_ns / 1e6,
+                "histogram_us": {str(1 << bucket): number for bucket, number in enumerate(self.buckets) if number},
+            }
+
+class Profiler:
+    """Registry of operation stats plus the optional cProfile and tracemalloc captures."""
+    def __init__(self, enabled: bool = False, modes: frozenset = frozenset(), slow_ms: float = 100.0):
+        self.enabled = enabled
+        self.modes = modes
+        self.slow_ms = slow_ms
+        self.operations: Dict[str, OperationStats] = {}
+        self.slow_callbacks: deque = deque(maxlen=SLOW_CALLBACKS_KEPT)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self.last_slow_at = 0.0
+
+    @classmethod
+    def from_environment(cls) -> "Profiler":
+        """Build the profiler configured by BOOKSTORE_PROFILE and BOOKSTORE_SLOW_MS."""
+        setting = os.environ.get("BOOKSTORE_PROFILE", "").strip().lower()
+        modes = frozenset(part.strip() for part in setting.split(",") if part.strip())
+        enabled = bool(modes - {"0", "false", "off", "no"})
+        try:
+            slow_ms = float(os.environ.get("BOOKSTORE_SLOW_MS", "100"))
+        except ValueError:
+            slow_ms = 100.0
+        return cls(enabled, modes, slow_ms)
+
+    def operation(self, name: str) -> OperationStats:
+        """Return the stats for an operation, creating them on first use."""
+        stats = self.operations.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.operations.setdefault(name, OperationStats(name))
+        return stats
+
+    def measure(self, name: str, main_loop: bool = False):
+        """Return a context manager timing its body as one call of an operation.
+
+        With main_loop, a body over the slow threshold is reported as a stall.
+        """
+        if not self.enabled:
+            return NO_OP
+        return _Timer(self.operation(name), self if main_loop else None)
+
+    def report_slow(self, name: str, elapsed_ms: float, kind: str = "callback") -> None:
+        """Record and print a main-loop stall."""
+        self.last_slow_at = time.perf_counter()
+        self.slow_callbacks.append({"time": time.time(), "kind": kind, "name": name,
+                                    "elapsed_ms": round(elapsed_ms, 2)})
+        print(f"[bookstore] slow Tk {kind}: {name} held the main loop for {elapsed_ms:.0f}ms",
+              file=sys.stderr)
+
+    def reset(self) -> None:
+        """Forget every recorded call and stall."""
+        with self._lock:
+            # Cleared in place: decorated functions hold on to their stats
+            for stats in self.operations.values():
+                stats.clear()
+            self.slow_callbacks.clear()
+            self.started = time.time()
+
+    def start_captures(self) -> None:
+        """Start the cProfile and tracemalloc captures selected in the modes."""
+        if "cprofile" in self.modes and self._cprofile is None:
+            import cProfile
+            # cProfile only follows the thread that enables it: the Tk main thread
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+
+    def snapshot(self, top: int = 25) -> Dict[str, object]:
+        """Return everything recorded so far as a JSON-friendly dict."""
+        with self._lock:
+            operations = list(self.operations.values())
+        data = {
+            "enabled": self.enabled,
+            "modes": sorted(self.modes),
+            "slow_ms": self.slow_ms,
+            "uptime_s": round(time.time() - self.started, 3),
+            "operations": {stats.name: stats.snapshot() for stats in sorted(operations, key=lambda s: s.name)
+                           if stats.count},
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+        if self._cprofile is not None:
+            data["cprofile"] = self._cprofile_rows(top)
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+                data["tracemalloc"] = {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [{"where": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                            for stat in statistics],
+                }
+        return data
+
+    def _cprofile_rows(self, top: int) -> List[Dict[str, object]]:
+        import pstats
+        self._cprofile.disable()
+        try:
+            stats = pstats.Stats(self._cprofile)
+        finally:
+            self._cprofile.enable()
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        return [{"function": f"{path}:{line}({name})", "calls": calls, "total_ms": total * 1000,
+                 "cumulative_ms": cumulative * 1000}
+                for (path, line, name), (_, calls, total, cumulative, _) in rows]
+
+    def dump(self, path: str) -> None:
+        """Write the snapshot to a JSON file, and the raw cProfile data next to it."""
+        data = self.snapshot()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2)
+        os.replace(temp_path, path)
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(os.path.splitext(path)[0] + ".prof")
+
+class _Timer:
+    __slots__ = ("stats", "profiler", "started")
+
+    def __init__(self, stats: OperationStats, profiler: Optional[Profiler] = None):
+        self.stats = stats
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter_ns() - self.started
+        self.stats.record(elapsed)
+        if self.profiler is not None and elapsed > self.profiler.slow_ms * 1e6:
+            self.profiler.report_slow(self.stats.name, elapsed / 1e6)
+        return False
+
+class StartupTimer:
+    """Milestones of application startup, in milliseconds from a start time.
+
+    Take the start time at the top of the main module, before its other
+    imports, so the first milestone can cover them.
+    """
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str, at: Optional[float] = None) -> float:
+        """Record a milestone, now or at a perf_counter time, unless already recorded."""
+        if name not in self.marks:
+            self.marks[name] = ((time.perf_counter() if at is None else at) - self.started) * 1000
+        return self.marks[name]
+
+    def report(self) -> str:
+        """Return the milestones in the order they were reached."""
+        return "\n".join(f"{name:<20} {ms:>9.1f} ms" for name, ms in sorted(self.marks.items(), key=lambda m: m[1]))
+
+PROFILER = Profiler.from_environment()
+
+def instrument(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorate a function to record its calls under name (default: its qualified name).
+
+    When profiling is off the function is returned as it is.
+    """
+    def decorate(fn: Callable) -> Callable:
+        if not PROFILER.enabled:
+            return fn
+        stats = PROFILER.operation(name or fn.__qualname__)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.record(clock() - started)
+        return wrapper
+    return decorate
+
+def measure(name: str, main_loop: bool = False):
+    """Return a context manager timing its body as one call of an operation."""
+    return PROFILER.measure(name, main_loop)
+
+def install_tk_hooks(root, heartbeat_ms: int = 50) -> bool:
+    """Time every Tk callback registered from now on and watch for main-loop stalls.
+
+    Call before building widgets: Tk callbacks are wrapped in tkinter.CallWrapper
+    when they are registered, so replacing it times commands, bindings and
+    after() callbacks alike as "tk:<function>". Callbacks over the slow
+    threshold are reported; a heartbeat also reports stalls not caused by a
+    Python callback, such as long redraws. Returns False when profiling is off.
+    """
+    if not PROFILER.enabled:
+        return False
+    import tkinter
+
+    profiler = PROFILER
+    slow_ns = int(profiler.slow_ms * 1e6)
+    base = tkinter.CallWrapper
+
+    class TimedCallWrapper(base):
+        def __init__(self, func, subst, widget):
+            super().__init__(func, subst, widget)
+            label = getattr(func, "__qualname__", repr(func))
+            if label.endswith("after.<locals>.callit"):
+                # after() wraps callbacks in callit, renamed to the callback's __name__
+                label = func.__name__
+            self.stats = profiler.operation(f"tk:{label}")
+
+        def __call__(self, *args):
+            started = time.perf_counter_ns()
+            try:
+                return super().__call__(*args)
+            finally:
+                elapsed = time.perf_counter_ns() - started
+                self.stats.record(elapsed)
+                if elapsed > slow_ns:
+                    profiler.report_slow(self.stats.name[3:], elapsed / 1e6)
+
+    interval = heartbeat_ms / 1000
+    expected = [time.perf_counter() + interval]
+
+    def beat():
+        now = time.perf_counter()
+        lag_ms = (now - expected[0]) * 1000
+        # Stalls already explained by a slow callback are not reported twice
+        if lag_ms > profiler.slow_ms and profiler.last_slow_at < now - lag_ms / 1000:
+            profiler.report_slow("unattributed work", lag_ms, kind="stall")
+        expected[0] = now + interval
+        root.tk.call("after", heartbeat_ms, command)
+
+    # Registered before the swap, and rescheduled through the raw Tcl command,
+    # so the heartbeat is not timed itself
+    command = root._register(beat, needcleanup=0)
+    tkinter.CallWrapper = TimedCallWrapper
+    root.tk.call("after", heartbeat_ms, command)
+    profiler.start_captures()
+    return True
+
+def _dump_at_exit() -> None:
+    path = os.environ.get("BOOKSTORE_PROFILE_OUT")
+    if PROFILER.enabled and path:
+        PROFILER.dump(path)
+
+atexit.register(_dump_at_exit)
+
+def test_profiling_system():
+    """Test function to verify operation timing and the JSON dump."""
+    import tempfile
+
+    print("\n=== Testing Instrumentation ===")
+    profiler = Profiler(enabled=True, modes=frozenset({"1", "tracemalloc"}))
+    profiler.start_captures()
+    for delay in (0.0, 0.001, 0.002, 0.005):
+        with profiler.measure("sleep"):
+            time.sleep(delay)
+    blob = [bytes(1000) for _ in range(1000)]
+    stats = profiler.snapshot(top=3)
+    sleep = stats["operations"]["sleep"]
+    print(f"sleep: {sleep['count']} calls, max {sleep['max_ms']:.1f}ms, p50 <= {sleep['p50_ms']:.2f}ms")
+    print(f"tracemalloc top entries: {len(stats['tracemalloc']['top'])}")
+    del blob
+    import tracemalloc
+    tracemalloc.stop()
+
+    print("\n=== Testing Disabled Instrumentation ===")
+    disabled = Profiler()
+    print(f"Disabled measure is the shared no-op: {disabled.measure('x') is NO_OP}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profile.json")
+        profiler.dump(path)
+        with open(path, encoding="utf-8") as handle:
+            print(f"Dumped operations: {list(json.load(handle)['operations'])}")
+
+if __name__ == "__main__":
+    test_profiling_system()
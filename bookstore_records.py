@@ -0,0 +1,65 @@
+"""
+Book Ordering System - Invoice Records
+This module converts invoices to and from flat records for storage, import and export.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from bookstore_core_inher import Customer, Stock, Order, Shipping, Invoice
+
+INVOICE_FIELDS = ("invoice_nbr", "customer_name", "customer_phone", "customer_email", "book_name",
+                  "author", "price", "ship_date", "ship_cost", "urgent", "total_cost")
+
+def invoice_to_record(invoice: Invoice) -> tuple:
+    """Flatten an invoice into a record tuple ordered like INVOICE_FIELDS."""
+    shipping = invoice.ship_order
+    customer = shipping.order.customer
+    stock = invoice.stock
+    return (invoice.invoice_nbr, customer.name, customer.phone, customer.email,
+            stock.book_name, stock.author, stock.price, shipping.ship_date.isoformat(),
+            shipping.calc_ship_cost(), shipping.is_urgent, invoice.total_cost)
+
+def invoice_from_record(record: tuple, customers: Optional[Dict[tuple, Customer]] = None,
+                        stocks: Optional[Dict[tuple, Stock]] = None) -> Invoice:
+    """Rebuild an invoice and its order chain from a record tuple.
+
+    When customers and stocks dicts are given, identical customers and books
+    are shared between the rebuilt invoices instead of being duplicated.
+    """
+    (invoice_nbr, name, phone, email, book_name, author, price,
+     ship_date, ship_cost, urgent, total_cost) = record
+    if customers is None:
+        customer = Customer(name, phone, email)
+    else:
+        customer = customers.get((name, phone, email))
+        if customer is None:
+            customer = customers[name, phone, email] = Customer(name, phone, email)
+    if stocks is None:
+        stock = Stock(book_name, author, price)
+    else:
+        stock = stocks.get((book_name, author, price))
+        if stock is None:
+            stock = stocks[book_name, author, price] = Stock(book_name, author, price)
+    return build_invoice(invoice_nbr, customer, stock, ship_date, urgent, total_cost, ship_cost)
+
+def build_invoice(invoice_nbr: str, customer: Customer, stock: Stock, ship_date: str,
+                  urgent: bool, total_cost: float, ship_cost: Optional[float] = None) -> Invoice:
+    """Rebuild an invoice for known customer and stock objects.
+
+    The recorded ship_cost is kept when given, since quoted costs may differ
+    from the flat Shipping rates.
+    """
+    shipping = Shipping(Order(customer, stock), datetime.fromisoformat(ship_date))
+    shipping.set_ship_cost(bool(urgent), ship_cost)
+    invoice = Invoice(invoice_nbr, stock, shipping)
+    invoice.total_cost = total_cost
+    return invoice
+
+def record_to_dict(record: tuple) -> Dict[str, object]:
+    """Return a record tuple as a field-name mapping."""
+    return dict(zip(INVOICE_FIELDS, record))
+
+def record_from_dict(data: Dict[str, object]) -> tuple:
+    """Return a field-name mapping as a record tuple."""
+    return tuple(data[field] for field in INVOICE_FIELDS)
@@ -0,0 +1,241 @@
+"""
+Book Ordering System - Customer and Catalogue Registries
+This module keeps one canonical Customer per person and one Stock per book.
+
+Customers are keyed by email and by phone number, both normalized, so
+"Jane@Example.com " and "jane@example.com", or "+44 20 7946 0000" and
+"442079460000", are the same person. A customer arriving with a known phone
+number but a new email is the same person too; the new email becomes an
+alias for them. Books are keyed by (title, author), case-insensitively.
+
+Upserting a known customer or book returns the registered object, so
+every order for them shares one instance. When the details changed (a new
+name or phone, a new price) the registered object is replaced for future
+orders; invoices already issued keep the details they were issued with.
+
+Names, authors and titles are interned per registry: a million customers
+called "Smith" or a thousand books by one author hold one copy of the string.
+"""
+
+import re
+import threading
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from bookstore_core_inher import Customer, Stock
+from bookstore_index import normalize_key
+
+ADDED = "added"
+UPDATED = "updated"
+DUPLICATE = "duplicate"
+
+# Shorter runs of digits are placeholders ("n/a", "0") rather than phone numbers
+MIN_PHONE_DIGITS = 7
+_NON_DIGITS = re.compile(r"\D+")
+
+T = TypeVar("T")
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address for lookups."""
+    return email.strip().casefold()
+
+def normalize_phone(phone: str) -> str:
+    """Reduce a phone number to its digits, or "" when it is too short to identify anyone."""
+    digits = _NON_DIGITS.sub("", phone)
+    return digits if len(digits) >= MIN_PHONE_DIGITS else ""
+
+class MergeSummary(Generic[T]):
+    """What a bulk merge did: the objects added and updated, and how many rows were duplicates."""
+    def __init__(self):
+        self.added: List[T] = []
+        self.updated: List[T] = []
+        self.duplicates = 0
+
+    def __repr__(self) -> str:
+        return f"MergeSummary(added={len(self.added)}, updated={len(self.updated)}, duplicates={self.duplicates})"
+
+class _Registry(Generic[T]):
+    """Lock, string pool and bulk merge shared by both registries."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._strings: Dict[str, str] = {}
+
+    def upsert(self, item: T) -> Tuple[T, str]:
+        """Register an item; return the registered object and ADDED, UPDATED or DUPLICATE."""
+        with self._lock:
+            return self._upsert(item)
+
+    def merge(self, items: Iterable[T]) -> MergeSummary:
+        """Upsert many items under one lock acquisition; later rows win over earlier ones."""
+        summary = MergeSummary()
+        with self._lock:
+            for item in items:
+                registered, status = self._upsert(item)
+                if status is ADDED:
+                    summary.added.append(registered)
+                elif status is UPDATED:
+                    summary.updated.append(registered)
+                else:
+                    summary.duplicates += 1
+        return summary
+
+    def _intern(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def _upsert(self, item: T) -> Tuple[T, str]:
+        raise NotImplementedError
+
+class CustomerRegistry(_Registry[Customer]):
+    """Customers deduplicated by normalized email and phone number."""
+    def __init__(self):
+        super().__init__()
+        # Primary email key -> customer, in registration order
+        self._customers: Dict[str, Customer] = {}
+        # Other emails of known customers, and phone keys, -> primary email key
+        self._aliases: Dict[str, str] = {}
+        self._by_phone: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def __iter__(self) -> Iterator[Customer]:
+        with self._lock:
+            return iter(list(self._customers.values()))
+
+    def get(self, email: str) -> Optional[Customer]:
+        """Return the customer registered under an email address or one of its aliases."""
+        key = normalize_email(email)
+        customer = self._customers.get(key)
+        if customer is None and key in self._aliases:
+            customer = self._customers[self._aliases[key]]
+        return customer
+
+    def find_by_phone(self, phone: str) -> Optional[Customer]:
+        """Return the customer registered under a phone number."""
+        primary = self._by_phone.get(_phone_key(phone))
+        return None if primary is None else self._customers[primary]
+
+    def current(self, customer: Customer) -> Customer:
+        """Return the registered version of a customer, or the customer itself if unknown."""
+        return self.get(customer.email) or customer
+
+    def _upsert(self, customer: Customer) -> Tuple[Customer, str]:
+        email_key = normalize_email(customer.email)
+        if email_key == customer.email:
+            # Share the string with the customer rather than keeping a copy
+            email_key = customer.email
+        phone_key = _phone_key(customer.phone)
+        primary = email_key if email_key in self._customers else self._aliases.get(email_key)
+        if primary is None and phone_key:
+            primary = self._by_phone.get(phone_key)
+            if primary is not None:
+                self._aliases[email_key] = primary
+                return self._customers[primary], DUPLICATE
+        if primary is None:
+            registered = self._canonical(customer)
+            self._customers[email_key] = registered
+            if phone_key:
+                self._by_phone.setdefault(phone_key, email_key)
+            return registered, ADDED
+        existing = self._customers[primary]
+        if existing.name == customer.name.strip() and _phone_key(existing.phone) == phone_key:
+            return existing, DUPLICATE
+        registered = self._canonical(customer, existing.email)
+        self._customers[primary] = registered
+        if phone_key:
+            self._by_phone.setdefault(phone_key, primary)
+        return registered, UPDATED
+
+    def _canonical(self, customer: Customer, email: Optional[str] = None) -> Customer:
+        name = self._intern(customer.name.strip())
+        email = email if email is not None else customer.email.strip()
+        phone = customer.phone.strip()
+        if name is customer.name and email is customer.email and phone is customer.phone:
+            return customer
+        return type(customer)(name, phone, email)
+
+def _phone_key(phone: str) -> int:
+    # An int takes about half the memory of the digit string; the leading 1
+    # keeps "0207..." and "207..." apart. 0 means no usable number.
+    digits = normalize_phone(phone)
+    return int("1" + digits) if digits else 0
+
+class CatalogueRegistry(_Registry[Stock]):
+    """Books deduplicated by (title, author)."""
+    def __init__(self):
+        super().__init__()
+        self._stocks: Dict[Tuple[str, str], Stock] = {}
+        # Title key -> (title, author) keys, for orders that name only the title
+        self._by_title: Dict[str, List[Tuple[str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._stocks)
+
+    def __iter__(self) -> Iterator[Stock]:
+        with self._lock:
+            return iter(list(self._stocks.values()))
+
+    def get(self, book_name: str, author: str) -> Optional[Stock]:
+        """Return the book registered under a title and author."""
+        return self._stocks.get((normalize_key(book_name), normalize_key(author)))
+
+    def find_by_title(self, book_name: str) -> List[Stock]:
+        """Return the books registered under a title, by any author, oldest first."""
+        return [self._stocks[key] for key in self._by_title.get(normalize_key(book_name), ())]
+
+    def current(self, stock: Stock) -> Stock:
+        """Return the registered version of a book, or the book itself if unknown."""
+        return self.get(stock.book_name, stock.author) or stock
+
+    def _upsert(self, stock: Stock) -> Tuple[Stock, str]:
+        title_key = self._intern(normalize_key(stock.book_name))
+        key = (title_key, self._intern(normalize_key(stock.author)))
+        existing = self._stocks.get(key)
+        if existing is not None and existing.price == stock.price:
+            return existing, DUPLICATE
+        # A price change keeps the spelling the book was registered with
+        registered = self._canonical(stock if existing is None else
+                                     type(stock)(existing.book_name, existing.author, stock.price))
+        self._stocks[key] = registered
+        if existing is not None:
+            return registered, UPDATED
+        self._by_title.setdefault(title_key, []).append(key)
+        return registered, ADDED
+
+    def _canonical(self, stock: Stock) -> Stock:
+        book_name = self._intern(stock.book_name.strip())
+        author = self._intern(stock.author.strip())
+        if book_name is stock.book_name and author is stock.author:
+            return stock
+        return type(stock)(book_name, author, stock.price)
+
+def test_registries():
+    """Test function to verify deduplication, aliases and interning."""
+    print("\n=== Testing Customer Registry ===")
+    customers = CustomerRegistry()
+    jane, status = customers.upsert(Customer("Jane Doe", "+44 20 7946 0000", "jane@example.com"))
+    print(f"First upsert: {status}")
+    same, status = customers.upsert(Customer("Jane Doe", "442079460000", " Jane@Example.com "))
+    print(f"Case/format variant: {status}, same object: {same is jane}")
+    _, status = customers.upsert(Customer("Jane Doe", "44 20 7946 0000", "jane.doe@work.example"))
+    print(f"Known phone, new email: {status}; alias resolves: {customers.get('jane.doe@work.example') is jane}")
+    _, status = customers.upsert(Customer("Jane Doe", "020 7946 1111", "jane@example.com"))
+    print(f"New phone: {status}; current: {customers.current(jane).phone}")
+    summary = customers.merge([Customer("John Smith", "555-0100-200", "john@example.com"),
+                               Customer("John Smith", "5550100200", "JOHN@example.com"),
+                               Customer("Amy Smith", "555-0100-300", "amy@example.com")])
+    print(f"Merge: {summary}; registered: {len(customers)}")
+
+    print("\n=== Testing Catalogue Registry ===")
+    catalogue = CatalogueRegistry()
+    summary = catalogue.merge([Stock("Python Programming", "John Smith", 29.99),
+                               Stock("python programming ", "John Smith", 29.99),
+                               Stock("Python Programming", "Jane Doe", 31.50),
+                               Stock("Web Development", "John Smith", 34.99),
+                               Stock("Python Programming", "John Smith", 27.99)])
+    print(f"Merge: {summary}; registered: {len(catalogue)}")
+    print(f"By title: {[(s.author, s.price) for s in catalogue.find_by_title('PYTHON PROGRAMMING')]}")
+    first, web = catalogue.get("Python Programming", "John Smith"), catalogue.get("Web Development", "John Smith")
+    print(f"Author string shared: {first.author is web.author}")
+
+if __name__ == "__main__":
+    test_registries()
@@ -0,0 +1,140 @@
+"""
+Book Ordering System - Invoice Rendering
+This module formats invoices as the text shown in the invoice details pane, or as HTML.
+
+Rendering reads only the fields an invoice shows (invoice_fields and
+record_fields), so invoices and record tuples render alike. RenderCache
+keeps recently rendered invoices keyed by invoice number, with those same
+fields as the content version: an invoice is re-rendered only when
+something it shows has changed.
+"""
+
+import html
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from bookstore_core_inher import Invoice
+
+INVOICE_TEMPLATE = """
+Invoice Number: {invoice_nbr}
+Customer: {customer_name}
+Book: {book_name}
+Author: {author}
+Price: £{price:.2f}
+Shipping Cost: £{ship_cost:.2f}
+Total Cost: £{total_cost:.2f}
+{rule}
+"""
+
+HTML_TEMPLATE = """<section class="invoice">
+<h2>Invoice {invoice_nbr}</h2>
+<table>
+<tr><th>Customer</th><td>{customer_name}</td></tr>
+<tr><th>Book</th><td>{book_name}</td></tr>
+<tr><th>Author</th><td>{author}</td></tr>
+<tr><th>Price</th><td>&pound;{price:.2f}</td></tr>
+<tr><th>Shipping Cost</th><td>&pound;{ship_cost:.2f}</td></tr>
+<tr><th>Total Cost</th><td>&pound;{total_cost:.2f}</td></tr>
+</table>
+</section>
+"""
+
+DEFAULT_CACHE_SIZE = 4096
+
+# (invoice_nbr, customer_name, book_name, author, price, ship_cost, total_cost)
+Fields = Tuple[str, str, str, str, float, float, float]
+
+def invoice_fields(invoice: Invoice) -> Fields:
+    """Return the fields an invoice shows when rendered.
+
+    Reads only attributes both core modules provide, so invoices from
+    bookstore_core render too.
+    """
+    stock = invoice.stock
+    return (invoice.invoice_nbr, invoice.ship_order.order.customer.name, stock.book_name, stock.author,
+            stock.price, invoice.ship_order.calc_ship_cost(), invoice.total_cost)
+
+def record_fields(record: tuple) -> Fields:
+    """Return the fields shown for a record tuple ordered like INVOICE_FIELDS."""
+    (invoice_nbr, customer_name, _phone, _email, book_name, author, price,
+     _ship_date, ship_cost, _urgent, total_cost) = record
+    return invoice_nbr, customer_name, book_name, author, price, ship_cost, total_cost
+
+def render_text(fields: Fields) -> str:
+    """Render invoice fields as text."""
+    invoice_nbr, customer_name, book_name, author, price, ship_cost, total_cost = fields
+    return INVOICE_TEMPLATE.format(invoice_nbr=invoice_nbr, customer_name=customer_name,
+                                   book_name=book_name, author=author, price=price,
+                                   ship_cost=ship_cost, total_cost=total_cost, rule="=" * 50)
+
+def render_html(fields: Fields) -> str:
+    """Render invoice fields as an HTML section."""
+    invoice_nbr, customer_name, book_name, author, price, ship_cost, total_cost = fields
+    escape = html.escape
+    return HTML_TEMPLATE.format(invoice_nbr=escape(invoice_nbr), customer_name=escape(customer_name),
+                                book_name=escape(book_name), author=escape(author), price=price,
+                                ship_cost=ship_cost, total_cost=total_cost)
+
+RENDERERS: Dict[str, Callable[[Fields], str]] = {"text": render_text, "html": render_html}
+
+def render_record(record: tuple) -> str:
+    """Render a record tuple ordered like INVOICE_FIELDS as invoice text.
+
+    Works on plain tuples so worker processes can render without rebuilding
+    Invoice objects.
+    """
+    return render_text(record_fields(record))
+
+def render_invoice(invoice: Invoice) -> str:
+    """Render an invoice as text."""
+    return render_text(invoice_fields(invoice))
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered invoices, keyed by invoice number and format.
+
+    Each entry remembers the fields it was rendered from; a lookup whose
+    fields differ re-renders and replaces it. Safe to share between
+    threads, such as the GUI's main loop and a print running on a worker;
+    rendering itself happens outside the cache's lock.
+    """
+    def __init__(self, capacity: int = DEFAULT_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Fields, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def render(self, invoice: Invoice, fmt: str = "text") -> str:
+        """Return an invoice rendered as text or HTML."""
+        return self.render_fields(invoice_fields(invoice), fmt)
+
+    def render_record(self, record: tuple, fmt: str = "text") -> str:
+        """Return a record tuple rendered as text or HTML."""
+        return self.render_fields(record_fields(record), fmt)
+
+    def render_fields(self, fields: Fields, fmt: str = "text") -> str:
+        """Return invoice fields rendered, from the cache when they are unchanged."""
+        key = (fields[0], fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fields:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        text = RENDERERS[fmt](fields)
+        with self._lock:
+            self._entries[key] = (fields, text)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        """Forget every rendered invoice."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,199 @@
+"""
+Book Ordering System - Sales Reports
+This module computes grouped sales aggregates over the invoice history.
+
+NumPy is used for the grouped sums when it is installed; otherwise a pure
+Python single pass over the same columns produces identical results.
+"""
+
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from bookstore_columnar import DictionaryColumn, InvoiceTable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class SalesReport:
+    """Aggregated sales figures for a set of invoices."""
+    def __init__(self):
+        self.invoice_count = 0
+        self.total_revenue = 0.0
+        self.urgent_count = 0
+        self.revenue_by_day: Dict[date, float] = {}
+        self.revenue_by_title: Dict[str, float] = {}
+        self.revenue_by_author: Dict[str, float] = {}
+        self.revenue_by_customer: Dict[str, float] = {}
+
+    @property
+    def standard_count(self) -> int:
+        """Get the number of standard-shipping invoices."""
+        return self.invoice_count - self.urgent_count
+
+    @property
+    def average_order_value(self) -> float:
+        """Get the mean invoice total."""
+        return self.total_revenue / self.invoice_count if self.invoice_count else 0.0
+
+    def merge(self, other: "SalesReport") -> None:
+        """Fold another report, such as one for a different chunk of invoices, into this one."""
+        self.invoice_count += other.invoice_count
+        self.total_revenue += other.total_revenue
+        self.urgent_count += other.urgent_count
+        for mine, theirs in ((self.revenue_by_day, other.revenue_by_day),
+                             (self.revenue_by_title, other.revenue_by_title),
+                             (self.revenue_by_author, other.revenue_by_author),
+                             (self.revenue_by_customer, other.revenue_by_customer)):
+            for key, total in theirs.items():
+                mine[key] = mine.get(key, 0.0) + total
+        self.revenue_by_day = dict(sorted(self.revenue_by_day.items()))
+
+    @staticmethod
+    def top(revenue: Dict, limit: int = 10) -> List[Tuple[object, float]]:
+        """Return the highest-revenue entries of a grouping."""
+        return sorted(revenue.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def format(self, limit: int = 10) -> str:
+        """Return the report as plain text."""
+        lines = [
+            f"Invoices: {self.invoice_count}",
+            f"Total revenue: £{self.total_revenue:.2f}",
+            f"Average order value: £{self.average_order_value:.2f}",
+            f"Urgent shipping: {self.urgent_count}  Standard shipping: {self.standard_count}",
+        ]
+        sections = (
+            ("Revenue per day", sorted(self.revenue_by_day.items())[-limit:]),
+            (f"Top {limit} titles", self.top(self.revenue_by_title, limit)),
+            (f"Top {limit} authors", self.top(self.revenue_by_author, limit)),
+            (f"Top {limit} customers", self.top(self.revenue_by_customer, limit)),
+        )
+        for heading, rows in sections:
+            lines.append("")
+            lines.append(heading)
+            lines.extend(f"  {key}: £{value:.2f}" for key, value in rows)
+        return "\n".join(lines)
+
+def build_report(source: Union[InvoiceTable, Iterable], use_numpy: Optional[bool] = None,
+                 rows: Optional[int] = None) -> SalesReport:
+    """Compute a sales report from an InvoiceTable or an iterable of invoices.
+
+    rows limits the report to a table's first rows, so a table another
+    thread keeps appending to can be reported on as of a known length.
+    """
+    table = source if isinstance(source, InvoiceTable) else InvoiceTable.from_invoices(source)
+    if rows is None:
+        rows = len(table)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+    return _numpy_report(table, rows) if use_numpy else _python_report(table, rows)
+
+def _grouped(column: DictionaryColumn, sums) -> Dict[str, float]:
+    return {value: float(total) for value, total in zip(column.values, sums) if total}
+
+def _numpy_report(table: InvoiceTable, rows: int) -> SalesReport:
+    report = SalesReport()
+    report.invoice_count = rows
+    if not report.invoice_count:
+        return report
+    # Sliced copies: a buffer exported from the live arrays would stop them growing
+    totals = np.frombuffer(table.total_cost[:rows], dtype=np.float64)
+    report.total_revenue = float(totals.sum())
+    report.urgent_count = int(np.count_nonzero(np.frombuffer(table.urgent[:rows], dtype=np.int8)))
+
+    for column, target in ((table.book_name, report.revenue_by_title),
+                           (table.author, report.revenue_by_author),
+                           (table.customer_email, report.revenue_by_customer)):
+        codes = np.frombuffer(column.codes[:rows], dtype=np.uint32)
+        target.update(_grouped(column, np.bincount(codes, weights=totals, minlength=len(column.values))))
+
+    days, day_codes = np.unique(np.frombuffer(table.ship_day[:rows], dtype=np.int32), return_inverse=True)
+    day_sums = np.bincount(day_codes, weights=totals)
+    report.revenue_by_day = {date.fromordinal(int(day)): float(total) for day, total in zip(days, day_sums)}
+    return report
+
+def _python_report(table: InvoiceTable, rows: int) -> SalesReport:
+    report = SalesReport()
+    report.invoice_count = rows
+    titles = [0.0] * len(table.book_name.values)
+    authors = [0.0] * len(table.author.values)
+    customers = [0.0] * len(table.customer_email.values)
+    days: Dict[int, float] = {}
+    for title, author, customer, day, total in islice(zip(table.book_name.codes, table.author.codes,
+                                                          table.customer_email.codes, table.ship_day,
+                                                          table.total_cost), rows):
+        titles[title] += total
+        authors[author] += total
+        customers[customer] += total
+        days[day] = days.get(day, 0.0) + total
+    report.total_revenue = sum(islice(table.total_cost, rows))
+    report.urgent_count = sum(islice(table.urgent, rows))
+    report.revenue_by_title = _grouped(table.book_name, titles)
+    report.revenue_by_author = _grouped(table.author, authors)
+    report.revenue_by_customer = _grouped(table.customer_email, customers)
+    report.revenue_by_day = {date.fromordinal(day): total for day, total in sorted(days.items())}
+    return report
+
+def check_aggregates(bookstore, tolerance: float = 1e-6) -> List[str]:
+    """Compare a BookStore's running totals with a sales report recomputed from its invoices.
+
+    Returns a description of every mismatch; an empty list means consistent.
+    """
+    report = bookstore.sales_report()
+    stats = bookstore.get_stats()
+    problems = []
+
+    def compare(name, expected, actual):
+        if abs(expected - actual) > tolerance * max(1.0, abs(expected)):
+            problems.append(f"{name}: expected {expected}, running total {actual}")
+
+    compare("invoice_count", report.invoice_count, stats["invoice_count"])
+    compare("total_revenue", report.total_revenue, stats["total_revenue"])
+    compare("urgent_count", report.urgent_count, stats["urgent_count"])
+    for name, expected, actual in (("book", report.revenue_by_title, bookstore.get_revenue_by_book()),
+                                   ("customer", report.revenue_by_customer,
+                                    bookstore.get_revenue_by_customer())):
+        for key in expected.keys() | actual.keys():
+            compare(f"{name} {key!r}", expected.get(key, 0.0), actual.get(key, 0.0))
+    return problems
+
+def test_reports_system():
+    """Test function to verify reports and running totals agree."""
+    from datetime import datetime
+    from bookstore_core_inher import Customer, Stock, Order, Shipping, Invoice, BookStore
+
+    customers = [
+        Customer("John Doe", "123-456-7890", "john@example.com"),
+        Customer("Jane Smith", "098-765-4321", "jane@example.com"),
+    ]
+    stocks = [
+        Stock("Python Programming", "John Smith", 29.99),
+        Stock("Data Science Basics", "Mary Johnson", 39.99),
+    ]
+    bookstore = BookStore()
+    for i in range(6):
+        shipping = Shipping(Order(customers[i % 2], stocks[i % 2 if i < 4 else 0]), datetime.now())
+        shipping.set_ship_cost(i % 3 == 0)
+        invoice = Invoice(f"INV{i + 1:03d}", shipping.order.stock, shipping)
+        invoice.calculate_total()
+        bookstore.add_invoice(invoice)
+
+    print("\n=== Testing Sales Report ===")
+    print(bookstore.sales_report(use_numpy=False).format(limit=3))
+    print("\n=== Testing Running Totals ===")
+    print(f"Stats: {bookstore.get_stats()}")
+    problems = check_aggregates(bookstore)
+    print(f"Running totals consistent? {not problems}")
+    for problem in problems:
+        print(f"  {problem}")
+    # The report table is kept current by later orders
+    bookstore.place_orders_bulk([(customers[0], stocks[1], True)])
+    print(f"After another order: {bookstore.sales_report().invoice_count} invoices, "
+          f"consistent? {not check_aggregates(bookstore)}")
+
+if __name__ == "__main__":
+    test_reports_system()
@@ -0,0 +1,291 @@
+"""
+Book Ordering System - Invoice Search
+This module contains the inverted index behind free-text invoice search.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from bookstore_index import date_key
+from bookstore_lookup import tokenize
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+TYPO_WEIGHT = 0.5
+MAX_EXPANSIONS = 50
+
+def invoice_tokens(invoice) -> Set[str]:
+    """Return the search tokens for an invoice."""
+    customer = invoice.ship_order.order.customer
+    stock = invoice.stock
+    email = customer.email.strip().casefold()
+    tokens = set(tokenize(customer.name))
+    tokens.update(tokenize(email.split("@", 1)[0]))
+    tokens.add(email)
+    tokens.update(tokenize(stock.book_name))
+    tokens.update(tokenize(stock.author))
+    nbr = invoice.invoice_nbr.casefold()
+    tokens.add(nbr)
+    digits = nbr.lstrip("abcdefghijklmnopqrstuvwxyz").lstrip("0")
+    if digits:
+        tokens.add(digits)
+    return tokens
+
+def query_words(query: str) -> List[str]:
+    """Split a query into words, keeping email addresses whole."""
+    words = []
+    for chunk in query.split():
+        if "@" in chunk:
+            words.append(chunk.casefold())
+        else:
+            words.extend(tokenize(chunk))
+    return list(dict.fromkeys(words))
+
+def deletions(term: str) -> Set[str]:
+    """Return every string one character deletion away from term."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Check whether two strings differ by at most one edit or transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        # Substitution, or two adjacent characters swapped
+        return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+    return a[i:] == b[i + 1:]
+
+class SearchResults(Sequence):
+    """Ranked invoice hits, sorted lazily a page at a time.
+
+    Indexing past the ranked prefix extends it with a partial heap selection,
+    so showing the first page of a large result set never sorts all of it.
+    """
+    def __init__(self, index: "InvoiceSearchIndex", scores: Dict[int, float]):
+        self._index = index
+        self._scores = scores
+        self._ranked: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            start, stop, step = position.indices(len(self))
+            self._ensure(stop)
+            return [self._index.invoice_at(doc) for doc in self._ranked[start:stop:step]]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        self._ensure(position + 1)
+        return self._index.invoice_at(self._ranked[position])
+
+    def page(self, offset: int = 0, limit: int = 50) -> list:
+        """Return one page of invoices in rank order."""
+        return self[offset:offset + limit]
+
+    def score_of(self, position: int) -> float:
+        """Return the score of the hit at a rank position."""
+        self._ensure(position + 1)
+        return self._scores[self._ranked[position]]
+
+    def _ensure(self, count: int) -> None:
+        if count <= len(self._ranked):
+            return
+        wanted = max(count, 2 * len(self._ranked), 100)
+        # Higher scores first, then the most recent invoices; feeding the newest
+        # documents first keeps the heap from churning on tied scores
+        pairs = zip(reversed(self._scores.values()), reversed(self._scores.keys()))
+        if wanted * 4 >= len(self._scores):
+            ranked = sorted(pairs, reverse=True)
+        else:
+            ranked = heapq.nlargest(wanted, pairs)
+        self._ranked = [doc for _, doc in ranked]
+
+class InvoiceSearchIndex:
+    """Inverted index over invoice tokens with typo-tolerant ranked matching.
+
+    Each token maps to an array of document ids in insertion order. Query words
+    match indexed tokens exactly, by prefix, or within one typo; documents must
+    match every query word and are scored by match quality weighted by the
+    rarity of the matched token.
+    """
+    def __init__(self):
+        self._invoices: List[object] = []
+        self._ship_days = array("i")
+        self._postings: Dict[str, array] = {}
+        self._deletions: Dict[str, List[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._day_order = array("I")
+        self._day_keys = array("i")
+        self._days_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._invoices)
+
+    def invoice_at(self, doc: int):
+        """Return the invoice with a document id."""
+        return self._invoices[doc]
+
+    def add(self, invoice) -> None:
+        """Index one invoice."""
+        doc = len(self._invoices)
+        self._invoices.append(invoice)
+        day = date_key(invoice.ship_order.ship_date).toordinal()
+        self._ship_days.append(day)
+        if not self._days_dirty:
+            # Invoices usually arrive in ship-date order and extend the day index in place
+            if not self._day_keys or day >= self._day_keys[-1]:
+                self._day_order.append(doc)
+                self._day_keys.append(day)
+            else:
+                self._days_dirty = True
+        postings = self._postings
+        for token in invoice_tokens(invoice):
+            posting = postings.get(token)
+            if posting is None:
+                posting = postings[token] = array("I")
+                self._add_term(token)
+            posting.append(doc)
+
+    def add_many(self, invoices: Iterable) -> None:
+        """Index many invoices."""
+        for invoice in invoices:
+            self.add(invoice)
+
+    def _add_term(self, term: str) -> None:
+        self._vocabulary_dirty = True
+        if len(term) >= 4:
+            for variant in deletions(term):
+                self._deletions.setdefault(variant, []).append(term)
+
+    def expand(self, word: str) -> List[Tuple[str, float]]:
+        """Return the indexed tokens a query word matches, with their weights."""
+        matches: Dict[str, float] = {}
+        if word in self._postings:
+            matches[word] = EXACT_WEIGHT
+        if len(word) >= 2:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+            vocabulary = self._vocabulary
+            position = bisect_left(vocabulary, word)
+            while (position < len(vocabulary) and vocabulary[position].startswith(word)
+                   and len(matches) < MAX_EXPANSIONS):
+                matches.setdefault(vocabulary[position], PREFIX_WEIGHT)
+                position += 1
+        if len(word) >= 4:
+            candidates = set(self._deletions.get(word, ()))
+            for variant in deletions(word):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletions.get(variant, ()))
+            for term in candidates:
+                if term not in matches and within_one_edit(word, term):
+                    matches[term] = TYPO_WEIGHT
+        return list(matches.items())
+
+    def _docs_between(self, low: int, high: int) -> array:
+        """Return the ids of documents shipped between two day ordinals."""
+        if self._days_dirty:
+            order = sorted(range(len(self._ship_days)), key=self._ship_days.__getitem__)
+            self._day_order = array("I", order)
+            self._day_keys = array("i", (self._ship_days[doc] for doc in order))
+            self._days_dirty = False
+        start = bisect_left(self._day_keys, low)
+        stop = bisect_left(self._day_keys, high + 1)
+        return self._day_order[start:stop]
+
+    def _intersect(self, candidates: Optional[Set[int]], posting: array) -> Set[int]:
+        """Return the candidates in a posting, or the whole posting when there are none yet."""
+        if candidates is None:
+            return set(posting)
+        if len(candidates) * 16 < len(posting):
+            # Few candidates against a long posting: probe by binary search
+            size = len(posting)
+            hits = set()
+            for doc in candidates:
+                position = bisect_left(posting, doc)
+                if position < size and posting[position] == doc:
+                    hits.add(doc)
+            return hits
+        return candidates.intersection(posting)
+
+    def search(self, query: str, start_date: Optional[Union[date, datetime]] = None,
+               end_date: Optional[Union[date, datetime]] = None) -> SearchResults:
+        """Return invoices matching every query word, ranked by relevance.
+
+        start_date and end_date bound the ship date, both inclusive.
+        """
+        words = query_words(query)
+        if not words:
+            return SearchResults(self, {})
+        total = len(self._invoices)
+
+        # Expand each word to weighted postings, with match quality scaled by rarity
+        expanded = []
+        for word in words:
+            matches = [(self._postings[term], weight * math.log(1 + total / len(self._postings[term])))
+                       for term, weight in self.expand(word)]
+            if not matches:
+                return SearchResults(self, {})
+            expanded.append((sum(len(posting) for posting, _ in matches), matches))
+        expanded.sort(key=lambda item: item[0])
+
+        # A date range narrower than the rarest word is the first candidate set
+        candidates: Optional[Set[int]] = None
+        days: Optional[Tuple[int, int]] = None
+        if start_date or end_date:
+            low = date_key(start_date).toordinal() if start_date else date.min.toordinal()
+            high = date_key(end_date).toordinal() if end_date else date.max.toordinal()
+            in_range = self._docs_between(low, high)
+            if len(in_range) < expanded[0][0]:
+                candidates = set(in_range)
+            else:
+                days = (low, high)
+
+        # Documents must match every word; start from the rarest and narrow the
+        # candidates down as sets, scoring only the documents left at the end
+        base = 0.0
+        best_weights: List[Dict[int, float]] = []
+        for _, matches in expanded:
+            if len(matches) == 1:
+                posting, weight = matches[0]
+                matched = self._intersect(candidates, posting)
+                base += weight
+            else:
+                best: Dict[int, float] = {}
+                # Apply postings in ascending weight so each document keeps its best match
+                for posting, weight in sorted(matches, key=lambda match: match[1]):
+                    hits = posting if candidates is None else self._intersect(candidates, posting)
+                    best.update(dict.fromkeys(hits, weight))
+                if len(expanded) == 1 and days is None:
+                    # A single word is scored by its matches alone
+                    return SearchResults(self, best)
+                matched = set(best)
+                best_weights.append(best)
+            if days is not None:
+                low, high = days
+                ship_days = self._ship_days
+                matched = {doc for doc in matched if low <= ship_days[doc] <= high}
+                days = None
+            candidates = matched
+            if not candidates:
+                return SearchResults(self, {})
+        scores = dict.fromkeys(candidates, base)
+        for best in best_weights:
+            for doc in scores:
+                scores[doc] += best[doc]
+        return SearchResults(self, scores)
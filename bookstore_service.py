@@ -0,0 +1,593 @@
+"""
+Book Ordering System - Order Intake Service
+This module serves order placement, invoice lookup and catalogue queries over HTTP/JSON.
+
+The server is plain asyncio with a minimal HTTP/1.1 parser (keep-alive,
+Content-Length bodies), so it needs nothing outside the standard library.
+
+Orders from all connections go onto one bounded queue. A single batcher task
+drains it and places everything queued so far with one BookStore.create_invoices
+call on a worker thread, so a burst of orders shares one invoice number
+reservation, one lock acquisition and one journal fsync or SQLite
+transaction. When the queue is full, new orders are refused at once with
+503 and a Retry-After header instead of piling up latency.
+
+Endpoints:
+    GET  /health                         queue depth
+    GET  /stats                          sales totals and service counters
+    GET  /books?q=python&limit=20        catalogue search
+    POST /books                          {"book_name", "author", "price"} or a list of them
+    GET  /customers?q=smith&limit=20     customer search
+    POST /customers                      {"name", "phone", "email"} or a list of them
+    POST /orders                         {"customer_email", "book_name", "urgent"}, optionally
+                                         with "author" to pick between books sharing a title,
+                                         and "destination" and "promo" when pricing rules
+                                         are loaded, or {"orders": [...]} for a batch;
+                                         out-of-stock orders get 409, or are listed
+                                         under "failed" in a batch response; an order
+                                         with an "idempotency_key" already used gets
+                                         its original invoice back (200 when single)
+    GET  /inventory/low?limit=50         titles at or below their reorder level
+    GET  /invoices/INV0000000001         invoice by number
+    GET  /invoices?q=smith&from=2024-01-01&to=2024-01-31&limit=50
+                                         free-text invoice search
+
+Usage:
+    python -m bookstore_service --port 8080 --db bookstore.db --pricing pricing.json --inventory stock.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bookstore_core_inher import Customer, Stock, BookStore
+from bookstore_idempotency import DEFAULT_CAPACITY, DEFAULT_TTL, IdempotencyCache, validate_key
+from bookstore_inventory import OutOfStock
+from bookstore_lookup import ItemLookup
+from bookstore_records import invoice_to_record, record_to_dict
+from bookstore_registry import CatalogueRegistry, CustomerRegistry, MergeSummary
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_ORDERS = 1000
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+class ServiceError(Exception):
+    """A request failure reported to the client with an HTTP status."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _customer_json(customer: Customer) -> Dict[str, str]:
+    return {"name": customer.name, "phone": customer.phone, "email": customer.email}
+
+def _book_json(stock: Stock) -> Dict[str, object]:
+    return {"book_name": stock.book_name, "author": stock.author, "price": stock.price}
+
+def _field(data: dict, name: str, kind=str):
+    value = data.get(name) if isinstance(data, dict) else None
+    if kind is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, kind) or (kind is str and not value.strip()):
+        raise ServiceError(400, f"Field {name!r} must be a non-empty {kind.__name__}"
+                           if kind is str else f"Field {name!r} must be a {kind.__name__}")
+    return value
+
+def _items(payload, key: str) -> Tuple[list, bool]:
+    """Return the objects in a request body and whether it was a list."""
+    if isinstance(payload, list):
+        return payload, True
+    if isinstance(payload, dict) and isinstance(payload.get(key), list):
+        return payload[key], True
+    return [payload], False
+
+class OrderService:
+    """HTTP/JSON front end for a BookStore.
+
+    Customers are deduplicated by email and phone, and books by title and
+    author (see bookstore_registry); an order naming only a title gets the
+    first book registered under it. The registries and the BookStore may also
+    be used directly while the service runs.
+    """
+    def __init__(self, bookstore: BookStore, max_pending: int = 1024, batch_size: int = 256,
+                 batch_delay: float = 0.001):
+        self.bookstore = bookstore
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.customers = CustomerRegistry()
+        self.books = CatalogueRegistry()
+        self.customer_lookup = ItemLookup(lambda c: f"{c.name} <{c.email}>", lambda c: (c.name, c.email))
+        self.book_lookup = ItemLookup(lambda s: f"{s.book_name} by {s.author}", lambda s: (s.book_name, s.author))
+        self.counters = {"requests": 0, "orders": 0, "batches": 0, "rejected": 0, "out_of_stock": 0,
+                         "replayed": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Orders taken off the queue by the batcher and not yet answered
+        self._batch: List = []
+        # Clear while a batch is being placed on the worker thread
+        self._idle: Optional[asyncio.Event] = None
+
+    def add_customers(self, customers: List[Customer]) -> MergeSummary:
+        """Register customers, merging duplicates; return what was added and updated."""
+        summary = self.customers.merge(customers)
+        self.customer_lookup.add_many(summary.added)
+        return summary
+
+    def add_books(self, stocks: List[Stock]) -> MergeSummary:
+        """Register books, merging duplicates; return what was added and updated."""
+        summary = self.books.merge(stocks)
+        self.book_lookup.add_many(summary.added)
+        return summary
+
+    def load(self) -> None:
+        """Register the customers and books already known to the BookStore."""
+        storage = self.bookstore.storage
+        if storage is not None:
+            self.add_customers(list(storage.customers.iter_all()))
+            self.add_books(list(storage.catalogue.iter_all()))
+            return
+        invoices = self.bookstore.snapshot_invoices()
+        self.add_customers([invoice.ship_order.order.customer for invoice in invoices])
+        self.add_books([invoice.stock for invoice in invoices])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Start the batcher and listen for connections."""
+        self._queue = asyncio.Queue(self.max_pending)
+        self._stopping = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._batcher = asyncio.create_task(self._run_batches())
+        return await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+    async def stop(self) -> None:
+        """Stop taking orders and stop the batcher.
+
+        A batch already being placed is finished and its invoices returned to
+        their callers first; orders still queued are failed.
+        """
+        self._stopping = True
+        if self._batcher is not None:
+            # Cancelling now would abandon invoices the worker thread is creating
+            await self._idle.wait()
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        pending = list(self._batch)
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._batch = []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(ServiceError(503, "Service stopping"))
+
+    async def place_orders(self, orders: List[tuple], keys: Optional[List[Optional[str]]] = None) -> List:
+        """Queue resolved orders for the batcher and wait for their invoices.
+
+        Orders are tuples as taken by BookStore.create_invoices, with an
+        optional idempotency key each. An order whose book is out of stock
+        comes back as its OutOfStock exception in place of an invoice; any
+        other failure is raised.
+
+        Raises ServiceError(503) without queuing anything if the orders would
+        not all fit in the queue.
+        """
+        if self._stopping:
+            raise ServiceError(503, "Service stopping")
+        if self._queue.qsize() + len(orders) > self.max_pending:
+            self.counters["rejected"] += len(orders)
+            raise ServiceError(503, "Too many pending orders; retry shortly")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for order, key in zip(orders, keys or [None] * len(orders)):
+            future = loop.create_future()
+            self._queue.put_nowait(((order, key), future))
+            futures.append(future)
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, OutOfStock):
+                raise result
+        return results
+
+    async def _run_batches(self) -> None:
+        queue = self._queue
+        while not self._stopping:
+            self._batch = batch = [await queue.get()]
+            if queue.empty() and self.batch_delay:
+                # Give concurrent requests a moment to join this batch
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            self._idle.clear()
+            try:
+                results = await asyncio.to_thread(self._place_batch, [order for (order, _), _ in batch],
+                                                  [key for (_, key), _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            finally:
+                self._batch = []
+                self._idle.set()
+            self.counters["batches"] += 1
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, OutOfStock):
+                    self.counters["out_of_stock"] += 1
+                    if not future.done():
+                        future.set_exception(result)
+                    continue
+                self.counters["orders"] += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def _place_batch(self, orders: List[tuple], keys: List[Optional[str]]) -> List:
+        """Place a batch on a worker thread; out-of-stock orders get their OutOfStock instead of an invoice."""
+        bookstore = self.bookstore
+        if not any(keys):
+            keys = None
+        if bookstore.inventory is None:
+            return bookstore.create_invoices(orders, idempotency_keys=keys)
+        # Keys that already created an invoice get it back without reserving a
+        # copy, which could otherwise fail a retry of an order that succeeded
+        known = {}
+        if keys:
+            known = bookstore.idempotency.lookup_many({key for key in keys if key}, bookstore.search_invoice)
+        # Reserve order by order, so a title running out only fails its own orders
+        reservation = bookstore.inventory.reservation()
+        results: List = [None] * len(orders)
+        placeable, placeable_keys, positions = [], [], []
+        # Key -> position of its first placeable order, for keys repeated within the batch
+        placing: Dict[str, int] = {}
+        repeats: List[Tuple[int, int]] = []
+        for position, order in enumerate(orders):
+            key = keys[position] if keys else None
+            if key in known:
+                results[position] = known[key]
+                continue
+            if key in placing:
+                repeats.append((position, placing[key]))
+                continue
+            try:
+                reservation.add(order[1])
+            except OutOfStock as exc:
+                results[position] = exc
+                continue
+            if key is not None:
+                placing[key] = position
+            placeable.append(order)
+            placeable_keys.append(key)
+            positions.append(position)
+        if placeable:
+            invoices = bookstore.create_invoices(placeable, reservation=reservation,
+                                                 idempotency_keys=placeable_keys if keys else None)
+            for position, invoice in zip(positions, invoices):
+                results[position] = invoice
+            for position, first in repeats:
+                results[position] = results[first]
+        return results
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {"error": "Request headers too large"}, False)
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+                method, target, version = parts
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self._respond(writer, 413 if length > 0 else 400, {"error": "Bad request body length"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                self.counters["requests"] += 1
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except ServiceError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                except Exception as exc:
+                    status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        headers = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+                   "Content-Type: application/json",
+                   f"Content-Length: {len(body)}",
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        payload = None
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise ServiceError(400, "Request body is not valid JSON") from None
+
+        routes = {
+            ("GET", "/health"): self._health,
+            ("GET", "/stats"): self._stats,
+            ("GET", "/books"): self._search_books,
+            ("POST", "/books"): self._add_books,
+            ("GET", "/customers"): self._search_customers,
+            ("POST", "/customers"): self._add_customers,
+            ("POST", "/orders"): self._place,
+            ("GET", "/invoices"): self._search_invoices,
+            ("GET", "/inventory/low"): self._low_stock,
+        }
+        handler = routes.get((method, path))
+        if handler is not None:
+            return await handler(query, payload)
+        if path.startswith("/invoices/"):
+            if method != "GET":
+                raise ServiceError(405, f"{method} not allowed on {path}")
+            return await self._get_invoice(unquote(path[len("/invoices/"):]))
+        if any(route_path == path for _, route_path in routes):
+            raise ServiceError(405, f"{method} not allowed on {path}")
+        raise ServiceError(404, f"No such endpoint: {path}")
+
+    @staticmethod
+    def _limit(query: Dict[str, str], default: int = 20, maximum: int = 500) -> int:
+        try:
+            return max(1, min(int(query.get("limit", default)), maximum))
+        except ValueError:
+            raise ServiceError(400, "limit must be an integer") from None
+
+    async def _health(self, query, payload):
+        return 200, {"status": "ok", "pending_orders": self._queue.qsize()}
+
+    async def _stats(self, query, payload):
+        stats = await asyncio.to_thread(self.bookstore.get_stats)
+        return 200, {**stats, **self.counters, "pending_orders": self._queue.qsize()}
+
+    async def _low_stock(self, query, payload):
+        inventory = self.bookstore.inventory
+        if inventory is None:
+            raise ServiceError(404, "No inventory is tracked")
+        return 200, {"books": [{"book_name": book_name, "author": author, "available": available}
+                               for book_name, author, available in inventory.low_stock(self._limit(query, 50))]}
+
+    async def _search_books(self, query, payload):
+        labels = self.book_lookup.search(query.get("q", ""), self._limit(query))
+        return 200, {"books": [_book_json(self.books.current(self.book_lookup.get(label))) for label in labels]}
+
+    async def _search_customers(self, query, payload):
+        labels = self.customer_lookup.search(query.get("q", ""), self._limit(query))
+        return 200, {"customers": [_customer_json(self.customers.current(self.customer_lookup.get(label)))
+                                   for label in labels]}
+
+    async def _add_books(self, query, payload):
+        items, _ = _items(payload, "books")
+        stocks = [Stock(_field(item, "book_name").strip(), _field(item, "author").strip(),
+                        _field(item, "price", float)) for item in items]
+        summary = self.add_books(stocks)
+        changed = summary.added + summary.updated
+        if changed and self.bookstore.storage is not None:
+            await asyncio.to_thread(self.bookstore.storage.catalogue.add_many, changed)
+        return 201, {"added": len(summary.added), "updated": len(summary.updated), "skipped": summary.duplicates}
+
+    async def _add_customers(self, query, payload):
+        items, _ = _items(payload, "customers")
+        customers = [Customer(_field(item, "name").strip(), _field(item, "phone").strip(),
+                              _field(item, "email").strip()) for item in items]
+        summary = self.add_customers(customers)
+        changed = summary.added + summary.updated
+        if changed and self.bookstore.storage is not None:
+            await asyncio.to_thread(self.bookstore.storage.customers.add_many, changed)
+        return 201, {"added": len(summary.added), "updated": len(summary.updated), "skipped": summary.duplicates}
+
+    async def _place(self, query, payload):
+        items, is_batch = _items(payload, "orders")
+        if not items or len(items) > MAX_BATCH_ORDERS:
+            raise ServiceError(400, f"Send between 1 and {MAX_BATCH_ORDERS} orders per request")
+        item_keys: List[Optional[str]] = []
+        for position, item in enumerate(items):
+            key = item.get("idempotency_key") if isinstance(item, dict) else None
+            if key is not None:
+                try:
+                    key = validate_key(key)
+                except ValueError as exc:
+                    raise ServiceError(400, f"Order {position}: {exc}") from None
+            item_keys.append(key)
+        # Retries already known skip the queue altogether
+        known = await self._known_keys({key for key in item_keys if key is not None})
+        orders, keys = [], []
+        replayed: Dict[int, object] = {}
+        for position, (item, key) in enumerate(zip(items, item_keys)):
+            if key in known:
+                replayed[position] = known[key]
+                continue
+            keys.append(key)
+            customer = self.customers.get(_field(item, "customer_email"))
+            stock = self._find_book(item, position)
+            if customer is None or stock is None:
+                what = "customer" if customer is None else "book"
+                raise ServiceError(404, f"Order {position}: unknown {what}")
+            urgent = item.get("urgent", False)
+            if not isinstance(urgent, bool):
+                raise ServiceError(400, f"Order {position}: 'urgent' must be true or false")
+            destination, promo = item.get("destination"), item.get("promo")
+            if destination is None and promo is None:
+                orders.append((customer, stock, urgent))
+                continue
+            pricing = self.bookstore.pricing
+            if pricing is None:
+                raise ServiceError(400, f"Order {position}: destinations and promo codes need pricing rules")
+            if not isinstance(destination, (str, type(None))) or not isinstance(promo, (str, type(None))):
+                raise ServiceError(400, f"Order {position}: 'destination' and 'promo' must be strings")
+            try:
+                # Rejected here rather than in the batcher, where one bad order
+                # would fail every other order batched with it
+                pricing.quote(stock, urgent, destination, promo)
+            except ValueError as exc:
+                raise ServiceError(400, f"Order {position}: {exc}") from None
+            orders.append((customer, stock, urgent, destination, promo))
+        placed = await self.place_orders(orders, keys) if orders else []
+        if replayed:
+            self.counters["replayed"] += len(replayed)
+            placed = iter(placed)
+            placed = [replayed[position] if position in replayed else next(placed) for position in range(len(items))]
+            if not is_batch:
+                return 200, {"invoice": record_to_dict(invoice_to_record(placed[0]))}
+        if not is_batch:
+            if isinstance(placed[0], OutOfStock):
+                raise ServiceError(409, str(placed[0]))
+            return 201, {"invoice": record_to_dict(invoice_to_record(placed[0]))}
+        invoices = [record_to_dict(invoice_to_record(result)) for result in placed
+                    if not isinstance(result, OutOfStock)]
+        failed = [{"position": position, "error": str(result)} for position, result in enumerate(placed)
+                  if isinstance(result, OutOfStock)]
+        return (201 if invoices else 409), {"invoices": invoices, "failed": failed}
+
+    async def _known_keys(self, keys: set) -> Dict[str, object]:
+        """Return key -> invoice for the keys that already created one."""
+        idempotency = self.bookstore.idempotency
+        if not keys:
+            return {}
+        if idempotency.index is None:
+            return idempotency.lookup_many(keys, self.bookstore.search_invoice)
+        # Cache misses query the persistent index, so keep them off the event loop
+        return await asyncio.to_thread(idempotency.lookup_many, keys, self.bookstore.search_invoice)
+
+    def _find_book(self, item: dict, position: int) -> Optional[Stock]:
+        book_name, author = _field(item, "book_name"), item.get("author")
+        if author is not None:
+            if not isinstance(author, str):
+                raise ServiceError(400, f"Order {position}: 'author' must be a string")
+            return self.books.get(book_name, author)
+        matches = self.books.find_by_title(book_name)
+        return matches[0] if matches else None
+
+    async def _get_invoice(self, invoice_nbr: str):
+        invoice = await asyncio.to_thread(self.bookstore.search_invoice, invoice_nbr)
+        if invoice is None:
+            raise ServiceError(404, f"Invoice {invoice_nbr} not found")
+        return 200, {"invoice": record_to_dict(invoice_to_record(invoice))}
+
+    async def _search_invoices(self, query, payload):
+        text = query.get("q", "")
+        if not text.strip():
+            raise ServiceError(400, "Query parameter 'q' is required")
+        try:
+            dates = [datetime.strptime(query[name], "%Y-%m-%d").date() if query.get(name) else None
+                     for name in ("from", "to")]
+        except ValueError:
+            raise ServiceError(400, "Dates must be in YYYY-MM-DD format") from None
+        limit = self._limit(query, 50)
+        results = await asyncio.to_thread(self.bookstore.search_invoices, text, *dates)
+        page = await asyncio.to_thread(results.page, 0, limit)
+        return 200, {"total": len(results),
+                     "invoices": [record_to_dict(invoice_to_record(invoice)) for invoice in page]}
+
+async def serve(service: OrderService, host: str, port: int) -> None:
+    """Run the service until cancelled."""
+    server = await service.start(host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving on {addresses}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for the order-intake service."""
+    from bookstore_inventory import Inventory, load_inventory, save_inventory
+    from bookstore_journal import OrderJournal
+    from bookstore_pricing import PricingEngine, load_rules
+    from bookstore_storage import SQLiteStorage
+
+    parser = argparse.ArgumentParser(prog="python -m bookstore_service", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default=os.environ.get("BOOKSTORE_DB"),
+                        help="SQLite database file (default: $BOOKSTORE_DB)")
+    parser.add_argument("--journal", default=os.environ.get("BOOKSTORE_JOURNAL"),
+                        help="order journal directory when no database is used (default: $BOOKSTORE_JOURNAL)")
+    parser.add_argument("--pricing", default=os.environ.get("BOOKSTORE_PRICING"),
+                        help="JSON pricing rules file (default: $BOOKSTORE_PRICING; flat shipping rates)")
+    parser.add_argument("--inventory", default=os.environ.get("BOOKSTORE_INVENTORY"),
+                        help="JSON stock levels file, saved back on exit (default: $BOOKSTORE_INVENTORY; "
+                             "stock not tracked)")
+    parser.add_argument("--idempotency-cache", type=int, default=DEFAULT_CAPACITY,
+                        help="idempotency keys kept in memory (default: %(default)s)")
+    parser.add_argument("--idempotency-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds a key stays in memory; older keys are looked up in the database, "
+                             "or in idempotency.db in the journal directory (default: %(default)s)")
+    parser.add_argument("--max-pending", type=int, default=1024, help="queued orders before refusing with 503")
+    parser.add_argument("--batch-size", type=int, default=256, help="most orders placed per batch")
+    args = parser.parse_args(argv)
+
+    storage = SQLiteStorage(args.db) if args.db else None
+    journal = OrderJournal(args.journal) if args.journal and not args.db else None
+    pricing = PricingEngine(load_rules(args.pricing)) if args.pricing else None
+    inventory = None
+    if args.inventory:
+        # A file that does not exist yet starts empty and is created on exit
+        inventory = load_inventory(args.inventory) if os.path.exists(args.inventory) else Inventory()
+    key_storage = SQLiteStorage(os.path.join(args.journal, "idempotency.db")) if journal is not None else None
+    idempotency = IdempotencyCache(args.idempotency_cache, args.idempotency_ttl,
+                                   index=key_storage.idempotency if key_storage is not None else None)
+    bookstore = BookStore(storage, journal=journal, pricing=pricing, inventory=inventory, idempotency=idempotency)
+    service = OrderService(bookstore, args.max_pending, args.batch_size)
+    service.load()
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if inventory is not None:
+            save_inventory(inventory, args.inventory)
+        if journal is not None:
+            journal.close()
+            key_storage.close()
+        if storage is not None:
+            storage.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,510 @@
+"""
+Book Ordering System - SQLite Storage
+This module contains the SQLite-backed repositories for customers, stock and invoices.
+
+Invoice rows also store their customer email, book name and author
+normalized with bookstore_index.normalize_key, and the find_by_* lookups
+match on those indexed columns, so they are case-insensitive exactly like
+the in-memory InvoiceIndex. Databases created before the columns existed
+gain and fill them when first opened.
+"""
+
+import sqlite3
+import threading
+from array import array
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from bookstore_aggregates import RunningAggregates
+from bookstore_core_inher import Customer, Stock, Order, Shipping, Invoice
+from bookstore_index import normalize_key
+from bookstore_records import INVOICE_FIELDS, invoice_from_record, invoice_to_record
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_customers_email ON customers (email);
+
+CREATE TABLE IF NOT EXISTS stock (
+    id INTEGER PRIMARY KEY,
+    book_name TEXT NOT NULL,
+    author TEXT NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stock_book_name ON stock (book_name);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    invoice_nbr TEXT NOT NULL UNIQUE,
+    customer_name TEXT NOT NULL,
+    customer_phone TEXT NOT NULL,
+    customer_email TEXT NOT NULL,
+    book_name TEXT NOT NULL,
+    author TEXT NOT NULL,
+    price REAL NOT NULL,
+    ship_date TEXT NOT NULL,
+    ship_cost REAL NOT NULL,
+    urgent INTEGER NOT NULL,
+    total_cost REAL NOT NULL,
+    customer_email_key TEXT NOT NULL DEFAULT '',
+    book_name_key TEXT NOT NULL DEFAULT '',
+    author_key TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_ship_date ON invoices (ship_date);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    invoice_nbr TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys (created_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Created once the key columns are known to exist (see _add_search_keys)
+SEARCH_KEY_INDEXES = """
+DROP INDEX IF EXISTS idx_invoices_customer_email;
+DROP INDEX IF EXISTS idx_invoices_book_name;
+CREATE INDEX IF NOT EXISTS idx_invoices_customer_email_key ON invoices (customer_email_key);
+CREATE INDEX IF NOT EXISTS idx_invoices_book_name_key ON invoices (book_name_key);
+CREATE INDEX IF NOT EXISTS idx_invoices_author_key ON invoices (author_key);
+"""
+
+INVOICE_COLUMNS = ", ".join(INVOICE_FIELDS)
+# (key column, column it normalizes), in insert order after INVOICE_FIELDS
+SEARCH_KEYS = (("customer_email_key", "customer_email"), ("book_name_key", "book_name"), ("author_key", "author"))
+
+def _add_search_keys(conn: sqlite3.Connection) -> None:
+    """Add and fill the normalized key columns in a database created without them."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(invoices)")}
+    missing = [(key, column) for key, column in SEARCH_KEYS if key not in columns]
+    if missing:
+        conn.create_function("normalize_key", 1, normalize_key, deterministic=True)
+        with conn:
+            for key, _column in missing:
+                conn.execute(f"ALTER TABLE invoices ADD COLUMN {key} TEXT NOT NULL DEFAULT ''")
+            conn.execute("UPDATE invoices SET " + ", ".join(f"{key} = normalize_key({column})"
+                                                           for key, column in missing))
+    conn.executescript(SEARCH_KEY_INDEXES)
+
+def _insert_row(invoice: Invoice) -> tuple:
+    """Return an invoice's record followed by its SEARCH_KEYS values."""
+    record = invoice_to_record(invoice)
+    return record + (normalize_key(record[3]), normalize_key(record[4]), normalize_key(record[5]))
+
+class SQLiteStorage:
+    """SQLite database holding the customer, catalogue and invoice repositories.
+
+    The database file is opened on first use, so constructing a storage object
+    is free. The connection runs in WAL mode and may be shared between threads;
+    all statements are serialized through a single lock.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self.lock = threading.RLock()
+        self.customers = CustomerRepository(self)
+        self.catalogue = CatalogueRepository(self)
+        self.invoices = InvoiceRepository(self)
+        self.idempotency = IdempotencyRepository(self)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection, opening it on first access."""
+        if self._conn is None:
+            with self.lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(SCHEMA)
+                    _add_search_keys(conn)
+                    self._conn = conn
+        return self._conn
+
+    @property
+    def is_open(self) -> bool:
+        """Check whether the database has been opened."""
+        return self._conn is not None
+
+    def execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a single statement and return all result rows."""
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def execute_many(self, sql: str, rows: Iterable[tuple]) -> int:
+        """Run a statement for each row inside one transaction."""
+        with self.lock:
+            conn = self.connection
+            with conn:
+                cursor = conn.executemany(sql, rows)
+            return cursor.rowcount
+
+    def stream(self, sql: str, params: tuple = (), batch_size: int = 1000) -> Iterator[tuple]:
+        """Yield result rows in batches without loading the whole result set."""
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a stored metadata value, if any."""
+        rows = self.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store a metadata value."""
+        self.execute_many("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [(key, value)])
+
+    def load_high_water(self) -> int:
+        """Return the invoice number high-water mark."""
+        return int(self.get_meta("invoice_high_water") or 0)
+
+    def save_high_water(self, value: int) -> None:
+        """Save the invoice number high-water mark."""
+        self.set_meta("invoice_high_water", str(value))
+
+    def close(self) -> None:
+        """Close the database connection if it is open."""
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class CustomerRepository:
+    """Repository for persisted customers."""
+    INSERT = "INSERT INTO customers (name, phone, email) VALUES (?, ?, ?)"
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def add(self, customer: Customer) -> None:
+        """Persist a single customer."""
+        self.add_many([customer])
+
+    def add_many(self, customers: Iterable[Customer]) -> int:
+        """Persist customers in one transaction."""
+        return self._storage.execute_many(
+            self.INSERT, ((c.name, c.phone, c.email) for c in customers))
+
+    def find_by_email(self, email: str) -> List[Customer]:
+        """Return customers registered under an email."""
+        rows = self._storage.execute(
+            "SELECT name, phone, email FROM customers WHERE email = ? ORDER BY id", (email,))
+        return [Customer(*row) for row in rows]
+
+    def iter_all(self) -> Iterator[Customer]:
+        """Yield all customers in insertion order."""
+        for row in self._storage.stream("SELECT name, phone, email FROM customers ORDER BY id"):
+            yield Customer(*row)
+
+    def count(self) -> int:
+        """Return the number of persisted customers."""
+        return self._storage.execute("SELECT COUNT(*) FROM customers")[0][0]
+
+class CatalogueRepository:
+    """Repository for persisted book stock."""
+    INSERT = "INSERT INTO stock (book_name, author, price) VALUES (?, ?, ?)"
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def add(self, stock: Stock) -> None:
+        """Persist a single book."""
+        self.add_many([stock])
+
+    def add_many(self, stocks: Iterable[Stock]) -> int:
+        """Persist books in one transaction."""
+        return self._storage.execute_many(
+            self.INSERT, ((s.book_name, s.author, s.price) for s in stocks))
+
+    def find_by_name(self, book_name: str) -> List[Stock]:
+        """Return books with the given name."""
+        rows = self._storage.execute(
+            "SELECT book_name, author, price FROM stock WHERE book_name = ? ORDER BY id", (book_name,))
+        return [Stock(*row) for row in rows]
+
+    def iter_all(self) -> Iterator[Stock]:
+        """Yield all books in insertion order."""
+        for row in self._storage.stream("SELECT book_name, author, price FROM stock ORDER BY id"):
+            yield Stock(*row)
+
+    def count(self) -> int:
+        """Return the number of persisted books."""
+        return self._storage.execute("SELECT COUNT(*) FROM stock")[0][0]
+
+class InvoiceRepository:
+    """Repository for persisted invoices.
+
+    Invoices are stored denormalized, so each row keeps the customer and book
+    details as they were when the order was placed.
+    """
+    INSERT = (f"INSERT INTO invoices ({INVOICE_COLUMNS}, {', '.join(key for key, _ in SEARCH_KEYS)}) "
+              f"VALUES ({', '.join('?' * (len(INVOICE_FIELDS) + len(SEARCH_KEYS)))})")
+    SELECT = f"SELECT {INVOICE_COLUMNS} FROM invoices"
+    # ORDER BY expression per sortable field; text sorts ignore case
+    SORT_EXPRESSIONS = {
+        "invoice_nbr": "invoice_nbr",
+        "customer_name": "customer_name COLLATE NOCASE",
+        "book_name": "book_name_key",
+        "total_cost": "total_cost",
+    }
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def add(self, invoice: Invoice) -> None:
+        """Persist a single invoice."""
+        self.add_many([invoice])
+
+    def add_many(self, invoices: Iterable[Invoice],
+                 idempotency_keys: Iterable[Tuple[str, str, float]] = ()) -> int:
+        """Persist invoices in one transaction, rejecting duplicate numbers.
+
+        (key, invoice number, created at) rows given as idempotency_keys are
+        recorded in the same transaction, so an invoice is never stored
+        without the key that would stop a retry placing it again.
+        """
+        storage = self._storage
+        try:
+            with storage.lock:
+                conn = storage.connection
+                with conn:
+                    cursor = conn.executemany(self.INSERT, map(_insert_row, invoices))
+                    conn.executemany(IdempotencyRepository.INSERT, idempotency_keys)
+                return cursor.rowcount
+        except sqlite3.IntegrityError as exc:
+            raise ValueError(f"Duplicate invoice number: {exc}") from exc
+
+    def get(self, invoice_nbr: str) -> Optional[Invoice]:
+        """Return the invoice with the given number, if any."""
+        rows = self._storage.execute(f"{self.SELECT} WHERE invoice_nbr = ?", (invoice_nbr,))
+        return invoice_from_record(rows[0]) if rows else None
+
+    def find_by_customer_email(self, email: str) -> List[Invoice]:
+        """Return invoices for a customer email, ignoring case and surrounding spaces."""
+        return self._find_by_key("customer_email_key", email)
+
+    def find_by_book(self, book_name: str) -> List[Invoice]:
+        """Return invoices for a book name, ignoring case and surrounding spaces."""
+        return self._find_by_key("book_name_key", book_name)
+
+    def find_by_author(self, author: str) -> List[Invoice]:
+        """Return invoices for books by an author, ignoring case and surrounding spaces."""
+        return self._find_by_key("author_key", author)
+
+    def _find_by_key(self, column: str, value: str) -> List[Invoice]:
+        rows = self._storage.execute(f"{self.SELECT} WHERE {column} = ? ORDER BY id", (normalize_key(value),))
+        return [invoice_from_record(row) for row in rows]
+
+    def find_by_ship_date(self, ship_date: date) -> List[Invoice]:
+        """Return invoices shipped on the given day."""
+        start = datetime.combine(ship_date, time.min)
+        rows = self._storage.execute(
+            f"{self.SELECT} WHERE ship_date >= ? AND ship_date < ? ORDER BY id",
+            (start.isoformat(), (start + timedelta(days=1)).isoformat()))
+        return [invoice_from_record(row) for row in rows]
+
+    def sorted_ids(self, field: str, descending: bool = False, up_to_id: Optional[int] = None) -> array:
+        """Return the row ids of invoices ordered by a SORT_EXPRESSIONS field, ties in insertion order."""
+        expression = f"{self.SORT_EXPRESSIONS[field]}{' DESC' if descending else ''}, id"
+        if up_to_id is None:
+            rows = self._storage.stream(f"SELECT id FROM invoices ORDER BY {expression}", batch_size=10_000)
+        else:
+            rows = self._storage.stream(f"SELECT id FROM invoices WHERE id <= ? ORDER BY {expression}",
+                                        (up_to_id,), batch_size=10_000)
+        return array("q", (row[0] for row in rows))
+
+    def get_by_ids(self, ids: Sequence[int]) -> List[Invoice]:
+        """Return the invoices with the given row ids, in the order given."""
+        records: Dict[int, tuple] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for row in self._storage.execute(
+                    f"SELECT id, {INVOICE_COLUMNS} FROM invoices WHERE id IN ({', '.join('?' * len(chunk))})",
+                    tuple(chunk)):
+                records[row[0]] = row[1:]
+        return [invoice_from_record(records[row_id]) for row_id in ids if row_id in records]
+
+    def iter_all(self, up_to_id: Optional[int] = None) -> Iterator[Invoice]:
+        """Yield all invoices in insertion order, up to a snapshot row id if given."""
+        for row in self.iter_records(up_to_id):
+            yield invoice_from_record(row)
+
+    def iter_records(self, up_to_id: Optional[int] = None) -> Iterator[tuple]:
+        """Yield all invoices as record tuples in insertion order, without building objects."""
+        if up_to_id is None:
+            return self._storage.stream(f"{self.SELECT} ORDER BY id")
+        return self._storage.stream(f"{self.SELECT} WHERE id <= ? ORDER BY id", (up_to_id,))
+
+    def count(self, up_to_id: Optional[int] = None) -> int:
+        """Return the number of persisted invoices, up to a snapshot row id if given."""
+        if up_to_id is None:
+            return self._storage.execute("SELECT COUNT(*) FROM invoices")[0][0]
+        return self._storage.execute("SELECT COUNT(*) FROM invoices WHERE id <= ?", (up_to_id,))[0][0]
+
+    def snapshot_id(self) -> int:
+        """Return the highest row id, bounding reads to the invoices persisted so far."""
+        return self._storage.execute("SELECT COALESCE(MAX(id), 0) FROM invoices")[0][0]
+
+    def page(self, offset: int, limit: int, up_to_id: Optional[int] = None) -> List[Invoice]:
+        """Return up to limit invoices in insertion order, skipping the first offset."""
+        if up_to_id is None:
+            up_to_id = self.snapshot_id()
+        rows = self._storage.execute(
+            f"{self.SELECT} WHERE id <= ? ORDER BY id LIMIT ? OFFSET ?", (up_to_id, limit, offset))
+        return [invoice_from_record(row) for row in rows]
+
+    def page_after(self, after_id: int, limit: int,
+                   up_to_id: Optional[int] = None) -> Tuple[List[Invoice], int]:
+        """Return up to limit invoices with row ids above after_id, and the last row id read.
+
+        Seeks straight to after_id on the primary key, so deep pages cost the
+        same as the first.
+        """
+        if up_to_id is None:
+            up_to_id = self.snapshot_id()
+        rows = self._storage.execute(
+            f"SELECT id, {INVOICE_COLUMNS} FROM invoices WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (after_id, up_to_id, limit))
+        return [invoice_from_record(row[1:]) for row in rows], rows[-1][0] if rows else after_id
+
+    def iter_number_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                          up_to_id: Optional[int] = None) -> Iterator[Invoice]:
+        """Yield invoices numbered from start to end inclusive, in number order.
+
+        Either bound may be omitted. Uses the unique index on invoice_nbr.
+        """
+        clauses, params = self._bounds("invoice_nbr", start, end, up_to_id)
+        for row in self._storage.stream(f"{self.SELECT}{clauses} ORDER BY invoice_nbr", params):
+            yield invoice_from_record(row)
+
+    def iter_ship_date_range(self, start: Optional[date] = None, end: Optional[date] = None,
+                             up_to_id: Optional[int] = None) -> Iterator[Invoice]:
+        """Yield invoices shipped from day start to day end inclusive, in ship date order."""
+        low = datetime.combine(start, time.min).isoformat() if start else None
+        high = datetime.combine(end + timedelta(days=1), time.min).isoformat() if end else None
+        clauses, params = self._bounds("ship_date", low, high, up_to_id, exclusive_end=True)
+        for row in self._storage.stream(f"{self.SELECT}{clauses} ORDER BY ship_date, id", params):
+            yield invoice_from_record(row)
+
+    @staticmethod
+    def _bounds(column: str, start, end, up_to_id: Optional[int],
+                exclusive_end: bool = False) -> Tuple[str, tuple]:
+        """Build the WHERE clause for a range scan over column."""
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"{column} {'<' if exclusive_end else '<='} ?")
+            params.append(end)
+        if up_to_id is not None:
+            conditions.append("id <= ?")
+            params.append(up_to_id)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), tuple(params)
+
+    def aggregates(self) -> RunningAggregates:
+        """Compute sales totals for all persisted invoices in SQL."""
+        totals = RunningAggregates()
+        count, revenue, urgent = self._storage.execute(
+            "SELECT COUNT(*), COALESCE(SUM(total_cost), 0), COALESCE(SUM(urgent), 0) FROM invoices")[0]
+        totals.invoice_count, totals.total_revenue, totals.urgent_count = count, revenue, urgent
+        totals.revenue_by_book = dict(self._storage.execute(
+            "SELECT book_name, SUM(total_cost) FROM invoices GROUP BY book_name"))
+        totals.revenue_by_customer = dict(self._storage.execute(
+            "SELECT customer_email, SUM(total_cost) FROM invoices GROUP BY customer_email"))
+        return totals
+
+class IdempotencyRepository:
+    """Repository mapping client idempotency keys to the invoices they created."""
+    INSERT = "INSERT OR REPLACE INTO idempotency_keys (key, invoice_nbr, created_at) VALUES (?, ?, ?)"
+    # Keys per query, under SQLite's default limit on bound parameters
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def add_many(self, rows: Iterable[Tuple[str, str, float]]) -> int:
+        """Record (key, invoice number, created at) rows in one transaction."""
+        return self._storage.execute_many(self.INSERT, rows)
+
+    def get_many(self, keys: List[str], since: float = 0.0) -> Dict[str, str]:
+        """Return key -> invoice number for the keys recorded no earlier than since."""
+        found: Dict[str, str] = {}
+        for start in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOOKUP_CHUNK]
+            found.update(self._storage.execute(
+                f"SELECT key, invoice_nbr FROM idempotency_keys "
+                f"WHERE key IN ({', '.join('?' * len(chunk))}) AND created_at >= ?", (*chunk, since)))
+        return found
+
+    def purge(self, before: float) -> int:
+        """Forget keys recorded before a time and return how many were removed."""
+        return self._storage.execute_many("DELETE FROM idempotency_keys WHERE created_at < ?", [(before,)])
+
+    def count(self) -> int:
+        """Return the number of recorded keys."""
+        return self._storage.execute("SELECT COUNT(*) FROM idempotency_keys")[0][0]
+
+def test_storage_system():
+    """Test function to verify persistence round-trips."""
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bookstore.db")
+        storage = SQLiteStorage(path)
+        print("\n=== Testing SQLite Storage ===")
+        print(f"Opened before first use? {storage.is_open}")
+        from bookstore_core_inher import BookStore
+        BookStore(storage)
+        print(f"Opened by building a BookStore? {storage.is_open}")
+
+        customer = Customer("John Doe", "123-456-7890", "john@example.com")
+        stock = Stock("Python Programming", "John Smith", 29.99)
+        storage.customers.add(customer)
+        storage.catalogue.add(stock)
+
+        shipping = Shipping(Order(customer, stock), datetime.now())
+        shipping.set_ship_cost(True)
+        invoice = Invoice("INV001", stock, shipping)
+        invoice.calculate_total()
+        storage.invoices.add(invoice)
+        storage.close()
+
+        reopened = SQLiteStorage(path)
+        loaded = reopened.invoices.get("INV001")
+        print(f"Customers: {reopened.customers.count()}, Books: {reopened.catalogue.count()}, "
+              f"Invoices: {reopened.invoices.count()}")
+        print(f"Reloaded {loaded.invoice_nbr}: {loaded.ship_order.order.customer.name}, "
+              f"{loaded.stock.book_name}, Total: £{loaded.total_cost:.2f}")
+        print(f"Invoices for john@example.com: {len(reopened.invoices.find_by_customer_email('john@example.com'))}")
+        reopened.close()
+
+        print("\n=== Testing Lookups Match In Memory ===")
+        from bookstore_core_inher import BookStore
+        stored, in_memory = BookStore(SQLiteStorage(os.path.join(tmp, "search.db"))), BookStore()
+        for bookstore in (stored, in_memory):
+            bookstore.create_invoices([(customer, stock, False)])
+        for search, value in ((BookStore.search_by_customer_email, " JOHN@Example.com"),
+                              (BookStore.search_by_book, "python programming"),
+                              (BookStore.search_by_author, "JOHN SMITH")):
+            print(f"{search.__name__}({value!r}): SQLite {len(search(stored, value))}, "
+                  f"in memory {len(search(in_memory, value))}")
+        stored.storage.close()
+
+if __name__ == "__main__":
+    test_storage_system()
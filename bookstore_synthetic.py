@@ -0,0 +1,103 @@
+"""
+Book Ordering System - Synthetic Data
+This module generates seeded customers, books and orders at any scale for benchmarks.
+
+The same seed and counts always produce the same data, whichever core module
+(bookstore_core or bookstore_core_inher) the objects are built from, so
+timings from different runs and different modules compare like for like.
+Orders are generated lazily, so 10M orders never exist as one list unless
+the caller builds one.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+
+FIRST_NAMES = ("Alice", "Bob", "Carol", "David", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+               "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Victor", "Walter", "Yara")
+LAST_NAMES = ("Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Johnson", "Davies", "Patel",
+              "Wright", "Walker", "Thompson", "White", "Hughes", "Edwards", "Green", "Hall", "Wood")
+TITLE_WORDS = ("Python", "Data", "Modern", "Practical", "Systems", "Design", "Patterns", "Guide",
+               "Algorithms", "Networks", "History", "Garden", "Ocean", "Silent", "Winter", "Kingdom")
+START = datetime(2020, 1, 1)
+URGENT_SHARE = 0.3
+
+def catalogue_size(orders: int) -> Tuple[int, int]:
+    """Return (customers, books) proportioned for a number of orders."""
+    return min(max(100, orders // 10), 1_000_000), min(max(50, orders // 50), 200_000)
+
+def make_customers(module, count: int, seed: int = 1) -> List:
+    """Return count seeded customers built with module.Customer."""
+    rng = random.Random(seed)
+    customers = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        customers.append(module.Customer(f"{first} {last}", f"555-{i:07d}",
+                                         f"{first.lower()}.{last.lower()}{i}@example.com"))
+    return customers
+
+def make_stocks(module, count: int, seed: int = 2) -> List:
+    """Return count seeded books built with module.Stock."""
+    rng = random.Random(seed)
+    stocks = []
+    for i in range(count):
+        title = " ".join(rng.sample(TITLE_WORDS, 3))
+        stocks.append(module.Stock(f"{title} Vol. {i}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                   round(rng.uniform(4.99, 59.99), 2)))
+    return stocks
+
+def iter_orders(count: int, customers: int, books: int, seed: int = 3) -> Iterator[Tuple[int, int, bool, datetime]]:
+    """Yield (customer index, book index, urgent, ship date) for count orders.
+
+    Ship dates advance monotonically, about one order a minute.
+    """
+    rng = random.Random(seed)
+    randrange, random_ = rng.randrange, rng.random
+    for i in range(count):
+        yield randrange(customers), randrange(books), random_() < URGENT_SHARE, START + timedelta(seconds=60 * i)
+
+class SyntheticData:
+    """Seeded customers, books and orders for one scale, built from one core module."""
+    def __init__(self, module, orders: int, seed: int = 42):
+        self.module = module
+        self.orders = orders
+        self.seed = seed
+        customer_count, book_count = catalogue_size(orders)
+        self.customers = make_customers(module, customer_count, seed)
+        self.stocks = make_stocks(module, book_count, seed + 1)
+
+    def iter_orders(self) -> Iterator[Tuple[int, int, bool, datetime]]:
+        """Yield the orders; see iter_orders."""
+        return iter_orders(self.orders, len(self.customers), len(self.stocks), self.seed + 2)
+
+    def iter_invoices(self) -> Iterator:
+        """Yield one priced invoice per order, numbered INV0000000001 on."""
+        module = self.module
+        Order, Shipping, Invoice = module.Order, module.Shipping, module.Invoice
+        customers, stocks = self.customers, self.stocks
+        for number, (customer, stock, urgent, ship_date) in enumerate(self.iter_orders(), 1):
+            stock = stocks[stock]
+            shipping = Shipping(Order(customers[customer], stock), ship_date)
+            shipping.set_ship_cost(urgent)
+            invoice = Invoice(f"INV{number:010d}", stock, shipping)
+            invoice.calculate_total()
+            yield invoice
+
+def test_synthetic_data():
+    """Test function to verify the generator is seeded and module-independent."""
+    import bookstore_core
+    import bookstore_core_inher
+
+    print("\n=== Testing Synthetic Data ===")
+    plain = list(SyntheticData(bookstore_core, 1_000).iter_invoices())
+    inher = list(SyntheticData(bookstore_core_inher, 1_000).iter_invoices())
+    again = list(SyntheticData(bookstore_core_inher, 1_000).iter_invoices())
+    first = inher[0]
+    print(f"First invoice: {first.invoice_nbr} {first.ship_order.order.customer.name} "
+          f"'{first.stock.book_name}' £{first.total_cost:.2f}")
+    print(f"Same totals across modules: {[i.total_cost for i in plain] == [i.total_cost for i in inher]}")
+    print(f"Same totals across runs: {[i.total_cost for i in inher] == [i.total_cost for i in again]}")
+    print(f"Catalogue for 1M orders: {catalogue_size(1_000_000)}")
+
+if __name__ == "__main__":
+    test_synthetic_data()
@@ -0,0 +1,128 @@
+"""
+Book Ordering System - Background Tasks
+This module runs slow work on a thread pool and hands results back to the Tk main loop.
+"""
+
+import queue
+import threading
+from typing import Callable, Optional, Set
+
+from bookstore_profiling import measure
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it notices it has been cancelled."""
+
+class Task:
+    """Handle for a piece of work submitted to a TaskRunner."""
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check whether cancellation has been requested."""
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation; callbacks for a cancelled task never run."""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self) -> None:
+        """Raise TaskCancelled if cancellation has been requested."""
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+class TaskRunner:
+    """Thread pool whose results are delivered on the Tk main loop.
+
+    Workers put their outcome on a thread-safe queue, and the queue is drained
+    from root.after polling while tasks are in flight, so callbacks always run
+    on the Tk thread. Work functions must not touch Tk widgets themselves.
+    """
+    def __init__(self, root, max_workers: int = 4, poll_ms: int = 50,
+                 on_busy_change: Optional[Callable[[bool], None]] = None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+        self.max_workers = max_workers
+        # Started with the first task, keeping the pool's import and threads off startup
+        self._executor = None
+        self._results: "queue.Queue" = queue.Queue()
+        self._active: Set[Task] = set()
+        self._polling = False
+
+    @property
+    def busy(self) -> bool:
+        """Check whether any task is still in flight."""
+        return bool(self._active)
+
+    def submit(self, fn: Callable, *args, name: str = "", pass_task: bool = False,
+               on_success: Optional[Callable] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Task:
+        """Run fn(*args) on a worker thread; with pass_task, fn(task, *args)."""
+        task = Task(name or getattr(fn, "__name__", ""))
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bookstore")
+        task.future = self._executor.submit(self._run, task, fn, args, pass_task,
+                                            on_success, on_error)
+        self._active.add(task)
+        if len(self._active) == 1 and self.on_busy_change is not None:
+            self.on_busy_change(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def cancel_all(self) -> None:
+        """Request cancellation of every task in flight."""
+        for task in list(self._active):
+            task.cancel()
+
+    def shutdown(self) -> None:
+        """Cancel pending work and stop the worker threads."""
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: Task, fn: Callable, args: tuple, pass_task: bool,
+             on_success: Optional[Callable], on_error: Optional[Callable]) -> None:
+        try:
+            with measure(f"task:{task.name}"):
+                result = fn(task, *args) if pass_task else fn(*args)
+        except BaseException as exc:
+            self._results.put((task, False, exc, on_success, on_error))
+        else:
+            self._results.put((task, True, result, on_success, on_error))
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                task, ok, value, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(task)
+            if task.cancelled or isinstance(value, TaskCancelled):
+                continue
+            if ok:
+                if on_success is not None:
+                    with measure(f"callback:{task.name}", main_loop=True):
+                        on_success(value)
+            elif on_error is not None:
+                on_error(value)
+        # Tasks cancelled before they started never report back
+        for task in [t for t in self._active if t.future.cancelled()]:
+            self._finish(task)
+        if self._active:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _finish(self, task: Task) -> None:
+        if task in self._active:
+            self._active.discard(task)
+            if not self._active and self.on_busy_change is not None:
+                self.on_busy_change(False)